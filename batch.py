@@ -0,0 +1,138 @@
+from collections.abc import Iterable
+from typing import Optional, Tuple
+
+import numpy as np
+
+from battle import Battler
+
+# Empty type declarations so that the names can be used in type hints
+class BatchBattle: pass
+
+DRAW = -1
+"""Value used in BatchBattle.winners for battles that ended without either team standing."""
+
+def _stats(member: Battler | Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Returns the (health, damage) pair for a team member, which can be given either as a Battler or as a (health, damage) tuple.
+    """
+    if isinstance(member, Battler):
+        return member.stats.health, member.stats.damage
+    health, damage = member
+    return health, damage
+
+class BatchBattle:
+    """
+    Runs many basic-attack battles side by side, storing the state of every battle in NumPy arrays.
+
+    Each battle is a row in the arrays: the first columns hold team 1 and the remaining columns hold team 2,
+    padded to the size of the largest team in the batch. Every call to .step advances all unfinished battles
+    by one turn, following the same turn order and targeting rules as Battle.next, so the winners and turn counts
+    match what Battle.resolve would give for battlers that only use BASIC_ATTACK.
+    """
+    def __init__(self, matchups: Iterable[Tuple[list, list]]) -> None:
+        matchups = [([_stats(m) for m in team1], [_stats(m) for m in team2]) for team1, team2 in matchups]
+
+        self.width1: int = max((len(t1) for t1, _ in matchups), default=0)
+        """Number of columns reserved for team 1."""
+        width2 = max((len(t2) for _, t2 in matchups), default=0)
+        size = self.width1 + width2
+        count = len(matchups)
+
+        self.health = np.zeros((count, size), dtype=np.int64)
+        self.damage = np.zeros((count, size), dtype=np.int64)
+        # Battlers still on their team (i.e. possible targets).
+        self.in_team = np.zeros((count, size), dtype=bool)
+        # Battlers still in the turn order.
+        self.scheduled = np.zeros((count, size), dtype=bool)
+
+        for row, (team1, team2) in enumerate(matchups):
+            for col, (health, damage) in enumerate(team1):
+                self.health[row, col] = health
+                self.damage[row, col] = damage
+            for col, (health, damage) in enumerate(team2, self.width1):
+                self.health[row, col] = health
+                self.damage[row, col] = damage
+            self.in_team[row, :len(team1)] = True
+            self.in_team[row, self.width1:self.width1 + len(team2)] = True
+        self.scheduled[:] = self.in_team
+
+        # Column at which to start looking for the next battler to act.
+        self.cursor = np.zeros(count, dtype=np.int64)
+        self.turns = np.zeros(count, dtype=np.int64)
+        """Current turn number of each battle."""
+        self.winners = np.full(count, DRAW, dtype=np.int64)
+        """Index of the winning team (0 or 1) of each finished battle, or DRAW."""
+        self.done = np.zeros(count, dtype=bool)
+        """True for each battle that is over."""
+        self._columns = np.arange(size, dtype=np.int64)
+
+        self._settle(np.arange(count))
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def _settle(self, rows: np.ndarray) -> None:
+        """
+        Marks the given battles as done if at least one of their teams is empty, recording the winner.
+        """
+        alive1 = self.in_team[rows, :self.width1].any(axis=1)
+        alive2 = self.in_team[rows, self.width1:].any(axis=1)
+        over = ~(alive1 & alive2)
+        rows = rows[over]
+        self.done[rows] = True
+        self.winners[rows] = np.where(alive1[over], 0, np.where(alive2[over], 1, DRAW))
+
+    def is_done(self) -> bool:
+        """
+        Check if every battle in the batch is over.
+        """
+        return bool(self.done.all())
+
+    def step(self) -> int:
+        """
+        Advances every unfinished battle by one turn.
+
+        Returns the number of battles that are still running after the turn.
+        """
+        rows = np.flatnonzero(~self.done)
+        if rows.size == 0:
+            return 0
+
+        size = self._columns.size
+        order = (self._columns - self.cursor[rows, None]) % size
+        actor = np.where(self.scheduled[rows], order, size).argmin(axis=1)
+
+        # Battlers always attack the first member of the opposing team.
+        first1 = self.in_team[rows, :self.width1].argmax(axis=1)
+        first2 = self.width1 + self.in_team[rows, self.width1:].argmax(axis=1)
+        target = np.where(actor < self.width1, first2, first1)
+
+        self.health[rows, target] -= self.damage[rows, actor]
+
+        # A battler that acts without any health left does not get another turn.
+        spent = self.health[rows, actor] <= 0
+        self.scheduled[rows[spent], actor[spent]] = False
+
+        killed = self.health[rows, target] <= 0
+        self.in_team[rows[killed], target[killed]] = False
+        self.scheduled[rows[killed], target[killed]] = False
+
+        self.cursor[rows] = (actor + 1) % size
+        self.turns[rows] += 1
+        self._settle(rows)
+
+        return int(np.count_nonzero(~self.done))
+
+    def resolve(self, max_turns: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Steps through the batch until every battle is over, or until max_turns steps have been taken.
+
+        Returns the winners and turns arrays.
+        """
+        steps = 0
+        while not self.is_done():
+            if max_turns is not None and max_turns <= steps:
+                break
+            self.step()
+            steps += 1
+        return self.winners, self.turns
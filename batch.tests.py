@@ -0,0 +1,72 @@
+import unittest
+import random
+
+from batch import DRAW, BatchBattle
+from battle import Battle, Battler
+
+def winner(battle: Battle) -> int:
+    if 0 < len(battle.teams[0]):
+        return 0
+    if 0 < len(battle.teams[1]):
+        return 1
+    return DRAW
+
+class TestBatchBattle(unittest.TestCase):
+
+    def test_batch_creation(self):
+        batch = BatchBattle([([(1, 1)], [(2, 1), (3, 1)])])
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch.health.shape, (1, 3))
+        self.assertFalse(batch.is_done())
+
+    def test_batch_creation_empty_teams(self):
+        batch = BatchBattle([([], []), ([(1, 1)], []), ([], [(1, 1)])])
+        self.assertTrue(batch.is_done())
+        self.assertEqual(list(batch.winners), [DRAW, 0, 1])
+        self.assertEqual(list(batch.turns), [0, 0, 0])
+
+    def test_batch_accepts_battlers(self):
+        batch = BatchBattle([([Battler("A", 1, 1)], [Battler("B", 2, 1)])])
+        winners, turns = batch.resolve()
+        self.assertEqual(winners[0], 1)
+        self.assertEqual(turns[0], 2)
+
+    def test_batch_step(self):
+        batch = BatchBattle([([(1, 1)], [(2, 1)]), ([(1, 5)], [(5, 1)])])
+        running = batch.step()
+        self.assertEqual(running, 1, "The second battle should be won by team 1 in the first turn.")
+        self.assertEqual(list(batch.turns), [1, 1])
+        self.assertEqual(batch.winners[1], 0)
+        batch.step()
+        self.assertTrue(batch.is_done())
+        self.assertEqual(batch.winners[0], 1)
+        self.assertEqual(list(batch.turns), [2, 1])
+
+    def test_batch_max_turns(self):
+        batch = BatchBattle([([(1, 0)], [(1, 0)])])
+        batch.resolve(max_turns=10)
+        self.assertFalse(batch.is_done())
+        self.assertEqual(batch.turns[0], 10)
+
+    def test_batch_matches_battle_resolve(self):
+        rng = random.Random(1337)
+        matchups = []
+        for _ in range(200):
+            team1 = [(rng.randint(-1, 15), rng.randint(1, 6)) for _ in range(rng.randint(1, 5))]
+            team2 = [(rng.randint(-1, 15), rng.randint(1, 6)) for _ in range(rng.randint(1, 5))]
+            matchups.append((team1, team2))
+
+        winners, turns = BatchBattle(matchups).resolve()
+
+        for i, (team1, team2) in enumerate(matchups):
+            battle = Battle(
+                [Battler(f"A{n}", h, d) for n, (h, d) in enumerate(team1)],
+                [Battler(f"B{n}", h, d) for n, (h, d) in enumerate(team2)]
+            )
+            battle.resolve()
+            self.assertEqual(winners[i], winner(battle), f"Matchup {i} should have the same winner as Battle.resolve")
+            self.assertEqual(turns[i], battle.current_turn, f"Matchup {i} should take as many turns as Battle.resolve")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
-from collections import deque
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
 import enum
-from typing import Any, Callable, Tuple
+import heapq
+from typing import Any, Callable, Optional, Tuple
 from emitter import Emitter
 
 # Empty type declarations so that the names can be used in type hints
@@ -10,13 +14,23 @@ class BasicAttack: pass
 class Battler: pass
 class BattleEventType: pass
 class BattleEvent: pass
+class RoundRobinScheduler: pass
+class InitiativeScheduler: pass
+class BattleSnapshot: pass
+class OutcomeCache: pass
+class BattleSummary: pass
 class Battle: pass
 
 class BattleDoneException(Exception): pass
 class BattleWonException(Exception): pass
 class BattleDrawException(Exception): pass
 
-class StatBlock(dict):
+class StatBlock:
+    """
+    Health and damage of a battler. Uses __slots__, so each instance only holds the two values.
+    """
+    __slots__ = ("health", "damage")
+
     def __init__(self, health:int=0, damage:int=0) -> None:
         self.health = health
         self.damage = damage
@@ -39,6 +53,9 @@ class StatBlock(dict):
     def clone(self):
         return StatBlock(self.health, self.damage)
 
+    def __repr__(self) -> str:
+        return f"StatBlock({self.health}, {self.damage})"
+
 # Base class for actions used by battlers.
 class Action:
     def __init__(self, name:str) -> None:
@@ -61,24 +78,46 @@ class BasicAttack(Action):
 
 BASIC_ATTACK = BasicAttack()
 
+def initiative(base:float, pensive:float) -> float:
+    """
+    Calculates the mechanical Initiative score described in personality.md: [base initiative] / [Pensive].
+    """
+    return base / pensive
+
 class Battler(Emitter):
-    def __init__(self, name:str, health:int, damage:int) -> None:
+    def __init__(self, name:str, health:int, damage:int, initiative:float=20) -> None:
         super().__init__()
         
-        self.events["act_start"] = []
-        self.events["act_end"] = []
+        self.events.declare("act_start")
+        self.events.declare("act_end")
 
         self.name   = name
         self.stats  = StatBlock(health, damage)
+        # Speed with which the battler acts, used by InitiativeScheduler (defaults to a bog-standard human, see personality.md)
+        self.initiative = initiative
     
-    def act(self, allies:list, enemies:list) -> list[BattleEvent]:
+    def act(self, allies:list, enemies:list, log:Any=None, turn:int=0) -> Optional[list[BattleEvent]]:
+        """
+        Attacks the first enemy, returning the resulting BattleEvent(s).
+
+        If a log is given (see battlelog.BattleLog), the action is written to it as the given turn instead, without
+        creating a BattleEvent, and None is returned.
+        """
         self.emit("act_start")
         target = enemies[0]
-        before = target.stats.clone()
-        target.stats = BASIC_ATTACK.perform(self.stats, target.stats)
-        after = target.stats.clone()
+        before = target.stats
+        after = target.stats = BASIC_ATTACK.perform(self.stats, before)
+        if log is not None:
+            log.record_action(
+                turn, BattleEventType.ATTACK, BASIC_ATTACK, self, target,
+                after.health - before.health, after.damage - before.damage, after.health, after.damage
+            )
+            self.emit("act_end")
+            return None
+        # The event copies the values it needs, so no clones of the StatBlocks are required.
+        event = BattleEvent(BattleEventType.ATTACK, BASIC_ATTACK, self, target, before, after)
         self.emit("act_end")
-        return [BattleEvent(BattleEventType.ATTACK, BASIC_ATTACK, self, target, before, after)]
+        return [event]
         
 
     def __str__(self) -> str:
@@ -91,36 +130,305 @@ class BattleEventType(enum.IntEnum):
     ATTACK = 0
 
 class BattleEvent:
+    """
+    Records an action performed by a battler on a target.
+
+    Rather than keeping copies of the target's StatBlock from before and after the action, the event stores the
+    target's stats after the action and the change caused by it. The .before and .after StatBlocks are rebuilt on access.
+    """
+    __slots__ = ("type", "action", "battler", "target", "health", "damage", "health_delta", "damage_delta")
+
     def __init__(self, action_type:BattleEventType, action:Action, battler:Battler, target:Battler, before:StatBlock, after:StatBlock) -> None:
         self.type = action_type
         self.action = action
         self.battler = battler
         self.target = target
-        self.before = before
-        self.after  = after
+        self.health = after.health
+        self.damage = after.damage
+        self.health_delta = after.health - before.health
+        self.damage_delta = after.damage - before.damage
+
+    @property
+    def before(self) -> StatBlock:
+        return StatBlock(self.health - self.health_delta, self.damage - self.damage_delta)
+
+    @property
+    def after(self) -> StatBlock:
+        return StatBlock(self.health, self.damage)
+
+
+class RoundRobinScheduler:
+    """
+    Turn order where battlers take turns in a fixed cycle, in the order they were added.
+
+    Records are (team number, battler) tuples. Removing a battler only marks its queue entry as dead (a tombstone),
+    the entry is dropped when it reaches the front of the queue, so removal takes constant time.
+    """
+    def __init__(self, records:Iterable[Tuple[int, Battler]]=()) -> None:
+        self._queue = deque()
+        # Maps each scheduled battler to its queue entry, a single-item list holding the record (None once removed).
+        self._entries = {}
+        for record in records:
+            self.push(record)
+
+    def push(self, record:Tuple[int, Battler]) -> None:
+        """
+        Adds the record to the end of the turn order.
+        """
+        entry = [record]
+        self._entries[record[1]] = entry
+        self._queue.append(entry)
+
+    def pop(self) -> Tuple[int, Battler]:
+        """
+        Removes and returns the record of the next battler to act.
+
+        Raises IndexError if no battlers are scheduled.
+        """
+        while True:
+            record = self._queue.popleft()[0]
+            if record is not None:
+                del self._entries[record[1]]
+                return record
+
+    def remove(self, battler:Battler) -> bool:
+        """
+        Removes the battler from the turn order.
+
+        Returns True if the battler was scheduled, otherwise False.
+        """
+        entry = self._entries.pop(battler, None)
+        if entry is None:
+            return False
+        entry[0] = None
+        return True
+
+    def snapshot(self, index:dict[Battler, int]) -> array:
+        """
+        Returns the turn order as an array of battler indexes, using the given battler -> index map.
+        """
+        return array("q", (index[record[1]] for record in self))
+
+    def restore(self, state:array, records:list[Tuple[int, Battler]]) -> None:
+        """
+        Replaces the turn order with one returned by .snapshot, where records maps battler indexes to records.
+        """
+        self._queue = deque()
+        self._entries = {}
+        for i in state:
+            self.push(records[i])
+
+    def __contains__(self, battler:Battler) -> bool:
+        return battler in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        """
+        Iterates over the scheduled records in turn order.
+        """
+        return (entry[0] for entry in self._queue if entry[0] is not None)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({[str(record[1]) for record in self]})"
+
+class InitiativeScheduler(RoundRobinScheduler):
+    """
+    Turn order based on a timeline, where each battler acts again 1 / [Initiative] time units after its last turn.
+
+    Battlers due at the same time act in the order they were added, so battlers with equal initiative
+    take turns in the same order as with RoundRobinScheduler. Removal uses the same tombstones as RoundRobinScheduler.
+    """
+    def __init__(self, records:Iterable[Tuple[int, Battler]]=(), initiative:Callable[[Battler], float]=lambda b: b.initiative) -> None:
+        self.initiative = initiative
+        self.time: float = 0.0
+        """Time of the last turn taken."""
+        self._next_order = 0
+        self._queue = []
+        self._entries = {}
+        for record in records:
+            self.push(record)
+
+    def push(self, record:Tuple[int, Battler]) -> None:
+        """
+        Schedules the battler's next turn 1 / [Initiative] after the current time.
+        """
+        # Entries are [time, insertion order, record], the record is set to None once removed.
+        entry = [self.time + 1 / self.initiative(record[1]), self._next_order, record]
+        self._next_order += 1
+        self._entries[record[1]] = entry
+        heapq.heappush(self._queue, entry)
+
+    def pop(self) -> Tuple[int, Battler]:
+        """
+        Removes and returns the record of the battler with the earliest turn, advancing the time to that turn.
+
+        Raises IndexError if no battlers are scheduled.
+        """
+        while True:
+            time, _, record = heapq.heappop(self._queue)
+            if record is not None:
+                del self._entries[record[1]]
+                self.time = time
+                return record
+
+    def remove(self, battler:Battler) -> bool:
+        entry = self._entries.pop(battler, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        # Drop the tombstones once they make up most of the queue.
+        if 2 * len(self._entries) + 16 < len(self._queue):
+            self._queue = [e for e in self._queue if e[2] is not None]
+            heapq.heapify(self._queue)
+        return True
+
+    def snapshot(self, index:dict[Battler, int]) -> Tuple[float, int, array, array, array]:
+        """
+        Returns the timeline as (time, next insertion order, turn times, insertion orders, battler indexes).
+        """
+        entries = self._entries.values()
+        return (
+            self.time,
+            self._next_order,
+            array("d", (e[0] for e in entries)),
+            array("q", (e[1] for e in entries)),
+            array("q", (index[e[2][1]] for e in entries))
+        )
+
+    def restore(self, state:Tuple[float, int, array, array, array], records:list[Tuple[int, Battler]]) -> None:
+        self.time, self._next_order, times, orders, indexes = state
+        self._queue = [[t, o, records[i]] for t, o, i in zip(times, orders, indexes)]
+        heapq.heapify(self._queue)
+        self._entries = {e[2][1]: e for e in self._queue}
+
+    def __iter__(self):
+        return (entry[2] for entry in sorted(self._entries.values()))
+
+class BattleSnapshot:
+    """
+    Compact copy of the state of a Battle, returned by Battle.snapshot.
+
+    Battlers are referred to by their index in Battle.roster, so a snapshot only holds flat arrays of numbers
+    and can only be restored into the Battle that created it.
+    """
+    __slots__ = ("turn", "health", "damage", "teams", "turn_order")
+
+    def __init__(self, turn:int, health:array, damage:array, teams:Tuple[array, ...], turn_order:Any) -> None:
+        self.turn = turn
+        self.health = health
+        self.damage = damage
+        self.teams = teams
+        self.turn_order = turn_order
+
+class OutcomeCache:
+    """
+    Least-recently-used cache of battle outcomes, used by Battle.resolve to skip simulating battle states it has seen before.
+
+    Keys are canonical battle states: the (health, damage) of each team member in team order, and the turn order given
+    as (team number, position in team) pairs. Both orders are part of the key since they decide who acts and who gets hit.
+    Keys do not refer to battler objects, so different battles that reach the same state share entries.
+    """
+    def __init__(self, maxsize:int=100000) -> None:
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries = OrderedDict()
+
+    def get(self, key:Tuple) -> Optional[Tuple]:
+        """
+        Returns the outcome stored for the key (marking it as recently used), or None if there is none.
+        """
+        outcome = self._entries.get(key)
+        if outcome is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return outcome
+
+    def put(self, key:Tuple, outcome:Tuple) -> None:
+        """
+        Stores the outcome for the key, evicting the least recently used entry if the cache is full.
+        """
+        self._entries[key] = outcome
+        self._entries.move_to_end(key)
+        if self.maxsize < len(self._entries):
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key:Tuple) -> bool:
+        return key in self._entries
 
+class BattleSummary:
+    """
+    Outcome of a battle without the individual turns, returned by Battle.summarize.
+    """
+    __slots__ = ("winner", "turns", "damage_dealt", "damage_taken")
+
+    def __init__(self, winner:Optional[int], turns:int, damage_dealt:dict[Battler, int], damage_taken:dict[Battler, int]) -> None:
+        self.winner = winner
+        """Index of the team left standing, or None if neither team is."""
+        self.turns = turns
+        self.damage_dealt = damage_dealt
+        """Maps each battler to the total health its actions removed from targets."""
+        self.damage_taken = damage_taken
+        """Maps each battler to the total health it lost."""
 
+    def __repr__(self) -> str:
+        return f"BattleSummary(winner={self.winner}, turns={self.turns})"
     
 class Battle(Emitter):
     """
     Represents a battle. Tracks current turn number, organizes turn order and facilitates combat turns.
     """
-    def __init__(self, team1:list, team2:list) -> None:
+    def __init__(self, team1:list, team2:list, scheduler:Optional[Callable[[Iterable[Tuple[int, Battler]]], RoundRobinScheduler]]=None) -> None:
+        """
+        The scheduler is called with the (team number, battler) records to create the turn order, defaults to RoundRobinScheduler.
+        """
         super().__init__()
         
-        self.events["turn_start"] = []
-        self.events["turn_end"] = []
+        self.events.declare("turn_start")
+        self.events.declare("turn_end")
         
         self.teams = [
             team1,
             team2
         ]
-        self.turn_order = deque()
+        # Turn order records (team number, battler) of all battlers, in the same order as the roster.
+        self._records = []
+        # Maps each battler to the number of its team.
+        self._team_of = {}
         for team_num in range(0, len(self.teams)):
             team = self.teams[team_num]
             for battler in team:
-                self.turn_order.append((team_num, battler))
+                self._records.append((team_num, battler))
+                self._team_of[battler] = team_num
+        self.roster: list[Battler] = [record[1] for record in self._records]
+        """All battlers that started the battle, team 1 first."""
+        self._index = {battler: i for i, battler in enumerate(self.roster)}
+        self.turn_order = (scheduler or RoundRobinScheduler)(self._records)
         self.current_turn = 0
+        self.log = None
+        """
+        Optional event log (see battlelog.BattleLog), which every turn's events are recorded into.
+        With a log, .next returns the turn's rows of the log (see battlelog.BattleLogRows) as its events.
+        """
 
     
     def next(self) -> Tuple[int, list[BattleEvent]]:
@@ -136,9 +444,7 @@ class Battle(Emitter):
 
         self.current_turn += 1
 
-        battler_record = self.turn_order.popleft()
-        
-        print(f"{battler_record[1].name} is going ({battler_record[1].stats.health}hp)")
+        battler_record = self.turn_order.pop()
 
         team = battler_record[0]
         battler = battler_record[1]
@@ -147,22 +453,141 @@ class Battle(Emitter):
         
         self.emit("turn_start", battler)
 
-        battle_events = battler.act(allies=allies, enemies=enemies)
+        log = self.log
+        if log is None:
+            battle_events = battler.act(allies=allies, enemies=enemies)
+            targets = [e.target for e in battle_events]
+        else:
+            start = len(log)
+            if type(battler).act is Battler.act:
+                battler.act(allies=allies, enemies=enemies, log=log, turn=self.current_turn)
+            else:
+                # Custom actions return their events, which are copied into the log.
+                for e in battler.act(allies=allies, enemies=enemies):
+                    log.append(self.current_turn, e)
+            battle_events = log.rows(start)
+            targets = [log.roster[i] for i in log.target[start:]]
 
         if 0 < battler.stats.health:
-            self.turn_order.append(battler_record)
+            self.turn_order.push(battler_record)
         
-        for battle_event in battle_events:
-            if battle_event.target.stats.health <= 0:
-                t = battle_event.target
-                enemies.remove(t)
-                self.turn_order = deque(filter(lambda r: r[1] != t, self.turn_order))
+        for target in targets:
+            if target.stats.health <= 0:
+                self._remove(target)
     
         
         self.emit("turn_end", battler)
 
         return self.current_turn, battle_events
     
+    def team_of(self, battler:Battler) -> int:
+        """
+        Returns the number of the team the battler started the battle on.
+        """
+        return self._team_of[battler]
+
+    def _remove(self, battler:Battler) -> None:
+        """
+        Removes a defeated battler from its team and from the turn order.
+        """
+        self.turn_order.remove(battler)
+        team = self.teams[self._team_of[battler]]
+        # Battlers almost always fall at the front of their team, since that is where attacks land.
+        if 0 < len(team) and team[0] is battler:
+            del team[0]
+        elif battler in team:
+            team.remove(battler)
+
+    def snapshot(self) -> BattleSnapshot:
+        """
+        Captures the current turn, the stats of every battler, the teams and the turn order in a compact BattleSnapshot.
+
+        Event handlers and battler objects are not copied, which makes it cheap to branch a battle many times for lookahead search:
+        take a snapshot, try a line of play, then .restore the snapshot and try the next one.
+        """
+        index = self._index
+        return BattleSnapshot(
+            self.current_turn,
+            array("q", (b.stats.health for b in self.roster)),
+            array("q", (b.stats.damage for b in self.roster)),
+            tuple(array("q", (index[b] for b in team)) for team in self.teams),
+            self.turn_order.snapshot(index)
+        )
+
+    def restore(self, snapshot:BattleSnapshot) -> None:
+        """
+        Returns the battle to the state captured by .snapshot.
+
+        The team lists are updated in place, and each battler gets a new StatBlock (events from other branches keep their own copies).
+        """
+        roster = self.roster
+        for battler, health, damage in zip(roster, snapshot.health, snapshot.damage):
+            battler.stats = StatBlock(health, damage)
+        for team, indexes in zip(self.teams, snapshot.teams):
+            team[:] = [roster[i] for i in indexes]
+        self.turn_order.restore(snapshot.turn_order, self._records)
+        self.current_turn = snapshot.turn
+
+    def _is_basic(self) -> bool:
+        """
+        Check if the outcome of the battle only depends on the stats and order of the battlers, i.e. if every battler
+        uses the default Battler.act, there are no event handlers and turns are taken in round-robin order.
+
+        Battles with an event log never count as basic, so that every turn ends up in the log.
+        """
+        if type(self.turn_order) is not RoundRobinScheduler or self.log is not None:
+            return False
+        if any(self.events.values()):
+            return False
+        for battler in self.roster:
+            if type(battler).act is not Battler.act or any(battler.events.values()):
+                return False
+        return True
+
+    def _state_key(self) -> Tuple[Tuple, list[list[Battler]]]:
+        """
+        Returns the canonical state used as OutcomeCache key, and the team members that the positions in the key refer to.
+        """
+        members = [list(team) for team in self.teams]
+        positions = {}
+        for team_num, team in enumerate(members):
+            for position, battler in enumerate(team):
+                positions[battler] = (team_num, position)
+        key = (
+            tuple(tuple((b.stats.health, b.stats.damage) for b in team) for team in members),
+            tuple(positions[record[1]] for record in self.turn_order)
+        )
+        return key, members
+
+    def _outcome(self, members:list[list[Battler]], turn:int) -> Tuple:
+        """
+        Describes the current (finished) state relative to the team members at an earlier turn:
+        (turns since then, health of each member, remaining member positions, turn order as (team number, position) pairs).
+        """
+        positions = {}
+        for team_num, team in enumerate(members):
+            for position, battler in enumerate(team):
+                positions[battler] = (team_num, position)
+        return (
+            self.current_turn - turn,
+            tuple(tuple(b.stats.health for b in team) for team in members),
+            tuple(tuple(positions[b][1] for b in team) for team in self.teams),
+            tuple(positions[record[1]] for record in self.turn_order)
+        )
+
+    def _apply_outcome(self, members:list[list[Battler]], outcome:Tuple) -> None:
+        """
+        Fast-forwards the battle to the outcome returned by ._outcome for the given team members.
+        """
+        turns, health, teams, order = outcome
+        for team_members, team_health in zip(members, health):
+            for battler, h in zip(team_members, team_health):
+                battler.stats = StatBlock(h, battler.stats.damage)
+        for team, team_members, positions in zip(self.teams, members, teams):
+            team[:] = [team_members[p] for p in positions]
+        self.turn_order.restore([self._index[members[t][p]] for t, p in order], self._records)
+        self.current_turn += turns
+
     def is_done(self):
         """
         Check if the battle is over, i.e. if at least one teams is empty.
@@ -183,12 +608,206 @@ class Battle(Emitter):
         
         return self.next()
     
-    def resolve(self) -> list[Tuple[int, list[BattleEvent]]]:
+    def _next_defeat(self) -> Optional[Tuple[int, list[BattleEvent]]]:
+        """
+        Jumps to the end of the next turn in which a battler is defeated, without stepping through the turns in between.
+
+        Until someone is defeated, the turn order repeats the same cycle and every attack lands on the first member of the
+        opposing team, so the number of turns until each front battler falls can be calculated from the damage dealt per cycle.
+
+        Returns the turn number and the event for the defeating blow. Returns None if it had to fall back to a single .next
+        (a front or a battler in the turn order with no health left, or negative damage) and nobody was defeated in that turn.
+
+        Raises BattleDrawException if neither side deals any damage, as the battle would never end.
+        """
+        cycle = list(self.turn_order)
+        fronts = [self.teams[0][0], self.teams[1][0]]
+
+        # Only the fronts take hits, and only battlers in the cycle act. Defeated battlers elsewhere in a team have already
+        # left the cycle, and are removed by the single step taken once they reach the front.
+        if any(b.stats.health <= 0 for b in fronts) or any(b.stats.health <= 0 or b.stats.damage < 0 for _, b in cycle):
+            turn, events = self.next()
+            if any(e.target.stats.health <= 0 for e in events):
+                return turn, events
+            return None
+
+        # prefix[t][j]: damage dealt by team t to the opposing front during the first j+1 turns of the cycle.
+        prefix = [[], []]
+        totals = [0, 0]
+        for team_num, battler in cycle:
+            totals[team_num] += battler.stats.damage
+            prefix[0].append(totals[0])
+            prefix[1].append(totals[1])
+
+        # Number of turns until the front battler of the opposing team is defeated, for team 1 and team 2 attacking.
+        turns_to_defeat = []
+        for team_num in (0, 1):
+            health = fronts[1 - team_num].stats.health
+            if totals[team_num] == 0:
+                turns_to_defeat.append(None)
+                continue
+            cycles = (health - 1) // totals[team_num]
+            remaining = health - cycles * totals[team_num]
+            turns_to_defeat.append(cycles * len(cycle) + bisect_left(prefix[team_num], remaining) + 1)
+
+        if turns_to_defeat[0] is None and turns_to_defeat[1] is None:
+            raise BattleDrawException()
+        if turns_to_defeat[1] is None or (turns_to_defeat[0] is not None and turns_to_defeat[0] < turns_to_defeat[1]):
+            attacking_team = 0
+        else:
+            attacking_team = 1
+        turns = turns_to_defeat[attacking_team]
+
+        cycles, partial = divmod(turns, len(cycle))
+        for team_num in (0, 1):
+            damage = cycles * totals[team_num] + (prefix[team_num][partial - 1] if 0 < partial else 0)
+            target = fronts[1 - team_num]
+            target.stats = StatBlock(target.stats.health - damage, target.stats.damage)
+
+        self.current_turn += turns
+        battler = cycle[(turns - 1) % len(cycle)][1]
+        target = fronts[1 - attacking_team]
+        rotated = cycle[partial:] + cycle[:partial]
+        self.turn_order.restore([self._index[record[1]] for record in rotated], self._records)
+        self._remove(target)
+
+        before = StatBlock(target.stats.health + battler.stats.damage, target.stats.damage)
+        return self.current_turn, [BattleEvent(BattleEventType.ATTACK, BASIC_ATTACK, battler, target, before, target.stats)]
+
+    def fast_forward(self) -> list[Tuple[int, list[BattleEvent]]]:
+        """
+        Resolves the Battle by jumping from one defeat to the next instead of stepping through every turn,
+        which takes time proportional to the number of battlers rather than the number of hits.
+
+        Returns the turns in which a battler was defeated, with the event for the defeating blow.
+
+        Falls back to stepping through every turn if the outcome does not only depend on the stats of the battlers
+        (custom actions, event handlers or a non round-robin turn order, see ._is_basic).
+
+        Raises BattleDrawException if the battle would never end because neither side deals any damage.
+        """
+        if not self._is_basic():
+            return [(n, events) for n, events in self if any(e.target.stats.health <= 0 for e in events)]
+
+        defeats = []
+        while not self.is_done():
+            turn = self._next_defeat()
+            if turn is not None:
+                defeats.append(turn)
+        return defeats
+
+    def stream(self) -> Iterator[Tuple[int, list[BattleEvent]]]:
+        """
+        Generator that resolves the Battle one turn at a time, yielding the turn number and resulting BattleEvent(s).
+
+        Unlike .resolve, no turns are kept, so memory use does not grow with the length of the battle.
+        """
+        while not self.is_done():
+            yield self.next()
+
+    def summarize(self) -> BattleSummary:
+        """
+        Resolves the Battle, keeping only the winner, the number of turns and the damage dealt and taken by each battler.
+
+        Battles where the outcome only depends on the stats of the battlers (see ._is_basic) are resolved without creating
+        any BattleEvent objects, others are streamed and each turn's events are discarded once they have been counted.
+        Either way, memory use does not grow with the length of the battle.
+        """
+        index = self._index
+        dealt = [0] * len(self.roster)
+        taken = [0] * len(self.roster)
+
+        if self._is_basic():
+            teams = self.teams
+            turn_order = self.turn_order
+            while not self.is_done():
+                self.current_turn += 1
+                record = turn_order.pop()
+                team_num, battler = record
+                target = teams[(team_num + 1) % len(teams)][0]
+                damage = battler.stats.damage
+                target.stats = StatBlock(target.stats.health - damage, target.stats.damage)
+                dealt[index[battler]] += damage
+                taken[index[target]] += damage
+                if 0 < battler.stats.health:
+                    turn_order.push(record)
+                if target.stats.health <= 0:
+                    self._remove(target)
+        elif self.log is not None:
+            # Read the log's columns rather than creating views of its rows.
+            log = self.log
+            start = len(log)
+            for _ in self.stream():
+                pass
+            roster = log.roster
+            for battler, target, health_delta in zip(log.battler[start:], log.target[start:], log.health_delta[start:]):
+                dealt[index[roster[battler]]] -= health_delta
+                taken[index[roster[target]]] -= health_delta
+        else:
+            for _, events in self.stream():
+                for e in events:
+                    damage = -e.health_delta
+                    dealt[index[e.battler]] += damage
+                    taken[index[e.target]] += damage
+
+        return BattleSummary(
+            self.winner(),
+            self.current_turn,
+            dict(zip(self.roster, dealt)),
+            dict(zip(self.roster, taken))
+        )
+
+    def winner(self) -> Optional[int]:
+        """
+        Returns the index of the only team with battlers left, or None if the battle is not over or neither team has any.
+        """
+        if not self.is_done():
+            return None
+        if 0 < len(self.teams[0]):
+            return 0
+        if 0 < len(self.teams[1]):
+            return 1
+        return None
+
+    def resolve(self, cache:Optional[OutcomeCache]=None, mode:str="step") -> list[Tuple[int, list[BattleEvent]]] | BattleSummary:
         """
         Resolves the Battle by iterating through the turns until one team is defated.
+
+        If mode is "summary", the battle is resolved using .summarize instead, returning a BattleSummary.
+
+        If mode is "analytic", the battle is resolved using .fast_forward instead, and only the turns in which a battler
+        was defeated are returned.
+
+        If an OutcomeCache is given, the state of the battle is looked up in the cache before every turn, and as soon as
+        a known state is reached the battle jumps straight to its outcome. The outcomes of all states passed through are
+        added to the cache. Turns answered from the cache are not included in the returned list.
+        The cache is only used for battles where the outcome only depends on the stats of the battlers (see ._is_basic).
         """
+        if mode == "analytic":
+            return self.fast_forward()
+        if mode == "summary":
+            return self.summarize()
+        if mode != "step":
+            raise ValueError(f"Unknown resolve mode '{mode}'.")
+
         turns = []
-        for r in self: turns.append(r)
+        if cache is None or not self._is_basic():
+            for r in self: turns.append(r)
+            return turns
+
+        visited = []
+        while not self.is_done():
+            key, members = self._state_key()
+            outcome = cache.get(key)
+            if outcome is not None:
+                self._apply_outcome(members, outcome)
+                break
+            visited.append((key, members, self.current_turn))
+            turns.append(self.next())
+
+        # Add the earliest states last, so that they are the last to be evicted.
+        for key, members, turn in reversed(visited):
+            cache.put(key, self._outcome(members, turn))
         return turns
 
         
\ No newline at end of file
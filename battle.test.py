@@ -1,7 +1,9 @@
 import unittest
+import unittest.mock
 import random
+import tracemalloc
 
-from battle import BASIC_ATTACK, Action, BattleEvent, BattleEventType, Battle, Battler, StatBlock
+from battle import BASIC_ATTACK, Action, BattleDrawException, BattleEvent, BattleEventType, Battle, Battler, BattleSummary, InitiativeScheduler, OutcomeCache, RoundRobinScheduler, StatBlock, initiative
 
 class TestBattle(unittest.TestCase):
 
@@ -38,6 +40,30 @@ class TestBattle(unittest.TestCase):
         self.assertEqual(c.health, 0)
         self.assertEqual(c.damage, 0)
 
+    def test_statblock_compact(self):
+        b = StatBlock(health=3, damage=2)
+        self.assertFalse(hasattr(b, "__dict__"), "StatBlock should only store its two values.")
+        self.assertNotIsInstance(b, dict)
+        with self.assertRaises(AttributeError):
+            b.mana = 1
+
+    def test_battleevent_delta(self):
+        a = Battler("A", 1, 1)
+        event = BattleEvent(BattleEventType.ATTACK, BASIC_ATTACK, a, a, StatBlock(5, 2), StatBlock(3, 1))
+        self.assertFalse(hasattr(event, "__dict__"))
+        self.assertEqual(event.health_delta, -2)
+        self.assertEqual(event.damage_delta, -1)
+        self.assertEqual(event.before, StatBlock(5, 2))
+        self.assertEqual(event.after, StatBlock(3, 1))
+
+    def test_battler_attack_no_aliasing(self):
+        a = Battler("A", 1, 2)
+        b = Battler("B", 5, 1)
+        event = a.act([a], [b])[0]
+        b.stats.health = 100
+        self.assertEqual(event.after.health, 3, "Events should not be affected by later changes to the target's stats.")
+        self.assertEqual(event.before.health, 5)
+
     def test_battler_creation(self):
         Battler("A", 1, 1)
     
@@ -148,6 +174,273 @@ class TestBattle(unittest.TestCase):
         self.assertEqual(len(turns), 2)
         self.assertEqual(len(battle.turn_order), 1)
     
+    def test_round_robin_scheduler(self):
+        a, b, c = Battler("A", 1, 1), Battler("B", 1, 1), Battler("C", 1, 1)
+        order = RoundRobinScheduler([(0, a), (1, b), (0, c)])
+        self.assertEqual(len(order), 3)
+        self.assertEqual(order.pop(), (0, a))
+        order.push((0, a))
+        self.assertTrue(order.remove(b))
+        self.assertFalse(order.remove(b), "Removing a battler twice should do nothing.")
+        self.assertNotIn(b, order)
+        self.assertEqual(len(order), 2)
+        self.assertEqual(list(order), [(0, c), (0, a)])
+        self.assertEqual(order.pop(), (0, c), f"The removed battler '{b}' should have been skipped.")
+        self.assertEqual(order.pop(), (0, a))
+        with self.assertRaises(IndexError):
+            order.pop()
+
+    def test_initiative(self):
+        self.assertEqual(initiative(10, 0.5), 20)
+        self.assertEqual(initiative(10, 0.2), 50)
+
+    def test_initiative_scheduler(self):
+        brugg = Battler("Brugg", 1, 1, initiative=50)
+        merlin = Battler("Merlin", 1, 1, initiative=10)
+        order = InitiativeScheduler([(0, merlin), (1, brugg)])
+        turns = []
+        for _ in range(12):
+            record = order.pop()
+            turns.append(record[1])
+            order.push(record)
+        self.assertEqual(turns.count(brugg), 10, f"'{brugg}' acts 5 times as fast as '{merlin}' and should get 5 times as many turns.")
+        self.assertEqual(turns.count(merlin), 2)
+        self.assertEqual(turns[0], brugg, f"'{brugg}' should act first due to higher initiative.")
+
+    def test_initiative_scheduler_equal_initiative(self):
+        team1 = [Battler(f"A{i}", random.randint(1, 15), random.randint(1, 6)) for i in range(4)]
+        team2 = [Battler(f"B{i}", random.randint(1, 15), random.randint(1, 6)) for i in range(4)]
+        copy1 = [Battler(b.name, b.stats.health, b.stats.damage) for b in team1]
+        copy2 = [Battler(b.name, b.stats.health, b.stats.damage) for b in team2]
+
+        turns1 = Battle(team1, team2).resolve()
+        turns2 = Battle(copy1, copy2, scheduler=InitiativeScheduler).resolve()
+
+        self.assertEqual(len(turns1), len(turns2), "Battlers with equal initiative should take turns in round-robin order.")
+        for (_, events1), (_, events2) in zip(turns1, turns2):
+            self.assertEqual(events1[0].battler.name, events2[0].battler.name)
+            self.assertEqual(events1[0].target.name, events2[0].target.name)
+
+    def test_battle_initiative(self):
+        fast = Battler("Fast", 3, 1, initiative=50)
+        slow = Battler("Slow", 3, 1, initiative=10)
+        battle = Battle([slow], [fast], scheduler=InitiativeScheduler)
+        battle.resolve()
+        self.assertEqual(len(battle.teams[0]), 0, f"'{fast}' should defeat '{slow}' by acting more often.")
+        self.assertEqual(battle.current_turn, 3)
+
+    def test_battle_large_skirmish(self):
+        team1 = [Battler(f"A{i}", 5, 2) for i in range(300)]
+        team2 = [Battler(f"B{i}", 4, 2) for i in range(300)]
+        battle = Battle(team1, team2)
+        battle.resolve()
+        self.assertTrue(battle.is_done())
+        self.assertEqual(len(battle.turn_order), len(team1) + len(team2))
+
+    def test_battle_snapshot_restore(self):
+        team1  = [Battler("A", 5, 2), Battler("B", 3, 1)]
+        team2  = [Battler("C", 4, 3), Battler("D", 6, 1)]
+        battle = Battle(team1, team2)
+        battle.next()
+        snapshot = battle.snapshot()
+
+        turns = battle.resolve()
+        outcome = ([b.name for b in team1], [b.name for b in team2], battle.current_turn)
+        battle.restore(snapshot)
+
+        self.assertEqual(battle.current_turn, 1)
+        self.assertIs(battle.teams[0], team1, "Restoring should update the team lists in place.")
+        self.assertEqual(len(team1) + len(team2), 4)
+        self.assertEqual(len(battle.turn_order), 4)
+        self.assertEqual([b.stats.health for b in battle.roster], [5, 3, 2, 6])
+
+        replay = battle.resolve()
+        self.assertEqual(len(replay), len(turns))
+        self.assertEqual(([b.name for b in team1], [b.name for b in team2], battle.current_turn), outcome)
+        for (n1, events1), (n2, events2) in zip(turns, replay):
+            self.assertEqual(n1, n2)
+            self.assertEqual(events1[0].battler, events2[0].battler)
+            self.assertEqual(events1[0].after, events2[0].after)
+
+    def test_battle_snapshot_branching(self):
+        team1  = [Battler(f"A{i}", 6, 2) for i in range(3)]
+        team2  = [Battler(f"B{i}", 5, 2) for i in range(3)]
+        battle = Battle(team1, team2, scheduler=InitiativeScheduler)
+        root = battle.snapshot()
+        results = set()
+        for _ in range(50):
+            battle.restore(root)
+            battle.resolve()
+            results.add((battle.current_turn, len(team1), len(team2)))
+        self.assertEqual(len(results), 1, "Every branch restored from the same snapshot should play out the same way.")
+
+    def test_outcomecache_lru(self):
+        cache = OutcomeCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertNotIn("b", cache, "The least recently used entry should have been evicted.")
+        self.assertIn("a", cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_battle_resolve_cache(self):
+        cache = OutcomeCache()
+        make = lambda: ([Battler("A", 7, 2), Battler("B", 5, 3)], [Battler("C", 9, 2), Battler("D", 4, 1)])
+
+        team1, team2 = make()
+        expected = Battle(team1, team2)
+        expected.resolve()
+
+        team1, team2 = make()
+        first = Battle(team1, team2)
+        turns = first.resolve(cache=cache)
+        self.assertEqual(len(turns), expected.current_turn, "Nothing should be answered from an empty cache.")
+        self.assertEqual(cache.hits, 0)
+        self.assertLess(0, len(cache))
+
+        team1, team2 = make()
+        second = Battle(team1, team2)
+        turns = second.resolve(cache=cache)
+        self.assertEqual(len(turns), 0, "A repeated battle should be answered from the cache.")
+        self.assertEqual(cache.hits, 1)
+        self.assertTrue(second.is_done())
+        self.assertEqual(second.current_turn, expected.current_turn)
+        self.assertEqual([b.name for b in second.teams[0]], [b.name for b in expected.teams[0]])
+        self.assertEqual([b.name for b in second.teams[1]], [b.name for b in expected.teams[1]])
+        self.assertEqual([b.stats.health for b in second.roster], [b.stats.health for b in expected.roster])
+        self.assertEqual(len(second.turn_order), len(expected.turn_order))
+
+    def test_battle_resolve_cache_converging(self):
+        cache = OutcomeCache()
+        Battle([Battler("A", 6, 2)], [Battler("B", 9, 1)]).resolve(cache=cache)
+
+        # Reaches the starting state of the first battle (A: 6hp, B: 9hp, A to move) after two turns.
+        battle = Battle([Battler("A", 7, 2)], [Battler("B", 11, 1)])
+        turns = battle.resolve(cache=cache)
+        self.assertEqual(len(turns), 2)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(battle.current_turn, 11)
+        self.assertEqual(battle.teams[1], [])
+        self.assertEqual(battle.roster[0].stats.health, 2)
+
+    def test_battle_resolve_cache_custom(self):
+        cache = OutcomeCache()
+        a = Battler("A", 2, 1)
+        a.on("act_start", lambda *_: True)
+        Battle([a], [Battler("B", 2, 1)]).resolve(cache=cache)
+        self.assertEqual(len(cache), 0, "Battles with event handlers should not use the cache.")
+
+    def test_battle_fast_forward(self):
+        rng = random.Random(42)
+        for _ in range(100):
+            stats1 = [(rng.randint(-1, 60), rng.randint(0, 6)) for _ in range(rng.randint(1, 6))]
+            stats2 = [(rng.randint(-1, 60), rng.randint(1, 6)) for _ in range(rng.randint(1, 6))]
+            stepped = Battle([Battler(f"A{i}", h, d) for i, (h, d) in enumerate(stats1)], [Battler(f"B{i}", h, d) for i, (h, d) in enumerate(stats2)])
+            analytic = Battle([Battler(f"A{i}", h, d) for i, (h, d) in enumerate(stats1)], [Battler(f"B{i}", h, d) for i, (h, d) in enumerate(stats2)])
+
+            turns = stepped.resolve()
+            defeats = analytic.resolve(mode="analytic")
+
+            expected = [(n, e[0].battler.name, e[0].target.name, e[0].after.health) for n, e in turns if e[0].after.health <= 0]
+            self.assertEqual([(n, e[0].battler.name, e[0].target.name, e[0].after.health) for n, e in defeats], expected)
+            self.assertEqual(analytic.current_turn, stepped.current_turn)
+            self.assertEqual([b.stats.health for b in analytic.roster], [b.stats.health for b in stepped.roster])
+            self.assertEqual([b.name for b in analytic.teams[0]], [b.name for b in stepped.teams[0]])
+            self.assertEqual([b.name for b in analytic.teams[1]], [b.name for b in stepped.teams[1]])
+            self.assertEqual([r[1].name for r in analytic.turn_order], [r[1].name for r in stepped.turn_order])
+
+    def test_battle_fast_forward_high_health(self):
+        battle = Battle([Battler("A", 10**9, 3), Battler("B", 10**9, 2)], [Battler("C", 10**9, 4)])
+        defeats = battle.fast_forward()
+        self.assertEqual(len(defeats), 1)
+        self.assertEqual(battle.teams[1], [])
+        self.assertEqual(battle.current_turn, 599999999)
+
+    def test_battle_fast_forward_defeated_in_team(self):
+        # Z acts once with no health left, then leaves the turn order but stays in its team until it reaches the front.
+        def make_battle(health):
+            return Battle([Battler("A", health, 3), Battler("Z", 0, 1)], [Battler("C", health, 4)])
+        stepped = make_battle(1000)
+        stepped.resolve()
+        analytic = make_battle(1000)
+        analytic.fast_forward()
+        self.assertEqual(analytic.current_turn, stepped.current_turn)
+        self.assertEqual([b.stats.health for b in analytic.roster], [b.stats.health for b in stepped.roster])
+
+        battle = make_battle(10**9)
+        battle.next = unittest.mock.Mock(wraps=battle.next)
+        defeats = battle.fast_forward()
+        self.assertLess(battle.next.call_count, 10, "A defeated battler outside the turn order should not slow down fast_forward.")
+        self.assertEqual([e[0].target.name for _, e in defeats], ["A", "Z"])
+        self.assertEqual(battle.winner(), 1)
+
+    def test_battle_fast_forward_stalemate(self):
+        battle = Battle([Battler("A", 1, 0)], [Battler("B", 1, 0)])
+        with self.assertRaises(BattleDrawException):
+            battle.fast_forward()
+
+    def test_battle_fast_forward_custom(self):
+        a = Battler("A", 2, 1)
+        turns = []
+        a.on("act_end", lambda *_: turns.append(1) or True)
+        battle = Battle([a], [Battler("B", 3, 1)])
+        defeats = battle.fast_forward()
+        self.assertEqual(len(turns), 2, "Battles with event handlers should be resolved turn by turn.")
+        self.assertEqual(len(defeats), 1)
+        self.assertEqual(defeats[0][1][0].target, a)
+
+    def test_battle_stream(self):
+        battle = Battle([Battler("A", 1, 1)], [Battler("B", 2, 1)])
+        turns = list(battle.stream())
+        self.assertEqual([n for n, _ in turns], [1, 2])
+        self.assertTrue(battle.is_done())
+        self.assertEqual(battle.winner(), 1)
+
+    def test_battle_summarize(self):
+        make = lambda: ([Battler("A", 7, 2), Battler("B", 5, 3)], [Battler("C", 9, 2), Battler("D", 4, 1)])
+        stepped = Battle(*make())
+        turns = stepped.resolve()
+        summarized = Battle(*make())
+        summary = summarized.resolve(mode="summary")
+
+        self.assertIsInstance(summary, BattleSummary)
+        self.assertEqual(summary.turns, len(turns))
+        self.assertEqual(summary.winner, stepped.winner())
+        for battler, expected in zip(summarized.roster, stepped.roster):
+            dealt = sum(e.before.health - e.after.health for _, events in turns for e in events if e.battler is expected)
+            taken = sum(e.before.health - e.after.health for _, events in turns for e in events if e.target is expected)
+            self.assertEqual(summary.damage_dealt[battler], dealt)
+            self.assertEqual(summary.damage_taken[battler], taken)
+
+    def test_battle_summarize_custom(self):
+        a = Battler("A", 4, 2)
+        a.on("act_start", lambda *_: True)
+        summary = Battle([a], [Battler("B", 5, 1)]).summarize()
+        self.assertEqual(summary.winner, 0)
+        self.assertEqual(summary.turns, 5)
+        self.assertEqual(summary.damage_dealt[a], 6)
+        self.assertEqual(summary.damage_taken[a], 2)
+
+    def test_battle_summarize_constant_memory(self):
+        def peak(health):
+            a = Battler("A", health, 1)
+            a.on("act_start", lambda *_: True)
+            battle = Battle([a], [Battler("B", health, 1)])
+            tracemalloc.start()
+            summary = battle.summarize()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertEqual(summary.turns, 2 * health - 1)
+            return peak
+
+        short = peak(50)
+        long = peak(10000)
+        self.assertLess(long, short + 16 * 1024, "Memory use should not grow with the number of turns.")
+
     def test_battle_random_1v1_battle(self):
         a = Battler("A", random.randint(1, 15), random.randint(1, 6))
         b = Battler("B", random.randint(1, 15), random.randint(1, 6))
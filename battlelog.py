@@ -0,0 +1,245 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator, Sequence
+from typing import Optional
+
+import numpy as np
+
+from battle import Action, Battle, BattleEvent, BattleEventType, Battler
+
+# Empty type declarations so that the names can be used in type hints
+class BattleLog: pass
+class BattleEventView: pass
+class BattleLogRows: pass
+
+class BattleEventView(BattleEvent):
+    """
+    BattleEvent backed by a row in a BattleLog. The fields are read from the log when accessed,
+    so a view only holds a reference to the log and its row number. The .before and .after StatBlocks
+    are rebuilt from the health, damage and delta columns by BattleEvent.
+    """
+    __slots__ = ("log", "row")
+
+    def __init__(self, log:BattleLog, row:int) -> None:
+        self.log = log
+        self.row = row
+
+    @property
+    def turn(self) -> int:
+        return self.log.turn[self.row]
+
+    @property
+    def type(self) -> BattleEventType:
+        return BattleEventType(self.log.type[self.row])
+
+    @property
+    def action(self) -> Action:
+        return self.log.actions[self.log.action[self.row]]
+
+    @property
+    def battler(self) -> Battler:
+        return self.log.roster[self.log.battler[self.row]]
+
+    @property
+    def target(self) -> Battler:
+        return self.log.roster[self.log.target[self.row]]
+
+    @property
+    def health(self) -> int:
+        return self.log.health[self.row]
+
+    @property
+    def damage(self) -> int:
+        return self.log.damage[self.row]
+
+    @property
+    def health_delta(self) -> int:
+        return self.log.health_delta[self.row]
+
+    @property
+    def damage_delta(self) -> int:
+        return self.log.damage_delta[self.row]
+
+    def __repr__(self) -> str:
+        return f"BattleEventView(turn={self.turn}, {self.battler} -> {self.target}, {self.health_delta}hp)"
+
+class BattleLogRows(Sequence):
+    """
+    The rows of a BattleLog from start to stop, as a sequence of BattleEventViews that are only created when they are accessed.
+    """
+    __slots__ = ("log", "start", "stop")
+
+    def __init__(self, log:BattleLog, start:int, stop:int) -> None:
+        self.log = log
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index:int) -> BattleEventView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("BattleLogRows index out of range")
+        return BattleEventView(self.log, self.start + index)
+
+    def __iter__(self) -> Iterator[BattleEventView]:
+        return (BattleEventView(self.log, row) for row in range(self.start, self.stop))
+
+    def __repr__(self) -> str:
+        return f"BattleLogRows({self.start}, {self.stop})"
+
+class BattleLog:
+    """
+    Append-only log of the events in a battle, stored as one array per field instead of one object per event.
+
+    Battlers are stored as their index in the roster and actions as their index in .actions. Besides the turn number,
+    event type, action, battler and target, each row holds the target's health and damage after the action and the
+    change caused by it, which is enough to rebuild both StatBlocks of the original BattleEvent.
+
+    Attach a log to a battle with BattleLog.attach, after which Battler.act writes its actions straight into the log
+    (see .record_action) and Battle.next returns the turn's rows (see BattleLogRows) instead of BattleEvent objects.
+    """
+    COLUMNS = ("turn", "type", "action", "battler", "target", "health_delta", "damage_delta", "health", "damage")
+
+    def __init__(self, roster:list[Battler], teams:Optional[list[int]]=None, scheduler:str="RoundRobinScheduler") -> None:
+        """
+        Creates an empty log for the given roster. The team numbers of the battlers and the name of the scheduler
+        are only kept as a record of how the battle was set up (see replay.save_replay).
+        """
+        self.roster: list[Battler] = roster
+        self._index = {battler: i for i, battler in enumerate(roster)}
+        self.teams = array("b", teams if teams is not None else [0] * len(roster))
+        """Team number of each battler in the roster."""
+        # Stats of the battlers when the log was created.
+        self.start_health = array("q", (b.stats.health for b in roster))
+        self.start_damage = array("q", (b.stats.damage for b in roster))
+        self.scheduler: str = scheduler
+        self.actions: list[Action] = []
+        self._action_ids = {}
+
+        self.turn = array("q")
+        self.type = array("b")
+        self.action = array("h")
+        self.battler = array("l")
+        self.target = array("l")
+        self.health_delta = array("q")
+        self.damage_delta = array("q")
+        self.health = array("q")
+        self.damage = array("q")
+
+    @staticmethod
+    def attach(battle:Battle) -> BattleLog:
+        """
+        Creates a log for the battle's roster and starts recording every turn of the battle into it.
+        """
+        teams = [battle.team_of(b) for b in battle.roster]
+        battle.log = BattleLog(battle.roster, teams, type(battle.turn_order).__name__)
+        return battle.log
+
+    def _action_id(self, action:Action) -> int:
+        action_id = self._action_ids.get(action)
+        if action_id is None:
+            action_id = len(self.actions)
+            self.actions.append(action)
+            self._action_ids[action] = action_id
+        return action_id
+
+    def record_action(self, turn:int, event_type:BattleEventType, action:Action, battler:Battler, target:Battler,
+                      health_delta:int, damage_delta:int, health:int, damage:int) -> int:
+        """
+        Adds a row for an action, given the target's stats after the action and the change caused by it, and returns its row number.
+        """
+        self.turn.append(turn)
+        self.type.append(event_type)
+        self.action.append(self._action_id(action))
+        self.battler.append(self._index[battler])
+        self.target.append(self._index[target])
+        self.health_delta.append(health_delta)
+        self.damage_delta.append(damage_delta)
+        self.health.append(health)
+        self.damage.append(damage)
+        return len(self.turn) - 1
+
+    def append(self, turn:int, event:BattleEvent) -> int:
+        """
+        Adds a row for the event and returns its row number.
+        """
+        return self.record_action(
+            turn, event.type, event.action, event.battler, event.target,
+            event.health_delta, event.damage_delta, event.health, event.damage
+        )
+
+    def rows(self, start:int, stop:Optional[int]=None) -> BattleLogRows:
+        """
+        Returns the rows from start to stop (by default the end of the log) as a BattleLogRows sequence.
+        """
+        return BattleLogRows(self, start, len(self) if stop is None else stop)
+
+    def __len__(self) -> int:
+        return len(self.turn)
+
+    def __getitem__(self, row:int) -> BattleEventView:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("BattleLog row out of range")
+        return BattleEventView(self, row)
+
+    def __iter__(self) -> Iterator[BattleEventView]:
+        return (BattleEventView(self, row) for row in range(len(self)))
+
+    def turn_events(self, turn:int) -> list[BattleEventView]:
+        """
+        Returns views of the events of the given turn, found by binary search on the turn column.
+        """
+        return [BattleEventView(self, row) for row in range(bisect_left(self.turn, turn), bisect_right(self.turn, turn))]
+
+    def column(self, name:str) -> np.ndarray:
+        """
+        Returns a copy of the named column (see COLUMNS) as a NumPy array.
+        """
+        if name not in self.COLUMNS:
+            raise KeyError(name)
+        return np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode).copy()
+
+    def hits_on(self, battler:Battler | int, event_type:Optional[BattleEventType]=BattleEventType.ATTACK) -> np.ndarray:
+        """
+        Returns the row numbers of all events targeting the battler (given as a Battler or roster index),
+        optionally limited to the given event type.
+        """
+        index = battler if isinstance(battler, int) else self._index[battler]
+        mask = np.frombuffer(self.target, dtype=self.target.typecode) == index
+        if event_type is not None:
+            mask &= np.frombuffer(self.type, dtype=self.type.typecode) == event_type
+        return np.flatnonzero(mask)
+
+    def damage_per_turn(self) -> np.ndarray:
+        """
+        Returns the total health lost by all targets in each turn, indexed by turn number.
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return self._total(self.turn, self.turn[-1] + 1)
+
+    def damage_dealt(self) -> np.ndarray:
+        """
+        Returns the total health removed by each battler's actions, indexed by roster position.
+        """
+        return self._total(self.battler, len(self.roster))
+
+    def damage_taken(self) -> np.ndarray:
+        """
+        Returns the total health lost by each battler, indexed by roster position.
+        """
+        return self._total(self.target, len(self.roster))
+
+    def _total(self, keys:array, size:int) -> np.ndarray:
+        """
+        Sums the health lost in every row, grouped by the value of the given column.
+        """
+        totals = np.zeros(size, dtype=np.int64)
+        lost = -np.frombuffer(self.health_delta, dtype=self.health_delta.typecode)
+        np.add.at(totals, np.frombuffer(keys, dtype=keys.typecode), lost)
+        return totals
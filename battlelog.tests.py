@@ -0,0 +1,107 @@
+import unittest
+from unittest import mock
+
+from battle import BASIC_ATTACK, Battle, BattleEvent, BattleEventType, Battler
+from battlelog import BattleEventView, BattleLog, BattleLogRows
+
+class Healer(Battler):
+    def act(self, allies, enemies, log=None, turn=0):
+        before = self.stats
+        self.stats = before.clone()
+        self.stats.health += 1
+        return [BattleEvent(BattleEventType.ATTACK, BASIC_ATTACK, self, self, before, self.stats)]
+
+class TestBattleLog(unittest.TestCase):
+
+    def make_battle(self):
+        team1 = [Battler("A", 5, 2), Battler("B", 3, 1)]
+        team2 = [Battler("C", 4, 3)]
+        return Battle(team1, team2)
+
+    def test_battlelog_attach(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        self.assertIs(battle.log, log)
+        self.assertEqual(len(log), 0)
+
+    def test_battlelog_views(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        a, b, c = battle.roster
+
+        turn, events = battle.next()
+        self.assertEqual(len(log), 1)
+        event = events[0]
+        self.assertIsInstance(event, BattleEvent, "Logged events should still be BattleEvent objects.")
+        self.assertIsInstance(event, BattleEventView)
+        self.assertEqual(event.turn, turn)
+        self.assertEqual(event.type, BattleEventType.ATTACK)
+        self.assertIs(event.action, BASIC_ATTACK)
+        self.assertIs(event.battler, a)
+        self.assertIs(event.target, c)
+        self.assertEqual(event.before.health, 4)
+        self.assertEqual(event.after.health, 2)
+        self.assertEqual(event.after.damage, 3)
+
+    def test_battlelog_resolve(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        turns = battle.resolve()
+        self.assertEqual(len(log), len(turns))
+        self.assertEqual([e.turn for e in log], [n for n, _ in turns])
+        self.assertEqual(log.turn_events(3)[0].battler.name, "C")
+        self.assertEqual(log.turn_events(99), [])
+        self.assertEqual(log[-1].target.name, "C")
+        with self.assertRaises(IndexError):
+            log[len(log)]
+
+    def test_battlelog_no_events(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        with mock.patch("battle.BattleEvent", side_effect=AssertionError("BattleEvent created")):
+            turn, events = battle.next()
+            battle.resolve()
+        self.assertIsInstance(events, BattleLogRows, "Logged turns should only create views when their events are read.")
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].turn, turn)
+        self.assertEqual(len(log), battle.current_turn)
+
+    def test_battlelog_custom_action(self):
+        battle = Battle([Healer("H", 5, 0)], [Battler("C", 4, 3)])
+        log = BattleLog.attach(battle)
+        turn, events = battle.next()
+        self.assertIs(events[0].target, battle.roster[0])
+        self.assertEqual(events[0].health_delta, 1)
+        self.assertEqual(len(log), 1)
+
+    def test_battlelog_summarize(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        summary = battle.summarize()
+        self.assertEqual(len(log), summary.turns, "Battles with a log should record every turn, even when summarized.")
+        expected = self.make_battle().summarize()
+        self.assertEqual(list(summary.damage_dealt.values()), list(expected.damage_dealt.values()))
+        self.assertEqual(list(summary.damage_taken.values()), list(expected.damage_taken.values()))
+
+    def test_battlelog_queries(self):
+        battle = self.make_battle()
+        log = BattleLog.attach(battle)
+        a, b, c = battle.roster
+        battle.resolve()
+
+        hits = log.hits_on(c)
+        self.assertEqual(list(hits), [0, 1, 3])
+        self.assertEqual(list(log.hits_on(0)), [2])
+        self.assertTrue(all(log[int(row)].target is c for row in hits))
+
+        per_turn = log.damage_per_turn()
+        self.assertEqual(list(per_turn), [0, 2, 1, 3, 2])
+        self.assertEqual(list(log.damage_dealt()), [4, 1, 3])
+        self.assertEqual(list(log.damage_taken()), [3, 0, 5])
+        self.assertEqual(list(log.column("battler")), [0, 1, 2, 0])
+        with self.assertRaises(KeyError):
+            log.column("roster")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,23 +1,57 @@
+import heapq
+import weakref
+from collections import deque
 from collections.abc import Iterable
 from typing import Any, Callable, Optional, Tuple
 
+from emitter import EventRegistry
+
 # Empty type declarations so that the names can be used in type hints
 class CampaignEvent: pass
+class EventQueue: pass
 class CampaignAsset: pass
+class Exploration: pass
 class Walker: pass
 class Room: pass
 class Door: pass
+class AssetRegistry: pass
 class Campaign: pass
 
+# Immutable values that Python may cache or intern, so the same object can stand for unrelated events.
+_VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes, tuple, frozenset)
+
 class CampaignEvent:
     """
     Wrapper around basic callables when used in Campaign eventing.
     """
-    def __init__(self, callback:Callable[[CampaignAsset, Any], None]) -> None:
+    def __init__(self, callback:Callable[[CampaignAsset, Any], None], batch:bool=False) -> None:
         self.enabled: bool = True
         """Determines if this event can start or not."""
-        self.callback: Callable[[CampaignAsset, Any], None] = callback
-        """Callable to run then this event starts"""
+        self._callback: Optional[Callable[[CampaignAsset, Any], None]] = callback
+        # Weak reference to the callable, used instead of ._callback for weak events.
+        self._ref: Optional[weakref.ref] = None
+        self.batch: bool = batch
+        """If True, the callable accepts a list of event_data values instead of a single value."""
+
+    @property
+    def callback(self) -> Optional[Callable[[CampaignAsset, Any], None]]:
+        """Callable to run then this event starts, None if this is a weak event and the callable has been garbage collected."""
+        if self._ref is not None:
+            return self._ref()
+        return self._callback
+
+    @callback.setter
+    def callback(self, callback:Callable[[CampaignAsset, Any], None]) -> None:
+        self._callback = callback
+        self._ref = None
+
+    def weaken(self, ref:weakref.ref) -> CampaignEvent:
+        """
+        Makes this event hold its callable through the given weak reference instead of a strong one, returning the event.
+        """
+        self._ref = ref
+        self._callback = None
+        return self
 
     def start(self, caller:CampaignAsset, event_data:any=None):
         """
@@ -25,41 +59,121 @@ class CampaignEvent:
 
         The callable is called using the given 'caller' as the first argument, and the given event_data as the second argument:
             callable(caller, event_data)
+
+        If this is a batch event, the event_data is wrapped in a list.
+        """
+        callback = self.callback
+        if self.enabled and callback is not None:
+            callback(caller, [event_data] if self.batch else event_data)
+
+    def start_batch(self, caller:CampaignAsset, event_data:list):
+        """
+        Starts this event for several event_data values at once: a batch event gets the whole list in a single call,
+        other events are started once per value.
+        """
+        callback = self.callback
+        if not self.enabled or callback is None:
+            return
+        if self.batch:
+            callback(caller, event_data)
+            return
+        for data in event_data:
+            callback(caller, data)
+
+    __call__ = start
+
+def _callback_of(event:CampaignEvent | Callable) -> Callable:
+    """
+    Key used to index CampaignEvents in CampaignAsset.events.
+    """
+    return getattr(event, "callback", event)
+
+def _weak_event(event:CampaignEvent, ref:weakref.ref) -> CampaignEvent:
+    return event.weaken(ref)
+
+def event_registry() -> EventRegistry:
+    """
+    Creates an empty registry for CampaignAsset.events, which indexes CampaignEvents by their callable.
+    """
+    return EventRegistry(key=_callback_of, weaken=_weak_event)
+
+class EventQueue:
+    """
+    Collects the events emitted by campaign assets, so that they can be dispatched together by .flush.
+
+    Events are grouped by asset and event type. Emitting the same event_data object more than once for the same asset
+    and event type before the queue is flushed only queues it once. Values such as None, numbers, strings and tuples
+    are never coalesced, as Python shares such objects between unrelated events.
+    """
+    def __init__(self) -> None:
+        # Maps (asset, event_type) to the queued event_data and the ids of the objects among them. The queued objects
+        # are kept alive until the flush, so their ids can't be reused by other objects in the meantime.
+        self._pending: dict[Tuple[CampaignAsset, str], Tuple[list, set[int]]] = {}
+
+    def push(self, asset:CampaignAsset, event_type:str, event_data:Any=None) -> None:
+        group = self._pending.get((asset, event_type))
+        if group is None:
+            group = self._pending[(asset, event_type)] = ([], set())
+        queued, seen = group
+        if not isinstance(event_data, _VALUE_TYPES):
+            if id(event_data) in seen:
+                return
+            seen.add(id(event_data))
+        queued.append(event_data)
+
+    def flush(self) -> None:
+        """
+        Dispatches all queued events, in the order that each asset and event type was first emitted.
+
+        Events emitted by handlers during the flush are queued and dispatched in a following round, until the queue is empty.
         """
-        if self.enabled:
-            self.callback(caller, event_data)
+        while self._pending:
+            pending, self._pending = self._pending, {}
+            for (asset, event_type), group in pending.items():
+                asset.dispatch(event_type, group[0])
+
+    def __len__(self) -> int:
+        return sum(len(queued) for queued, _ in self._pending.values())
 
 class CampaignAsset:
     """
     Basic asset used in campaigns, implements .tick and basic event emitter functionality.
     TODO: Inherit pymitter (https://pypi.org/project/pymitter/)?
     """
+    IMMEDIATE_EVENTS = frozenset(["tick"])
+    """Event types that are always dispatched straight away, even if the asset has an event queue."""
+
     def __init__(self, name:str="") -> None:
         self.name: str = name
-        self.events: dict[str, list[Callable[[CampaignAsset, Any], None]]] = {
-            "tick": []
-        }
-
-    def on(self, event_type: str, event: CampaignEvent | Callable[[CampaignAsset, Any], None]) -> None:
+        self.events: EventRegistry = event_registry()
+        """Registered CampaignEvents by event type, indexed by their callable."""
+        self.events.declare("tick")
+        self.queue: Optional[EventQueue] = None
+        """If set, events (other than IMMEDIATE_EVENTS) are queued here instead of being dispatched straight away (see Campaign)."""
+        self.campaign: Optional[Campaign] = None
+        """The campaign that ticks this asset, if any."""
+
+    def on(self, event_type: str, event: CampaignEvent | Callable[[CampaignAsset, Any], None], weak:bool=False) -> None:
         """
         Adds the given callable or CampaignEvent to the list of event handlers for the given event_type.
 
+        Handlers are indexed by their callable, so adding a callable that is already registered for the event_type
+        (directly or wrapped in a CampaignEvent) does nothing.
+
+        If weak is True, the asset only holds a weak reference to the callable (see CampaignEvent.weaken), and the handler
+        is removed once the callable (or the object of a bound method) is garbage collected.
+
         Note: This method can be used to add event handlers for events not emitted by this object.
         """
         e = event
         if not isinstance(e, CampaignEvent):
-            if "__call__" in dir(e):
-                e = CampaignEvent(e)
-            else:
+            if not callable(e):
                 raise Exception("Tried to create a CampaignEvent using a non-callable object.")
+            e = CampaignEvent(e)
 
-        if event_type not in self.events:
-            self.events[event_type] = []
-
-        if event in self.events[event_type]:
-            return
-        
-        self.events[event_type].append(e)
+        self.events.add(event_type, e, weak=weak)
+        if event_type == "tick":
+            self.wake()
     
     def off(self, event_type:str, event: CampaignEvent | Callable[[CampaignAsset, Any], None]) -> None:
         """
@@ -67,37 +181,211 @@ class CampaignAsset:
 
         Does nothing if the given event has not been added for the event_type.
         """
-        if event_type not in self.events:
+        handlers = self.events.get(event_type)
+        if handlers is None:
             return
         
         if isinstance(event, CampaignEvent):
-            self.events[event_type].remove(event)
+            if handlers.get(event.callback) is event:
+                handlers.remove(event.callback)
             return
         
-        if "__call__" not in dir(event):
+        if not callable(event):
             return
         
-        self.events[event_type] = list(filter(lambda e: e.callback != event, self.events[event_type]))
+        handlers.remove(event)
 
     
     def emit(self, event_type:str, event_data:Any=None) -> None:
         """
         Calls any CampaignEvent objects registered for the given event_type, using the given event_data.
 
+        If the asset has an event queue, the event is added to the queue instead (except for IMMEDIATE_EVENTS).
+
         Does nothing if no CampaignEvents are registered for the event_type. 
         """
-        if event_type not in self.events:
+        handlers = self.events.get(event_type)
+        if not handlers:
+            return
+
+        if self.queue is not None and event_type not in self.IMMEDIATE_EVENTS:
+            self.queue.push(self, event_type, event_data)
             return
         
-        for e in self.events[event_type]:
-            e.start(self, event_data)
+        handlers.emit(self, event_data, prune=False)
+
+    def dispatch(self, event_type:str, event_data:list) -> None:
+        """
+        Starts every CampaignEvent registered for the given event_type with a batch of event_data values (see CampaignEvent.start_batch).
+        """
+        handlers = self.events.get(event_type)
+        if not handlers:
+            return
+
+        for e in handlers:
+            e.start_batch(self, event_data)
     
+    def handler_counts(self) -> dict[str, int]:
+        """
+        Returns the number of handlers registered for each event_type that has any.
+        """
+        return self.events.counts()
+
     def tick(self):
         """
         Advances any game logic associated with this asset. Emits the "tick" event.
         """
         self.emit("tick")
 
+    def idle_ticks(self) -> Optional[int]:
+        """
+        Returns the number of upcoming ticks that the campaign can skip ticking this asset for, or None if the asset
+        has nothing to do until it is woken (see .wake).
+
+        By default, assets need to be ticked every tick while they have "tick" handlers (or override .tick), and are idle otherwise.
+        """
+        if self.events.get("tick") or type(self).tick is not CampaignAsset.tick:
+            return 0
+        return None
+
+    def skip(self, ticks:int) -> None:
+        """
+        Called by the campaign before ticking the asset, with the number of ticks it was not ticked for because of .idle_ticks.
+        """
+        pass
+
+    def wake(self) -> None:
+        """
+        Asks the campaign to reschedule this asset, should be called when something changes the result of .idle_ticks.
+        """
+        if self.campaign is not None:
+            self.campaign.wake(self)
+
+class Exploration:
+    """
+    Exploration state that can be shared by several walkers, used by the default Walker.door_select.
+
+    The exploration keeps the frontier of rooms that have been seen through a door but not visited yet, and a cursor
+    into the doors of each explored room, so that each door is only checked once however many walkers share the state.
+    Walkers explore depth first: they take a door to an unvisited room if their room has one, otherwise they
+    backtrack along their own trail to the closest room that still has unexplored doors. Exploring a whole map takes
+    O(rooms + doors) work in total. A walker whose trail runs out while the frontier is not empty (because the rooms
+    it left behind were explored by other walkers) searches for the nearest frontier room instead.
+
+    Rooms are explored when a walker whose .exploration is this state enters them (see Room.enter). Walkers using
+    a selector of this state get it set automatically, walkers with other selectors can share the state by setting it.
+    """
+    def __init__(self) -> None:
+        self.frontier: dict[Room, None] = {}
+        """Rooms seen through a door of an explored room that were unvisited at the time, in the order they were seen."""
+        # Index of the first door in each explored room that may still lead to an unvisited room.
+        self._cursor: dict[Room, int] = {}
+        self.explored: int = 0
+        """Number of rooms explored so far."""
+
+    def visit(self, room:Room) -> None:
+        """
+        Marks the room as explored, adding the unvisited rooms behind its doors to the frontier.
+        """
+        if room in self._cursor:
+            return
+        self._cursor[room] = 0
+        self.explored += 1
+        self.frontier.pop(room, None)
+        for door in room.doors:
+            target = door.room
+            if target is not None and not target.visited:
+                self.frontier[target] = None
+
+    def unexplored_door(self, room:Room) -> Optional[Door]:
+        """
+        Returns the first door in the (explored) room that leads to an unvisited room, or None.
+        """
+        doors = room.doors
+        i = self._cursor.get(room, 0)
+        while i < len(doors) and (doors[i].room is None or doors[i].room.visited):
+            i += 1
+        self._cursor[room] = i
+        return doors[i] if i < len(doors) else None
+
+    def remaining(self) -> int:
+        """
+        Returns the number of rooms left in the frontier, dropping the ones that have been visited since they were added.
+        """
+        for room in [r for r in self.frontier if r.visited]:
+            del self.frontier[room]
+        return len(self.frontier)
+
+    def _route_to_frontier(self, start:Room) -> list[Door]:
+        """
+        Returns the doors leading from start to the nearest unvisited room, found by a breadth-first search, or [].
+        """
+        came_from: dict[Room, Optional[Door]] = {start: None}
+        rooms = deque([start])
+        while rooms:
+            room = rooms.popleft()
+            for door in room.doors:
+                target = door.room
+                if target is None or target in came_from:
+                    continue
+                came_from[target] = door
+                if not target.visited:
+                    route = []
+                    while door is not None:
+                        route.append(door)
+                        door = came_from[door.source]
+                    route.reverse()
+                    return route
+                rooms.append(target)
+        return []
+
+    def selector(self) -> Callable[[Iterable[Door]], Optional[Door]]:
+        """
+        Returns a Walker.door_select function that explores using this state. Each walker needs its own selector.
+
+        The selector finds the walker's room through its walker attribute, which Walker sets. Without a walker it
+        picks the first door to an unvisited room.
+        """
+        # Rooms the walker moved forward from, most recent last.
+        trail: list[Room] = []
+        # Doors to the nearest frontier room, when the trail has run out.
+        route: deque[Door] = deque()
+        # Value of .explored when the last search for a frontier room failed, so that it is not repeated every tick.
+        failed = [-1]
+
+        def select(doors:list[Door]) -> Optional[Door]:
+            if not doors:
+                return None
+            if select.walker is None:
+                return next((d for d in doors if d.room is not None and not d.room.visited), None)
+            room = select.walker.room
+
+            door = self.unexplored_door(room)
+            if door is not None:
+                route.clear()
+                trail.append(room)
+                return door
+
+            while trail:
+                previous = trail.pop()
+                back = next((d for d in doors if d.room is previous), None)
+                if back is not None:
+                    return back
+                # One-way door, the rest of the trail can't be followed either.
+                trail.clear()
+
+            while route and route[0].source is not room:
+                route.popleft()
+            if not route and failed[0] != self.explored and self.remaining():
+                route.extend(self._route_to_frontier(room))
+                if not route:
+                    failed[0] = self.explored
+            return route.popleft() if route else None
+
+        select.walker = None
+        select.exploration = self
+        return select
+
 class Walker(CampaignAsset):
     """
     Base class for walkers on the campaign map, implementing a basic traversal from Room-to-Room.
@@ -105,25 +393,44 @@ class Walker(CampaignAsset):
 
     def __init__(self, name: str, starting_room: Room, door_select:Optional[Callable[[Iterable[Door]], Door]]=None) -> None:
         super().__init__(name)
-        # Number of ticks between movements
-        self.speed: int = 1
+        self._speed: int = 1
         self.ticks_passed: int = 0
-        self.door_select: Callable[[Iterable[Door]], Door] = door_select
-
-        if self.door_select == None:
-            def select(doors:list):
-                candidates = list(filter(lambda d: not d.room.visited, doors))
-                if 0 < len(candidates):
-                    return candidates[0]
-                
-                return None
-                
-            self.door_select = select
+        self.exploration: Optional[Exploration] = None
+        """Exploration state that is updated with the rooms the walker enters, see Exploration."""
+        self.door_select = door_select if door_select is not None else Exploration().selector()
 
         # The room that the walker is currently located in
         self.room: Room = starting_room
         self.room.enter(self)
 
+    @property
+    def door_select(self) -> Callable[[Iterable[Door]], Optional[Door]]:
+        """
+        Picks the door to take from the doors of the walker's room, or returns None to stay.
+
+        Selectors that have a walker attribute (such as those of Exploration.selector) get it set to this walker, and
+        selectors that have an exploration attribute set the walker's .exploration.
+        """
+        return self._door_select
+
+    @door_select.setter
+    def door_select(self, door_select:Callable[[Iterable[Door]], Optional[Door]]) -> None:
+        self._door_select = door_select
+        if hasattr(door_select, "walker"):
+            door_select.walker = self
+        if hasattr(door_select, "exploration"):
+            self.exploration = door_select.exploration
+
+    @property
+    def speed(self) -> int:
+        """Number of ticks between movements."""
+        return self._speed
+
+    @speed.setter
+    def speed(self, speed:int) -> None:
+        self._speed = speed
+        self.wake()
+
     def tick(self) -> None:
         """
         Emits the "tick" event, then tries to enter the door given by self.door_select (unless it is or returns None).
@@ -146,12 +453,37 @@ class Walker(CampaignAsset):
         self.room.leave(self)
         self.room = new_room
 
+    def idle_ticks(self) -> Optional[int]:
+        """
+        Walkers without "tick" handlers sleep until the tick where they move next, unless a subclass overrides .tick.
+        """
+        if self.events.get("tick") or type(self).tick is not Walker.tick:
+            return 0
+        return max(0, self.speed - self.ticks_passed - 1)
+
+    def skip(self, ticks:int) -> None:
+        self.ticks_passed += ticks
+
 class Room(CampaignAsset):
+    """
+    Room on the campaign map, connected to other rooms by doors.
+
+    Besides "enter" and "leave", rooms emit "incoming_added" and "incoming_removed" (with the door) when a door leading
+    to the room is added to or removed from a room, and "door_added", "door_removed" and "door_retargeted" (with the door)
+    when one of their own doors is added, removed or pointed at another room. These are never queued, so that route caches
+    (see pathfinding) and save files (see persistence) stay current.
+    """
+    IMMEDIATE_EVENTS = CampaignAsset.IMMEDIATE_EVENTS | {
+        "incoming_added", "incoming_removed", "door_added", "door_removed", "door_retargeted",
+    }
+
     def __init__(self, name:str, events:list=[]) -> None:
         super().__init__(name)
         self.doors: list[Door] = []
+        self.incoming: dict[Door, None] = {}
+        """Doors in other rooms (or this one) that lead to this room, in the order they were added."""
         self.walkers: list[Walker] = []
-        self.events["enter"] = []
+        self.events.declare("enter")
         for e in events:
             self.on("enter", e)
         self.visited = False
@@ -161,6 +493,30 @@ class Room(CampaignAsset):
         Manually adds a single door instance to the room. This can be used to add special doors (like random teleportation).
         """
         self.doors.append(door)
+        door.source = self
+        if door.room is not None:
+            door.room._add_incoming(door)
+        self.emit("door_added", door)
+
+    def remove_door(self, door:Door) -> None:
+        """
+        Removes a single door from the room. Does nothing if the door is not in this room.
+        """
+        if door not in self.doors:
+            return
+        self.doors.remove(door)
+        if door.room is not None:
+            door.room._remove_incoming(door)
+        door.source = None
+        self.emit("door_removed", door)
+
+    def _add_incoming(self, door:Door) -> None:
+        self.incoming[door] = None
+        self.emit("incoming_added", door)
+
+    def _remove_incoming(self, door:Door) -> None:
+        if self.incoming.pop(door, 0) is None:
+            self.emit("incoming_removed", door)
     
     def connect_to(self, room:Room, description="door") -> Tuple[Door, Door]:
         """
@@ -180,7 +536,18 @@ class Room(CampaignAsset):
 
         Does not remove the door in the given room, it needs to be removed manually.
         """
-        self.doors = list(filter(lambda d: d.room != room, self.doors))
+        doors = []
+        removed = []
+        for door in self.doors:
+            if door.room != room:
+                doors.append(door)
+                continue
+            room._remove_incoming(door)
+            door.source = None
+            removed.append(door)
+        self.doors = doors
+        for door in removed:
+            self.emit("door_removed", door)
 
     def enter(self, walker:Walker) -> Room:
         """
@@ -193,6 +560,9 @@ class Room(CampaignAsset):
         if walker not in self.walkers:
             self.visited = True
             self.walkers.append(walker)
+            exploration = getattr(walker, "exploration", None)
+            if exploration is not None:
+                exploration.visit(self)
             self.emit("enter", walker)
         return self
     
@@ -211,8 +581,29 @@ class Door(CampaignAsset):
     def __init__(self, name:str="door", room:Room=None) -> None:
         super().__init__(name)
         self.name = name
+        self.source: Optional[Room] = None
+        """The room that this door has been added to (see Room.add_door)."""
+        self._room: Optional[Room] = None
         self.room = room
-        self.events["enter"] = []
+        self.events.declare("enter")
+
+    @property
+    def room(self) -> Optional[Room]:
+        """The room on the other side of the door."""
+        return self._room
+
+    @room.setter
+    def room(self, room:Optional[Room]) -> None:
+        # Keep Room.incoming up to date for doors that have been added to a room.
+        if self.source is not None:
+            old = self._room
+            self._room = room
+            if old is not None:
+                old._remove_incoming(self)
+            if room is not None:
+                room._add_incoming(self)
+            self.source.emit("door_retargeted", self)
+        self._room = room
     
     def enter(self, walker:Walker) -> Optional[Room]:
         """
@@ -225,39 +616,336 @@ class Door(CampaignAsset):
             return None
         return self.room.enter(walker)
 
+class AssetRegistry:
+    """
+    Insertion-ordered set of campaign assets, with indexes by type and by name.
+
+    Adding, removing and looking up assets take constant time. Assets are indexed under every class in their MRO
+    (so .of_type(CampaignAsset) returns all assets), and by the name they had when they were added.
+    """
+    def __init__(self) -> None:
+        self._assets: dict[CampaignAsset, None] = {}
+        self._by_type: dict[type, dict[CampaignAsset, None]] = {}
+        self._by_name: dict[str, dict[CampaignAsset, None]] = {}
+        # Name each asset was indexed under, in case it is renamed before being removed.
+        self._names: dict[CampaignAsset, str] = {}
+
+    def add(self, asset:CampaignAsset) -> bool:
+        """
+        Adds the asset, returning False if it was already registered.
+        """
+        if asset in self._assets:
+            return False
+        self._assets[asset] = None
+        for cls in type(asset).__mro__[:-1]:
+            self._by_type.setdefault(cls, {})[asset] = None
+        self._names[asset] = asset.name
+        self._by_name.setdefault(asset.name, {})[asset] = None
+        return True
+
+    def remove(self, asset:CampaignAsset) -> bool:
+        """
+        Removes the asset, returning False if it was not registered.
+        """
+        if asset not in self._assets:
+            return False
+        del self._assets[asset]
+        for cls in type(asset).__mro__[:-1]:
+            del self._by_type[cls][asset]
+        name = self._names.pop(asset)
+        named = self._by_name[name]
+        del named[asset]
+        if not named:
+            del self._by_name[name]
+        return True
+
+    def of_type(self, cls:type) -> Iterable[CampaignAsset]:
+        """
+        Returns a live view of the registered instances of the given class (including subclasses), in the order they were added.
+        """
+        return self._by_type.get(cls, {}).keys()
+
+    def named(self, name:str) -> list[CampaignAsset]:
+        """
+        Returns the registered assets with the given name, in the order they were added.
+        """
+        return list(self._by_name.get(name, ()))
+
+    def __contains__(self, asset:CampaignAsset) -> bool:
+        return asset in self._assets
+
+    def __iter__(self):
+        return iter(self._assets)
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def __repr__(self) -> str:
+        return f"AssetRegistry({list(self._assets)})"
+
 class Campaign:
-    def __init__(self, assets:Iterable[CampaignAsset]=[]) -> None:
-        self.assets: list[CampaignAsset] = []
-        self.rooms: list[Room]  = []
+    """
+    Ticks a set of campaign assets.
+
+    Only assets with something to do are ticked: each asset is kept in a heap keyed by the next tick it is due
+    (see CampaignAsset.idle_ticks), so the cost of a tick is proportional to the number of active assets.
+    Assets that are due on the same tick are ticked in the order they were added to the campaign.
+    Timers (see .schedule) are kept in a second heap, and .run_until uses both heaps to jump over ticks where nothing is due.
+    """
+    def __init__(self, assets:Iterable[CampaignAsset]=[], deferred:bool=False) -> None:
+        """
+        If deferred is True, events emitted by the campaign's assets are queued and dispatched together at the end of
+        a tick, rather than while the assets are ticking (see EventQueue). Events emitted between ticks (for example
+        by assets added or moved before the campaign runs) are dispatched at the end of the next tick.
+        """
+        self.assets: AssetRegistry = AssetRegistry()
+        self.events: EventRegistry = event_registry()
+        """Handlers for "asset_added" and "asset_removed" (with the asset), which are called straight away."""
+        self.events.declare("asset_added")
+        self.events.declare("asset_removed")
+        self.queue: Optional[EventQueue] = EventQueue() if deferred else None
+        self.current_tick: int = 0
+        """Number of ticks run so far."""
+
+        # Heap of [due tick, order, sequence, asset] entries. Entries replaced by a later .wake stay in the heap until
+        # they are popped, an entry is only live if it is the asset's entry in self._due.
+        self._heap: list[list] = []
+        self._due: dict[CampaignAsset, list] = {}
+        # Position of each asset in the campaign, used to tick assets that are due together in the order they were added.
+        self._order: dict[CampaignAsset, int] = {}
+        self._next_order: int = 0
+        self._sequence: int = 0
+        # The last tick that each asset has been ticked or skipped for.
+        self._last: dict[CampaignAsset, int] = {}
+        # Order of the asset being ticked, -1 while timers run and None outside of .tick.
+        self._ticking: Optional[int] = None
+        # Heap of [due tick, sequence, callback] timer entries, cancelled timers have their callback set to None.
+        self._timers: list[list] = []
+        self._timer_sequence: int = 0
 
         for asset in assets:
             self.add_asset(asset)
     
+    @property
+    def rooms(self) -> Iterable[Room]:
+        """Live view of the rooms in the campaign."""
+        return self.assets.of_type(Room)
+
     def add_asset(self, asset:CampaignAsset) -> None:
-        if asset in self.assets:
+        if not self.assets.add(asset):
             return
 
-        if isinstance(asset, Room):
-            self.rooms.append(asset)
-        
-        self.assets.append(asset)
+        if self.queue is not None:
+            asset.queue = self.queue
+
+        asset.campaign = self
+        self._order[asset] = self._next_order
+        self._next_order += 1
+        self._last[asset] = self._mark(asset)
+        self._schedule(asset, self._last[asset])
+        self._emit("asset_added", asset)
     
     def add_room(self, room:Room, enter_from:Room = None) -> None | Tuple[Door, Door]:
         self.add_asset(room)
         if enter_from != None:
             return room.connect_to(enter_from)
     
-    def remove_asset(self, asset:CampaignAsset) -> None:
-        if asset not in self.assets:
+    def remove_asset(self, asset:CampaignAsset, disconnect:bool=True) -> None:
+        """
+        Removes the asset from the campaign. Removing a room also removes the doors leading to it from the campaign's
+        other rooms, unless disconnect is False.
+        """
+        if not self.assets.remove(asset):
             return
         
-        if isinstance(asset, Room):
-            for r in self.rooms:
-                r.disconnect_from(asset)
-            self.rooms.remove(asset)
+        if disconnect and isinstance(asset, Room):
+            # disconnect_from removes every door from the source room to this one, so each source only needs to be visited once.
+            sources = {door.source: None for door in asset.incoming}
+            for source in sources:
+                if source in self.assets:
+                    source.disconnect_from(asset)
+
+        if asset.queue is self.queue:
+            asset.queue = None
+
+        if asset.campaign is self:
+            asset.campaign = None
+        del self._order[asset]
+        del self._last[asset]
+        self._due.pop(asset, None)
+        self._emit("asset_removed", asset)
+
+    def on(self, event_type:str, event:CampaignEvent | Callable[[Campaign, CampaignAsset], None], weak:bool=False) -> None:
+        """
+        Adds a handler for the campaign's "asset_added" or "asset_removed" events (see CampaignAsset.on).
+        """
+        if not isinstance(event, CampaignEvent):
+            if not callable(event):
+                raise Exception("Tried to create a CampaignEvent using a non-callable object.")
+            event = CampaignEvent(event)
+        self.events.add(event_type, event, weak=weak)
 
-        self.assets.remove(asset)
+    def off(self, event_type:str, event:CampaignEvent | Callable[[Campaign, CampaignAsset], None]) -> None:
+        """
+        Removes a handler added with .on. Does nothing if the handler has not been added for the event_type.
+        """
+        handlers = self.events.get(event_type)
+        if handlers is not None:
+            handlers.remove(_callback_of(event))
+
+    def _emit(self, event_type:str, asset:CampaignAsset) -> None:
+        handlers = self.events.get(event_type)
+        if handlers:
+            handlers.emit(self, asset, prune=False)
     
-    def tick(self):
+    def handler_counts(self) -> dict[CampaignAsset, dict[str, int]]:
+        """
+        Returns the number of handlers registered on each asset, by event_type. Assets without handlers are left out.
+
+        Useful for finding handlers that are piling up over a long campaign.
+        """
+        counts = {}
         for asset in self.assets:
-            asset.tick()
\ No newline at end of file
+            asset_counts = asset.handler_counts()
+            if asset_counts:
+                counts[asset] = asset_counts
+        return counts
+
+    def _mark(self, asset:CampaignAsset) -> int:
+        """
+        Returns the last tick that the asset should be accounted for when it is (re)scheduled: during a tick,
+        assets that have not had their turn yet should still be ticked in the current tick.
+        """
+        if self._ticking is not None and self._ticking < self._order[asset]:
+            return self.current_tick - 1
+        return self.current_tick
+
+    def _schedule(self, asset:CampaignAsset, last:int) -> None:
+        """
+        Schedules the asset for the next tick after the given one that it is not idle for.
+        """
+        idle = asset.idle_ticks()
+        entry = self._due.get(asset)
+        if idle is None:
+            if entry is not None:
+                del self._due[asset]
+            return
+
+        due = last + 1 + idle
+        if entry is not None and entry[0] == due:
+            return
+        entry = [due, self._order[asset], self._sequence, asset]
+        self._sequence += 1
+        self._due[asset] = entry
+        heapq.heappush(self._heap, entry)
+
+    def wake(self, asset:CampaignAsset) -> None:
+        """
+        Reschedules the asset, after bringing it up to date with the ticks that it has been sleeping through.
+        """
+        if asset not in self._order:
+            return
+        mark = self._mark(asset)
+        skipped = mark - self._last[asset]
+        if 0 < skipped:
+            asset.skip(skipped)
+            self._last[asset] = mark
+        self._schedule(asset, mark)
+
+    def schedule(self, ticks:int, callback:Callable[[Campaign], None]) -> list:
+        """
+        Schedules callback(campaign) to be called at the start of the tick the given number of ticks from now (at least 1),
+        before any asset is ticked. Timers due on the same tick are called in the order they were scheduled.
+
+        Returns the timer, which can be passed to .cancel.
+        """
+        timer = [self.current_tick + max(1, ticks), self._timer_sequence, callback]
+        self._timer_sequence += 1
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def cancel(self, timer:list) -> None:
+        """
+        Cancels a timer returned by .schedule. Does nothing if the timer has already been called.
+        """
+        timer[2] = None
+
+    def next_tick(self) -> Optional[int]:
+        """
+        Returns the next tick where anything can happen: the first tick that an asset is due (see CampaignAsset.idle_ticks)
+        or a timer is called, or the next tick if there are queued events. Returns None if nothing is scheduled.
+        """
+        if self.queue is not None and len(self.queue):
+            return self.current_tick + 1
+
+        # Drop replaced entries and cancelled timers from the top of the heaps.
+        heap = self._heap
+        while heap and self._due.get(heap[0][3]) is not heap[0]:
+            heapq.heappop(heap)
+        timers = self._timers
+        while timers and timers[0][2] is None:
+            heapq.heappop(timers)
+
+        due = [entries[0][0] for entries in (heap, timers) if entries]
+        if not due:
+            return None
+        return max(self.current_tick + 1, min(due))
+
+    def run_until(self, predicate:Callable[[], bool], max_ticks:Optional[int]=None) -> bool:
+        """
+        Ticks the campaign until predicate() is true, or until max_ticks ticks have passed (if given).
+        Returns whether the predicate became true.
+
+        Stretches of ticks where nothing is due (see .next_tick) are jumped over in one step, so the predicate is only
+        checked after ticks where something happened, and should depend on the state of the campaign rather than on
+        current_tick. The outcome is otherwise the same as calling .tick in a loop. If nothing is scheduled at all,
+        the campaign fast-forwards to max_ticks, or returns straight away if max_ticks is not given.
+        """
+        end = None if max_ticks is None else self.current_tick + max_ticks
+        while not predicate():
+            next_tick = self.next_tick()
+            if end is not None and (next_tick is None or end < next_tick):
+                self.current_tick = max(self.current_tick, end)
+                return False
+            if next_tick is None:
+                return False
+            self.current_tick = next_tick - 1
+            self.tick()
+        return True
+
+    def tick(self):
+        """
+        Calls the timers that are due this tick, ticks every asset that is due this tick, then flushes the event queue (if deferred).
+        """
+        self.current_tick += 1
+        tick = self.current_tick
+        heap = self._heap
+        timers = self._timers
+        try:
+            # Assets woken by timers are still ticked this tick.
+            self._ticking = -1
+            while timers and timers[0][0] <= tick:
+                callback = heapq.heappop(timers)[2]
+                if callback is not None:
+                    callback(self)
+
+            while heap and heap[0][0] <= tick:
+                entry = heapq.heappop(heap)
+                asset = entry[3]
+                if self._due.get(asset) is not entry:
+                    continue
+                del self._due[asset]
+
+                self._ticking = entry[1]
+                skipped = tick - 1 - self._last[asset]
+                if 0 < skipped:
+                    asset.skip(skipped)
+                self._last[asset] = tick
+                asset.tick()
+                if asset in self._order:
+                    self._schedule(asset, tick)
+        finally:
+            self._ticking = None
+
+        if self.queue is not None:
+            self.queue.flush()
\ No newline at end of file
@@ -1,6 +1,7 @@
+import gc
 import unittest
 
-from campaign import Campaign, CampaignAsset, Door, Room, CampaignEvent, Walker
+from campaign import AssetRegistry, Campaign, CampaignAsset, Door, EventQueue, Exploration, Room, CampaignEvent, Walker
 
 class TestCampaign(unittest.TestCase):
 
@@ -38,6 +39,45 @@ class TestCampaign(unittest.TestCase):
         asset.off("test", event2)
         self.assertTrue(0 == len(list(filter(lambda e: e.callback == event2, asset.events["test"]))))
     
+    def test_campaignasset_on_duplicate(self):
+        calls = []
+        callback = lambda asset, data: calls.append(data)
+        asset = CampaignAsset("Test_asset")
+        asset.on("test", callback)
+        asset.on("test", callback)
+        asset.on("test", CampaignEvent(callback))
+        self.assertEqual(len(asset.events["test"]), 1, "A callable should only be registered once, even if it is wrapped in a new CampaignEvent.")
+        asset.emit("test", 1)
+        self.assertEqual(calls, [1])
+
+        # Removing a different CampaignEvent for the same callable should not remove the registered one.
+        asset.off("test", CampaignEvent(callback))
+        self.assertIn(callback, asset.events["test"])
+        asset.off("test", callback)
+        self.assertEqual(len(asset.events["test"]), 0)
+
+    def test_campaignasset_on_weak(self):
+        calls = []
+
+        class Observer:
+            def notify(self, asset, data):
+                calls.append(data)
+
+        asset = CampaignAsset("Test_asset")
+        observer = Observer()
+        asset.on("test", observer.notify, weak=True)
+        asset.on("test", lambda *_: None)
+        self.assertEqual(asset.handler_counts(), {"test": 2})
+        asset.emit("test", 1)
+        self.assertEqual(calls, [1])
+
+        del observer
+        gc.collect()
+        self.assertEqual(asset.handler_counts(), {"test": 1})
+
+        campaign = Campaign([asset, CampaignAsset("Idle asset")])
+        self.assertEqual(campaign.handler_counts(), {asset: {"test": 1}})
+
     def test_campaignasset_emit(self):
         state = {
             "complete": False
@@ -219,6 +259,66 @@ class TestCampaign(unittest.TestCase):
         self.assertNotIn(room1, campaign.rooms)
         self.assertEqual(len(room2.doors), 0)
 
+    def test_assetregistry_indexes(self):
+        registry = AssetRegistry()
+        room1 = Room("Hall")
+        room2 = Room("Hall")
+        walker = Walker("Jay", room1)
+        for asset in [room1, walker, room2]:
+            self.assertTrue(registry.add(asset))
+        self.assertFalse(registry.add(room1))
+
+        self.assertEqual(list(registry), [room1, walker, room2])
+        self.assertEqual(list(registry.of_type(Room)), [room1, room2])
+        self.assertEqual(list(registry.of_type(CampaignAsset)), [room1, walker, room2])
+        self.assertEqual(list(registry.of_type(Door)), [])
+        self.assertEqual(registry.named("Hall"), [room1, room2])
+
+        self.assertTrue(registry.remove(room1))
+        self.assertFalse(registry.remove(room1))
+        self.assertNotIn(room1, registry)
+        self.assertEqual(list(registry.of_type(Room)), [room2])
+        self.assertEqual(registry.named("Hall"), [room2])
+        self.assertEqual(len(registry), 2)
+
+    def test_room_incoming(self):
+        room1 = Room("R1")
+        room2 = Room("R2")
+        room3 = Room("R3")
+        door12, door21 = room1.connect_to(room2)
+        door32, _ = room3.connect_to(room2)
+        self.assertEqual(list(room2.incoming), [door12, door32])
+        self.assertEqual(list(room1.incoming), [door21])
+        self.assertIs(door12.source, room1)
+
+        door32.room = room1
+        self.assertEqual(list(room2.incoming), [door12])
+        self.assertEqual(list(room1.incoming), [door21, door32])
+
+        room1.disconnect_from(room2)
+        self.assertEqual(list(room2.incoming), [])
+        self.assertIsNone(door12.source)
+
+    def test_room_door_events(self):
+        room1 = Room("R1")
+        room2 = Room("R2")
+        events = []
+        for event_type in ["door_added", "door_removed", "door_retargeted"]:
+            room1.on(event_type, lambda room, door, event_type=event_type: events.append((event_type, room, door)))
+        door12, _ = room1.connect_to(room2)
+        door = Door("one-way")
+        room1.add_door(door)
+        door.room = room2
+        room1.remove_door(door)
+        room1.disconnect_from(room2)
+        self.assertEqual(events, [
+            ("door_added", room1, door12),
+            ("door_added", room1, door),
+            ("door_retargeted", room1, door),
+            ("door_removed", room1, door),
+            ("door_removed", room1, door12),
+        ])
+
     def test_campaign_tick(self):
 
         flags = {
@@ -272,6 +372,283 @@ class TestCampaign(unittest.TestCase):
         self.assertEqual(walker.room, exit_room)
 
 
+    def test_campaignevent_batch(self):
+        received = []
+        event = CampaignEvent(lambda _, data: received.append(data), batch=True)
+        event.start(None, 1)
+        event.start_batch(None, [2, 3])
+        self.assertEqual(received, [[1], [2, 3]])
+
+        received.clear()
+        event = CampaignEvent(lambda _, data: received.append(data))
+        event.start_batch(None, [2, 3])
+        self.assertEqual(received, [2, 3])
+
+    def test_eventqueue_coalesce(self):
+        received = []
+        asset = CampaignAsset("Test asset")
+        asset.on("test", CampaignEvent(lambda _, data: received.append(data), batch=True))
+        queue = EventQueue()
+        a, b = object(), object()
+        queue.push(asset, "test", a)
+        queue.push(asset, "test", b)
+        queue.push(asset, "test", a)
+        self.assertEqual(len(queue), 2)
+        queue.flush()
+        self.assertEqual(received, [[a, b]], "Duplicate events should be dispatched once, in a single batch.")
+        self.assertEqual(len(queue), 0)
+
+        # Equal values are separate events even when Python shares the objects.
+        for data in [None, None, 7, 7, "door", "door"]:
+            queue.push(asset, "test", data)
+        self.assertEqual(len(queue), 6)
+        queue.flush()
+        self.assertEqual(received[-1], [None, None, 7, 7, "door", "door"])
+
+    def test_campaign_deferred(self):
+        campaign = Campaign(deferred=True)
+        room0 = Room("Room 0")
+        room1 = Room("Room 1")
+        campaign.add_room(room0)
+        campaign.add_room(room1, room0)
+
+        entered = []
+        batches = []
+        def enter(room, walker):
+            self.assertEqual(len(room.walkers), 3, "Enter events should only be dispatched once every walker has moved.")
+            entered.append(walker.name)
+        room1.on("enter", enter)
+        room1.on("enter", CampaignEvent(lambda _, walkers: batches.append([w.name for w in walkers]), batch=True))
+
+        walkers = [Walker(f"Walker {i}", room0, door_select=lambda doors: doors[0]) for i in range(3)]
+        for w in walkers:
+            campaign.add_asset(w)
+
+        campaign.tick()
+        self.assertEqual(entered, ["Walker 0", "Walker 1", "Walker 2"])
+        self.assertEqual(batches, [["Walker 0", "Walker 1", "Walker 2"]], "Batch handlers should get all the tick's events in one call.")
+
+    def test_campaign_deferred_chained(self):
+        campaign = Campaign(deferred=True)
+        asset = CampaignAsset("Test asset")
+        campaign.add_asset(asset)
+        calls = []
+        asset.on("tick", lambda a, _: a.emit("first"))
+        asset.on("first", lambda a, _: calls.append("first") or a.emit("second"))
+        asset.on("second", lambda *_: calls.append("second"))
+        campaign.tick()
+        self.assertEqual(calls, ["first", "second"], "Events emitted while flushing should be dispatched in the same tick.")
+
+        campaign.remove_asset(asset)
+        self.assertIsNone(asset.queue)
+
+    def test_campaign_sleeping_walker(self):
+        campaign = Campaign()
+        rooms = [Room(f"Room {i}") for i in range(5)]
+        for i, room in enumerate(rooms):
+            campaign.add_room(room, rooms[i - 1] if i else None)
+        for room in rooms:
+            campaign.add_asset(room)
+        walker = Walker("Jay", rooms[0], door_select=lambda doors: doors[-1])
+        walker.speed = 3
+        campaign.add_asset(walker)
+
+        positions = []
+        for _ in range(7):
+            campaign.tick()
+            positions.append(rooms.index(walker.room))
+        self.assertEqual(positions, [0, 0, 1, 1, 1, 2, 2], "A walker with speed 3 should move every third tick.")
+        self.assertEqual(len(campaign._due), 1, "Only the walker should be scheduled, rooms without tick handlers are idle.")
+
+        # Changing the speed while sleeping should take the ticks already slept into account.
+        walker.speed = 2
+        campaign.tick()
+        self.assertEqual(rooms.index(walker.room), 3)
+
+    def test_campaign_walker_subclass_tick(self):
+        ticks = []
+        class Patrol(Walker):
+            def tick(self):
+                ticks.append(campaign.current_tick)
+                super().tick()
+
+        campaign = Campaign()
+        room = Room("Room")
+        campaign.add_asset(room)
+        walker = Patrol("Patrol", room)
+        walker.speed = 5
+        campaign.add_asset(walker)
+        for _ in range(20):
+            campaign.tick()
+        self.assertEqual(ticks, list(range(1, 21)), "Walkers that override tick should be ticked every tick.")
+
+    def test_campaign_wake_on_tick_handler(self):
+        campaign = Campaign()
+        asset = CampaignAsset("Test asset")
+        campaign.add_asset(asset)
+        campaign.tick()
+        ticks = []
+        asset.on("tick", lambda *_: ticks.append(campaign.current_tick))
+        campaign.tick()
+        campaign.tick()
+        self.assertEqual(ticks, [2, 3])
+
+    def test_campaign_matches_every_tick(self):
+        def run(scheduled):
+            campaign = Campaign()
+            rooms = [Room(f"Room {i}") for i in range(6)]
+            for i, room in enumerate(rooms):
+                campaign.add_room(room, rooms[i - 1] if i else None)
+            rooms[0].connect_to(rooms[-1])
+            log = []
+            for room in rooms:
+                room.on("enter", lambda r, w: log.append((w.name, r.name)))
+            walkers = []
+            for i in range(4):
+                walker = Walker(f"Walker {i}", rooms[i], door_select=lambda doors, i=i: doors[i % len(doors)])
+                walker.speed = i + 1
+                walkers.append(walker)
+                if scheduled:
+                    campaign.add_asset(walker)
+            for _ in range(20):
+                if scheduled:
+                    campaign.tick()
+                else:
+                    for walker in walkers:
+                        walker.tick()
+            return log
+
+        self.assertEqual(run(True), run(False), "Sleeping walkers should move exactly as if they were ticked every tick.")
+
+    def test_campaign_timers(self):
+        campaign = Campaign()
+        calls = []
+        campaign.schedule(2, lambda c: calls.append(("a", c.current_tick)))
+        timer = campaign.schedule(2, lambda c: calls.append(("b", c.current_tick)))
+        campaign.schedule(1, lambda c: c.schedule(2, lambda c: calls.append(("c", c.current_tick))))
+        campaign.cancel(timer)
+        self.assertEqual(campaign.next_tick(), 1)
+        for _ in range(4):
+            campaign.tick()
+        self.assertEqual(calls, [("a", 2), ("c", 3)])
+        self.assertIsNone(campaign.next_tick())
+
+    def test_campaign_run_until(self):
+        def run(fast, deferred=False):
+            campaign = Campaign(deferred=deferred)
+            rooms = [Room(f"Room {i}") for i in range(6)]
+            for i, room in enumerate(rooms):
+                campaign.add_room(room, rooms[i - 1] if i else None)
+            log = []
+            for room in rooms:
+                room.on("enter", lambda r, w: log.append((campaign.current_tick, w.name, r.name)))
+            walkers = []
+            for i in range(3):
+                walker = Walker(f"Walker {i}", rooms[i], door_select=lambda doors, i=i: doors[i % len(doors)])
+                walker.speed = 7 + 4 * i
+                walkers.append(walker)
+                campaign.add_asset(walker)
+
+            def speed_up(c):
+                log.append((c.current_tick, "timer"))
+                walkers[2].speed = 3
+            campaign.schedule(40, speed_up)
+
+            done = lambda: 12 <= len(log)
+            if fast:
+                result = campaign.run_until(done, 500)
+            else:
+                while not done() and campaign.current_tick < 500:
+                    campaign.tick()
+                result = done()
+            return result, campaign.current_tick, log
+
+        for deferred in (False, True):
+            expected = run(False, deferred)
+            self.assertTrue(expected[0])
+            self.assertEqual(run(True, deferred), expected, "run_until should give the same result as ticking every tick.")
+
+    def test_campaign_run_until_idle(self):
+        campaign = Campaign()
+        room = Room("Room")
+        campaign.add_asset(room)
+        walker = Walker("Walker", room)
+        walker.speed = 10 ** 9
+        campaign.add_asset(walker)
+        flags = {"rung": False}
+        campaign.schedule(10 ** 8, lambda c: flags.__setitem__("rung", True))
+
+        self.assertTrue(campaign.run_until(lambda: flags["rung"]), "Idle ticks should be skipped without ticking them.")
+        self.assertEqual(campaign.current_tick, 10 ** 8)
+        self.assertFalse(campaign.run_until(lambda: False, 10 ** 6))
+        self.assertEqual(campaign.current_tick, 10 ** 8 + 10 ** 6)
+        self.assertEqual(walker.ticks_passed, 0, "The walker should be brought up to date when it is next ticked.")
+        campaign.run_until(lambda: walker.ticks_passed == 0 and campaign.current_tick > 10 ** 8 + 10 ** 6, 10 ** 9)
+        self.assertEqual(campaign.current_tick, 10 ** 9)
+
+    def make_tree(self, depth):
+        """
+        Creates a binary tree of rooms, returning the rooms in breadth-first order.
+        """
+        rooms = [Room("0")]
+        for i in range(2 ** depth - 1):
+            for _ in range(2):
+                child = Room(str(len(rooms)))
+                rooms[i].connect_to(child)
+                rooms.append(child)
+        return rooms
+
+    def test_walker_explore(self):
+        rooms = self.make_tree(4)
+        walker = Walker("Jay", rooms[0])
+        moves = 0
+        while not all(r.visited for r in rooms):
+            walker.tick()
+            moves += 1
+            self.assertLessEqual(moves, 2 * len(rooms), "The default selector should backtrack instead of stalling.")
+        walker.tick()
+        self.assertEqual(moves, 2 * (len(rooms) - 1) - 4, "A depth first exploration only walks back up the tree until the last leaf (at depth 4).")
+
+    def test_exploration_shared(self):
+        rooms = self.make_tree(5)
+        exploration = Exploration()
+        walkers = [Walker(f"Walker {i}", rooms[0], door_select=exploration.selector()) for i in range(3)]
+        campaign = Campaign(walkers)
+        for _ in range(len(rooms)):
+            campaign.tick()
+        self.assertTrue(all(r.visited for r in rooms))
+        self.assertEqual(exploration.remaining(), 0)
+        self.assertEqual(exploration.explored, len(rooms))
+
+    def test_exploration_frontier_route(self):
+        # A walker starting without a trail in an explored area should walk to the nearest unvisited room.
+        rooms = [Room(str(i)) for i in range(5)]
+        for i in range(1, 5):
+            rooms[i - 1].connect_to(rooms[i])
+        exploration = Exploration()
+        for room in rooms[:3]:
+            room.visited = True
+            exploration.visit(room)
+        walker = Walker("Jay", rooms[0], door_select=exploration.selector())
+        for _ in range(3):
+            walker.tick()
+        self.assertIs(walker.room, rooms[3])
+
+    def test_exploration_custom_selector(self):
+        # Rooms entered by a walker with its own selector are explored in the state it shares.
+        rooms = self.make_tree(3)
+        exploration = Exploration()
+        explorer = Walker("Jay", rooms[0], door_select=exploration.selector())
+        wanderer = Walker("Kay", rooms[0], door_select=lambda doors: doors[-1])
+        wanderer.exploration = exploration
+        self.assertIs(explorer.exploration, exploration)
+        campaign = Campaign([explorer, wanderer])
+        for _ in range(3):
+            campaign.tick()
+        self.assertEqual((explorer.room, wanderer.room), (rooms[7], rooms[14]))
+        self.assertEqual(exploration.explored, 7, "Rooms entered by both walkers should be explored.")
+        self.assertEqual(sorted(room.name for room in exploration.frontier), ["13", "4", "5", "8"])
+
     
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
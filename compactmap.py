@@ -0,0 +1,533 @@
+import weakref
+from collections.abc import Iterator, Sequence
+from typing import Optional
+
+import numpy as np
+
+from campaign import Door, EventQueue, Room, Walker, event_registry
+from emitter import EventRegistry
+
+# Empty type declarations so that the names can be used in type hints
+class Bitmap: pass
+class CompactMap: pass
+class CompactRoom: pass
+class CompactDoor: pass
+
+class Bitmap:
+    """
+    Fixed-size array of bits, packed 8 to a byte.
+    """
+    __slots__ = ("bits", "size")
+
+    def __init__(self, size:int) -> None:
+        self.size: int = size
+        self.bits: np.ndarray = np.zeros((size + 7) >> 3, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index:int) -> bool:
+        return bool((int(self.bits[index >> 3]) >> (index & 7)) & 1)
+
+    def __setitem__(self, index:int, value:bool) -> None:
+        byte = int(self.bits[index >> 3])
+        if value:
+            byte |= 1 << (index & 7)
+        else:
+            byte &= ~(1 << (index & 7))
+        self.bits[index >> 3] = byte
+
+    def get_many(self, indices:np.ndarray) -> np.ndarray:
+        """
+        Returns the bits at the given indices, as an array of bools.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ((self.bits[indices >> 3] >> (indices & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def set_many(self, indices:np.ndarray) -> None:
+        """
+        Sets the bits at the given indices.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        np.bitwise_or.at(self.bits, indices >> 3, (1 << (indices & 7)).astype(np.uint8))
+
+    def clear(self) -> None:
+        self.bits[:] = 0
+
+    def to_array(self) -> np.ndarray:
+        """
+        Returns the bits as an array of bools.
+        """
+        return np.unpackbits(self.bits, count=self.size, bitorder="little").astype(bool)
+
+    def count(self) -> int:
+        """
+        Returns the number of bits that are set.
+        """
+        return int(np.unpackbits(self.bits, count=self.size, bitorder="little").sum())
+
+    def nonzero(self) -> np.ndarray:
+        """
+        Returns the indices of the bits that are set.
+        """
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size, bitorder="little"))
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+def _hash(seed:int, walkers:np.ndarray, tick:int) -> np.ndarray:
+    """
+    SplitMix64 hash of (seed, walker id, tick) for every walker, as uint64.
+    """
+    with np.errstate(over="ignore"):
+        x = walkers.astype(np.uint64) * _GOLDEN
+        x ^= np.uint64((seed * 0x632BE59BD9B4E019 + tick * 0xD1B54A32D192ED03) & 0xFFFFFFFFFFFFFFFF)
+        x ^= x >> np.uint64(30)
+        x *= _MIX1
+        x ^= x >> np.uint64(27)
+        x *= _MIX2
+        x ^= x >> np.uint64(31)
+    return x
+
+def choose_doors(offsets:np.ndarray, rooms:np.ndarray, walkers:np.ndarray, tick:int, seed:int) -> np.ndarray:
+    """
+    Returns the id of the door that each walker moves through (see wander), or -1 for walkers in rooms without doors.
+    """
+    start = offsets[rooms]
+    degree = offsets[rooms + 1] - start
+    moving = 0 < degree
+    doors = np.full(len(rooms), -1, dtype=np.int64)
+    if moving.any():
+        doors[moving] = start[moving] + (_hash(seed, walkers[moving], tick) % degree[moving].astype(np.uint64)).astype(np.int64)
+    return doors
+
+def wander(offsets:np.ndarray, targets:np.ndarray, rooms:np.ndarray, walkers:np.ndarray, tick:int, seed:int) -> np.ndarray:
+    """
+    Moves every walker through a door of its room (in a CompactMap's CSR arrays) chosen by hashing (seed, walker id, tick),
+    returning the new rooms. Walkers in rooms without doors stay where they are.
+
+    The choice only depends on those values and the map, not on which process or batch the walker is moved in.
+    """
+    doors = choose_doors(offsets, rooms, walkers, tick, seed)
+    moving = 0 <= doors
+    new_rooms = rooms.copy()
+    new_rooms[moving] = targets[doors[moving]]
+    return new_rooms
+
+class CompactMap:
+    """
+    Campaign map stored as arrays instead of one Room and Door object per room and door.
+
+    The doors are stored in CSR form: the doors of room i are the entries offsets[i] to offsets[i + 1] of targets, which
+    holds the id of the room each door leads to. Visited and occupied rooms are tracked in bitmaps. This brings the cost
+    of a room down to a few bytes plus a few bytes per door.
+
+    Room and Door objects (CompactRoom and CompactDoor proxies) are only created when they are asked for, with .room and .door,
+    and the same proxy is returned for as long as it is referenced. Event handlers and walkers are stored by the map,
+    so they are kept when a proxy is dropped. Doors added at runtime (e.g. with Room.connect_to) are kept as regular Door
+    objects next to the arrays.
+    """
+    def __init__(self, offsets:Sequence[int], targets:Sequence[int], names:Optional[Sequence[str]]=None) -> None:
+        """
+        Creates a map from CSR arrays. If names is not given, rooms are named "Room <id>".
+        """
+        self.offsets: np.ndarray = np.asarray(offsets, dtype=np.int64)
+        self.targets: np.ndarray = np.asarray(targets, dtype=np.int32)
+        if len(self.offsets) == 0 or self.offsets[-1] != len(self.targets):
+            raise Exception("The last door offset must be the number of doors.")
+        self.names: Optional[Sequence[str]] = names
+
+        self.visited: Bitmap = Bitmap(len(self))
+        """Rooms that have been entered."""
+        self.occupied: Bitmap = Bitmap(len(self))
+        """Rooms that currently have walkers in them."""
+
+        self._rooms: weakref.WeakValueDictionary[int, CompactRoom] = weakref.WeakValueDictionary()
+        self._doors: weakref.WeakValueDictionary[int, CompactDoor] = weakref.WeakValueDictionary()
+        # Event registries of the rooms and doors that have been given handlers, keyed by ("room" | "door", id).
+        self._events: dict[tuple[str, int], EventRegistry] = {}
+        # Bitmaps of the rooms or doors with handlers for an event type, keyed by ("room" | "door", event_type), see .listeners.
+        self._listeners: dict[tuple[str, str], Bitmap] = {}
+        # Incremented whenever handlers are added or removed, so that copies of the listener bitmaps can tell they are out of date.
+        self._listener_version: int = 0
+        self._walkers: dict[int, list[Walker]] = {}
+        self.queue: Optional[EventQueue] = None
+        """If set, events of rooms and doors that have no queue of their own are queued here (see CampaignAsset.queue)."""
+        # Doors added to rooms at runtime, and doors (added at runtime) leading to rooms, by room id.
+        self._extra_doors: dict[int, list[Door]] = {}
+        self._extra_incoming: dict[int, dict[Door, None]] = {}
+        # Ids of the doors in the arrays that have been removed with Room.disconnect_from.
+        self._removed: set[int] = set()
+        # Reverse CSR arrays (door ids sorted by the room they lead to), built when needed.
+        self._in_offsets: Optional[np.ndarray] = None
+        self._in_doors: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_edges(size:int, sources:Sequence[int], targets:Sequence[int], names:Optional[Sequence[str]]=None) -> CompactMap:
+        """
+        Creates a map with the given number of rooms and a door from sources[i] to targets[i] for every i.
+        The doors of each room keep the order they are given in.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int32)
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=offsets[1:])
+        return CompactMap(offsets, targets[order], names)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def door_count(self) -> int:
+        """Number of doors in the arrays (not counting doors added at runtime)."""
+        return len(self.targets)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays and bitmaps."""
+        return self.offsets.nbytes + self.targets.nbytes + self.visited.bits.nbytes + self.occupied.bits.nbytes
+
+    def room_name(self, room_id:int) -> str:
+        return self.names[room_id] if self.names is not None else f"Room {room_id}"
+
+    def room(self, room_id:int) -> CompactRoom:
+        """
+        Returns the proxy for the room, creating it if there is none.
+        """
+        room = self._rooms.get(room_id)
+        if room is None:
+            if not 0 <= room_id < len(self):
+                raise IndexError("CompactMap room id out of range")
+            room = self._rooms[room_id] = CompactRoom(self, room_id)
+        return room
+
+    def door(self, door_id:int) -> CompactDoor:
+        """
+        Returns the proxy for the door, creating it if there is none.
+        """
+        door = self._doors.get(door_id)
+        if door is None:
+            if not 0 <= door_id < len(self.targets):
+                raise IndexError("CompactMap door id out of range")
+            source = int(np.searchsorted(self.offsets, door_id, side="right")) - 1
+            door = self._doors[door_id] = CompactDoor(self, door_id, source)
+        return door
+
+    def rooms(self) -> Iterator[CompactRoom]:
+        """
+        Iterates over proxies for every room. Only use this on maps that are small enough to have an object per room.
+        """
+        return (self.room(i) for i in range(len(self)))
+
+    def neighbours(self, room_id:int) -> np.ndarray:
+        """
+        Returns the ids of the rooms that the doors in the arrays lead to from the given room.
+        """
+        return self.targets[self.offsets[room_id]:self.offsets[room_id + 1]]
+
+    def door_ids(self, room_id:int) -> range:
+        """
+        Returns the ids of the room's doors in the arrays, including removed doors.
+        """
+        return range(int(self.offsets[room_id]), int(self.offsets[room_id + 1]))
+
+    def incoming_ids(self, room_id:int) -> np.ndarray:
+        """
+        Returns the ids of the doors in the arrays that lead to the given room, including removed doors.
+        """
+        if self._in_offsets is None:
+            self._in_doors = np.argsort(self.targets, kind="stable").astype(np.int64)
+            self._in_offsets = np.zeros(len(self) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=len(self)), out=self._in_offsets[1:])
+        return self._in_doors[self._in_offsets[room_id]:self._in_offsets[room_id + 1]]
+
+    def _entered(self, room_id:int) -> None:
+        """
+        Called when a walker enters a room.
+        """
+        self.occupied[room_id] = True
+
+    def _left(self, room_id:int) -> None:
+        """
+        Called when a walker leaves a room.
+        """
+        if not self._walkers.get(room_id, True):
+            del self._walkers[room_id]
+            self.occupied[room_id] = False
+
+    def listeners(self, kind:str, event_type:str) -> Bitmap:
+        """
+        Returns a bitmap of the rooms (kind "room") or the doors in the arrays (kind "door") that have handlers for
+        the event_type, for checking many rooms or doors at once (see Bitmap.get_many).
+
+        The bitmap is kept up to date by the proxies' .on and .off. Weak handlers that are garbage collected leave
+        their bit set, which only costs an emit that does nothing.
+        """
+        bitmap = self._listeners.get((kind, event_type))
+        if bitmap is None:
+            bitmap = self._listeners[(kind, event_type)] = Bitmap(len(self) if kind == "room" else self.door_count)
+            for (k, asset_id), registry in self._events.items():
+                if k == kind and registry.get(event_type):
+                    bitmap[asset_id] = True
+        return bitmap
+
+    def _handlers_changed(self, kind:str, asset_id:int) -> None:
+        """
+        Called when handlers are added to or removed from a room or door, updates the listener bitmaps.
+        """
+        self._listener_version += 1
+        registry = self._events.get((kind, asset_id))
+        for (k, event_type), bitmap in self._listeners.items():
+            if k == kind:
+                bitmap[asset_id] = registry is not None and bool(registry.get(event_type))
+
+    def events(self, kind:str, asset_id:int, create:bool=True) -> Optional[EventRegistry]:
+        """
+        Returns the event registry of a room or door (kind is "room" or "door"), creating it if needed and create is True.
+        """
+        registry = self._events.get((kind, asset_id))
+        if registry is None and create:
+            registry = self._events[(kind, asset_id)] = event_registry()
+        return registry
+
+# Returned as the registry of rooms and doors without handlers, so that reading them does not create a registry.
+# It stays empty, since handlers are only added through .on, which creates the asset's own registry first.
+_NO_EVENTS: EventRegistry = event_registry()
+
+def _is_in_map(asset:Room | Door, compact_map:CompactMap) -> bool:
+    return getattr(asset, "map", None) is compact_map
+
+class CompactRoom(Room):
+    """
+    Room proxy over a CompactMap. Behaves like a Room, but its state is stored by the map.
+    """
+    def __init__(self, compact_map:CompactMap, room_id:int) -> None:
+        # Room.__init__ is not called, the proxy has no state of its own apart from these.
+        self.map: CompactMap = compact_map
+        self.id: int = room_id
+        self._queue: Optional[EventQueue] = None
+        self.campaign = None
+        # Proxies of the room's doors, built by .doors and cleared when the room's doors change.
+        self._doors: Optional[tuple[Door, ...]] = None
+
+    @property
+    def queue(self) -> Optional[EventQueue]:
+        """The room's queue if it is in a deferred campaign, otherwise the map's queue."""
+        return self._queue if self._queue is not None else self.map.queue
+
+    @queue.setter
+    def queue(self, queue:Optional[EventQueue]) -> None:
+        self._queue = queue
+
+    @property
+    def name(self) -> str:
+        return self.map.room_name(self.id)
+
+    @property
+    def events(self) -> EventRegistry:
+        """The room's registry, or an empty one if the room has no handlers (registries are created by .on)."""
+        registry = self.map.events("room", self.id, create=False)
+        return _NO_EVENTS if registry is None else registry
+
+    def on(self, event_type:str, event, weak:bool=False) -> None:
+        self.map.events("room", self.id)
+        super().on(event_type, event, weak)
+        self.map._handlers_changed("room", self.id)
+
+    def off(self, event_type:str, event) -> None:
+        super().off(event_type, event)
+        self.map._handlers_changed("room", self.id)
+
+    @property
+    def visited(self) -> bool:
+        return self.map.visited[self.id]
+
+    @visited.setter
+    def visited(self, visited:bool) -> None:
+        self.map.visited[self.id] = visited
+
+    @property
+    def walkers(self) -> Sequence[Walker]:
+        """The walkers in the room. Empty rooms share an empty tuple, the map only stores lists for occupied rooms."""
+        return self.map._walkers.get(self.id, ())
+
+    @property
+    def doors(self) -> tuple[Door, ...]:
+        """The room's doors, built once and kept until doors are added to or removed from the room."""
+        if self._doors is None:
+            m = self.map
+            doors = [m.door(i) for i in m.door_ids(self.id) if i not in m._removed]
+            doors.extend(m._extra_doors.get(self.id, ()))
+            self._doors = tuple(doors)
+        return self._doors
+
+    @property
+    def incoming(self) -> dict[Door, None]:
+        m = self.map
+        incoming = {m.door(int(i)): None for i in m.incoming_ids(self.id) if i not in m._removed}
+        incoming.update(m._extra_incoming.get(self.id, {}))
+        return incoming
+
+    def emit(self, event_type:str, event_data=None) -> None:
+        # Avoid creating a registry for rooms without handlers.
+        if self.map.events("room", self.id, create=False) is not None:
+            super().emit(event_type, event_data)
+
+    def enter(self, walker:Walker) -> Room:
+        walkers = self.map._walkers.setdefault(self.id, [])
+        if walker not in walkers:
+            super().enter(walker)
+            self.map._entered(self.id)
+        return self
+
+    def leave(self, walker:Walker) -> None:
+        if walker in self.map._walkers.get(self.id, ()):
+            super().leave(walker)
+            self.map._left(self.id)
+
+    def add_door(self, door:Door) -> None:
+        """
+        Adds a door that is not part of the map's arrays to the room.
+        """
+        self.map._extra_doors.setdefault(self.id, []).append(door)
+        self._doors = None
+        door.source = self
+        if door.room is not None:
+            door.room._add_incoming(door)
+        self.emit("door_added", door)
+
+    def _add_incoming(self, door:Door) -> None:
+        if not _is_in_map(door, self.map):
+            self.map._extra_incoming.setdefault(self.id, {})[door] = None
+        self.emit("incoming_added", door)
+
+    def _remove_incoming(self, door:Door) -> None:
+        if not _is_in_map(door, self.map):
+            extra = self.map._extra_incoming.get(self.id)
+            if extra is None or extra.pop(door, 0) is not None:
+                return
+        self.emit("incoming_removed", door)
+
+    def remove_door(self, door:Door) -> None:
+        m = self.map
+        if _is_in_map(door, m):
+            if door._source_id == self.id and door.id not in m._removed:
+                door.room._remove_incoming(door)
+                m._removed.add(door.id)
+                self._doors = None
+                self.emit("door_removed", door)
+            return
+
+        extra = m._extra_doors.get(self.id)
+        if extra is None or door not in extra:
+            return
+        extra.remove(door)
+        self._doors = None
+        if door.room is not None:
+            door.room._remove_incoming(door)
+        door.source = None
+        self.emit("door_removed", door)
+
+    def disconnect_from(self, room:Room) -> None:
+        m = self.map
+        removed = []
+        if _is_in_map(room, m):
+            for i in m.door_ids(self.id):
+                if m.targets[i] == room.id and i not in m._removed:
+                    door = m.door(i)
+                    room._remove_incoming(door)
+                    m._removed.add(i)
+                    removed.append(door)
+
+        extra = m._extra_doors.get(self.id)
+        if extra:
+            doors = []
+            for door in extra:
+                if door.room != room:
+                    doors.append(door)
+                    continue
+                room._remove_incoming(door)
+                door.source = None
+                removed.append(door)
+            m._extra_doors[self.id] = doors
+        if removed:
+            self._doors = None
+        for door in removed:
+            self.emit("door_removed", door)
+
+    def __repr__(self) -> str:
+        return f"CompactRoom({self.id})"
+
+class CompactDoor(Door):
+    """
+    Door proxy over a CompactMap, for a door stored in the map's arrays.
+    """
+    def __init__(self, compact_map:CompactMap, door_id:int, source_id:int) -> None:
+        # Door.__init__ is not called, the proxy has no state of its own apart from these.
+        self.map: CompactMap = compact_map
+        self.id: int = door_id
+        self._source_id: int = source_id
+        self._queue: Optional[EventQueue] = None
+        self.campaign = None
+
+    @property
+    def queue(self) -> Optional[EventQueue]:
+        """The door's queue if it is in a deferred campaign, otherwise the map's queue."""
+        return self._queue if self._queue is not None else self.map.queue
+
+    @queue.setter
+    def queue(self, queue:Optional[EventQueue]) -> None:
+        self._queue = queue
+
+    @property
+    def name(self) -> str:
+        return "door"
+
+    @property
+    def events(self) -> EventRegistry:
+        """The door's registry, or an empty one if the door has no handlers (registries are created by .on)."""
+        registry = self.map.events("door", self.id, create=False)
+        return _NO_EVENTS if registry is None else registry
+
+    def on(self, event_type:str, event, weak:bool=False) -> None:
+        self.map.events("door", self.id)
+        super().on(event_type, event, weak)
+        self.map._handlers_changed("door", self.id)
+
+    def off(self, event_type:str, event) -> None:
+        super().off(event_type, event)
+        self.map._handlers_changed("door", self.id)
+
+    @property
+    def source(self) -> Optional[Room]:
+        if self.id in self.map._removed:
+            return None
+        return self.map.room(self._source_id)
+
+    @property
+    def room(self) -> Room:
+        return self.map.room(int(self.map.targets[self.id]))
+
+    @room.setter
+    def room(self, room:Room) -> None:
+        m = self.map
+        if not _is_in_map(room, m):
+            raise Exception("Doors stored in a CompactMap can only lead to rooms of the same map.")
+        old = self.room
+        m.targets[self.id] = room.id
+        m._in_offsets = None
+        m._in_doors = None
+        if self.id not in m._removed:
+            old._remove_incoming(self)
+            room._add_incoming(self)
+            self.source.emit("door_retargeted", self)
+
+    def emit(self, event_type:str, event_data=None) -> None:
+        # Avoid creating a registry for doors without handlers.
+        if self.map.events("door", self.id, create=False) is not None:
+            super().emit(event_type, event_data)
+
+    def __repr__(self) -> str:
+        return f"CompactDoor({self.id}: {self._source_id} -> {int(self.map.targets[self.id])})"
@@ -0,0 +1,147 @@
+import gc
+import unittest
+
+import numpy as np
+
+from campaign import Campaign, Room, Walker
+from compactmap import Bitmap, CompactDoor, CompactMap, wander
+from pathfinding import Pathfinder
+
+class TestCompactMap(unittest.TestCase):
+
+    def make_line(self, size):
+        """
+        Creates a map with the rooms connected in a line, with doors both ways.
+        """
+        sources = np.concatenate([np.arange(size - 1), np.arange(1, size)])
+        targets = np.concatenate([np.arange(1, size), np.arange(size - 1)])
+        return CompactMap.from_edges(size, sources, targets)
+
+    def test_bitmap(self):
+        bitmap = Bitmap(20)
+        bitmap[3] = True
+        bitmap[17] = True
+        self.assertTrue(bitmap[3])
+        self.assertFalse(bitmap[4])
+        bitmap.set_many([0, 3, 19])
+        self.assertEqual(list(bitmap.nonzero()), [0, 3, 17, 19])
+        bitmap[3] = False
+        self.assertEqual(bitmap.count(), 3)
+        self.assertEqual(bitmap.bits.nbytes, 3)
+        self.assertEqual(list(bitmap.get_many([0, 3, 17, 18])), [True, False, True, False])
+
+    def test_compactmap_from_edges(self):
+        m = CompactMap.from_edges(3, [2, 0, 1, 0], [0, 1, 2, 2])
+        self.assertEqual(list(m.offsets), [0, 2, 3, 4])
+        self.assertEqual(list(m.neighbours(0)), [1, 2])
+        self.assertEqual(list(m.incoming_ids(2)), [1, 2])
+        self.assertEqual(m.room(1).name, "Room 1")
+        with self.assertRaises(IndexError):
+            m.room(3)
+
+    def test_compactmap_proxies(self):
+        m = self.make_line(4)
+        room = m.room(1)
+        self.assertIsInstance(room, Room)
+        self.assertIs(m.room(1), room, "The same proxy should be returned while it is referenced.")
+        doors = room.doors
+        self.assertTrue(all(isinstance(d, CompactDoor) for d in doors))
+        self.assertEqual([d.room.id for d in doors], [2, 0])
+        self.assertTrue(all(d.source is room for d in doors))
+        self.assertEqual(sorted(d.source.id for d in room.incoming), [0, 2])
+
+        calls = []
+        room.on("enter", lambda r, w: calls.append(r.id))
+        del room, doors
+        gc.collect()
+        self.assertEqual(len(m._rooms), 0, "Proxies should not be kept alive by the map.")
+        m.room(1).enter(None)
+        self.assertEqual(calls, [1], "Handlers should be kept by the map when the proxy is dropped.")
+
+    def test_compactmap_walker(self):
+        m = self.make_line(5)
+        walker = Walker("Jay", m.room(0))
+        campaign = Campaign([walker])
+        for _ in range(4):
+            campaign.tick()
+        self.assertEqual(walker.room.id, 4)
+        self.assertEqual(m.visited.count(), 5)
+        self.assertEqual(list(m.occupied.nonzero()), [4])
+        self.assertEqual(len(m._walkers), 1, "Empty rooms should not keep a walker list.")
+        self.assertEqual([len(room.walkers) for room in m.rooms()], [0, 0, 0, 0, 1])
+        self.assertEqual(len(m._walkers), 1, "Reading the walkers of empty rooms should not create walker lists.")
+
+    def test_compactmap_connect_disconnect(self):
+        m = self.make_line(4)
+        pathfinder = Pathfinder()
+        self.assertEqual(pathfinder.distance(m.room(0), m.room(3)), 3)
+
+        extra = Room("Extra")
+        door, _ = m.room(0).connect_to(extra)
+        extra.connect_to(m.room(3))
+        self.assertIn(door, m.room(0).doors)
+        self.assertEqual(pathfinder.distance(m.room(0), m.room(3)), 2, "Doors added at runtime should invalidate cached routes.")
+
+        m.room(2).disconnect_from(m.room(3))
+        self.assertEqual([d.room.id for d in m.room(2).doors], [1])
+        self.assertEqual(pathfinder.distance(m.room(2), m.room(3)), 4, "The only route left goes back through the extra room.")
+
+        m.room(0).disconnect_from(extra)
+        self.assertIsNone(pathfinder.distance(m.room(0), m.room(3)))
+
+    def test_compactmap_doors_cached(self):
+        m = self.make_line(4)
+        room = m.room(1)
+        doors = room.doors
+        self.assertIs(room.doors, doors, "The door proxies should be built once.")
+        extra = Room("Extra")
+        door, _ = room.connect_to(extra)
+        self.assertEqual([d.room for d in room.doors], [m.room(2), m.room(0), extra])
+        room.remove_door(doors[0])
+        self.assertEqual([d.room for d in room.doors], [m.room(0), extra])
+        room.disconnect_from(extra)
+        self.assertEqual([d.room for d in room.doors], [m.room(0)])
+
+    def test_compactmap_door_room(self):
+        m = self.make_line(3)
+        door = m.room(0).doors[0]
+        door.room = m.room(2)
+        self.assertEqual(list(m.neighbours(0)), [2])
+        self.assertIn(door, m.room(2).incoming)
+        self.assertNotIn(door, m.room(1).incoming)
+        with self.assertRaises(Exception):
+            door.room = Room("Elsewhere")
+
+    def test_wander_deterministic(self):
+        m = self.make_line(100)
+        rooms = np.arange(0, 100, 3)
+        walkers = np.arange(len(rooms))
+        first = wander(m.offsets, m.targets, rooms, walkers, 5, 1)
+        self.assertTrue(np.array_equal(first, wander(m.offsets, m.targets, rooms, walkers, 5, 1)))
+        # Moving the walkers in a different order or batch should not change their moves.
+        half = wander(m.offsets, m.targets, rooms[::2], walkers[::2], 5, 1)
+        self.assertTrue(np.array_equal(first[::2], half))
+        self.assertTrue(all(target in m.neighbours(room) for room, target in zip(rooms, first)))
+
+    def test_compactmap_listeners(self):
+        m = self.make_line(10)
+        handler = lambda *_: None
+        m.room(2).on("enter", handler)
+        enter = m.listeners("room", "enter")
+        self.assertEqual(list(enter.nonzero()), [2])
+        m.room(5).on("enter", handler)
+        m.door(3).on("enter", handler)
+        self.assertEqual(list(enter.nonzero()), [2, 5], "Listener bitmaps should follow handlers added later.")
+        self.assertEqual(list(m.listeners("door", "enter").nonzero()), [3])
+        self.assertEqual(m.listeners("room", "leave").count(), 0)
+        m.room(2).off("enter", handler)
+        self.assertEqual(list(enter.nonzero()), [5])
+
+    def test_compactmap_memory(self):
+        size = 100000
+        m = self.make_line(size)
+        self.assertLess(m.nbytes / size, 24, "A room with two doors should take a few bytes.")
+
+
+if __name__ == "__main__":
+    unittest.main()
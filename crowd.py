@@ -0,0 +1,123 @@
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+
+from campaign import CampaignAsset
+from compactmap import CompactMap, wander
+
+# Empty type declarations so that the names can be used in type hints
+class Crowd: pass
+
+class Crowd(CampaignAsset):
+    """
+    Many walkers on a CompactMap, moved together in one vectorized step per tick instead of one Walker object each.
+
+    The walkers are identified by their index, and their rooms, speeds and tick counters are kept in arrays. Like a
+    Walker, each walker moves every speed ticks, here through a door picked by wander (so runs with the same seed are
+    reproducible). The "enter" and "leave" events are emitted on the map's rooms, with the walker id as event data,
+    only for the rooms that have handlers for them (see CompactMap.listeners): for each moving walker in order of id,
+    "enter" on the new room then "leave" on the old one, as a Walker would.
+
+    Visited rooms are marked in the map's visited bitmap. Crowd walkers are not counted in the map's occupied bitmap,
+    see .occupancy instead.
+
+    A crowd can be added to a Campaign as a single asset, and sleeps until its next walker is due to move
+    (see CampaignAsset.idle_ticks). Call .wake after changing speeds or ticks_passed directly.
+    """
+    def __init__(self, compact_map:CompactMap, rooms:Sequence[int]=(), speeds:int | Sequence[int]=1, seed:int=0, name:str="Crowd") -> None:
+        super().__init__(name)
+        self.map: CompactMap = compact_map
+        self.seed: int = seed
+        self.current_tick: int = 0
+        """Number of ticks that the crowd has been ticked (or skipped) for, used with the seed to pick the doors."""
+        self.rooms: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.speeds: np.ndarray = np.zeros(0, dtype=np.int64)
+        """Number of ticks between movements, by walker."""
+        self.ticks_passed: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.add(rooms, speeds)
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def add(self, rooms:Sequence[int], speeds:int | Sequence[int]=1) -> np.ndarray:
+        """
+        Adds walkers in the given rooms, which enter them straight away. Returns the ids of the new walkers.
+        """
+        rooms = np.asarray(rooms, dtype=np.int64).reshape(-1)
+        speeds = np.broadcast_to(np.asarray(speeds, dtype=np.int64), rooms.shape)
+        if len(rooms) and (rooms.min() < 0 or len(self.map) <= rooms.max()):
+            raise IndexError("Crowd room id out of range")
+
+        first = len(self.rooms)
+        self.rooms = np.concatenate([self.rooms, rooms])
+        self.speeds = np.concatenate([self.speeds, speeds])
+        self.ticks_passed = np.concatenate([self.ticks_passed, np.zeros(len(rooms), dtype=np.int64)])
+        ids = np.arange(first, len(self.rooms))
+
+        self.map.visited.set_many(rooms)
+        for i in np.flatnonzero(self.map.listeners("room", "enter").get_many(rooms)):
+            self._emit_room(int(rooms[i]), "enter", int(ids[i]))
+        self.wake()
+        return ids
+
+    def occupancy(self) -> np.ndarray:
+        """
+        Returns the number of crowd walkers in each room of the map.
+        """
+        return np.bincount(self.rooms, minlength=len(self.map))
+
+    def _emit_room(self, room_id:int, event_type:str, walker_id:int) -> None:
+        room = self.map.room(room_id)
+        if self.queue is not None:
+            self.queue.push(room, event_type, walker_id)
+        else:
+            room.emit(event_type, walker_id)
+
+    def tick(self) -> None:
+        """
+        Emits the "tick" event, then moves every walker that is due to move.
+        """
+        super().tick()
+        self.current_tick += 1
+
+        self.ticks_passed += 1
+        due = np.flatnonzero(self.speeds <= self.ticks_passed)
+        if not len(due):
+            return
+        self.ticks_passed[due] = 0
+
+        old_rooms = self.rooms[due]
+        new_rooms = wander(self.map.offsets, self.map.targets, old_rooms, due, self.current_tick, self.seed)
+        moved = new_rooms != old_rooms
+        due = due[moved]
+        old_rooms = old_rooms[moved]
+        new_rooms = new_rooms[moved]
+        self.rooms[due] = new_rooms
+        self.map.visited.set_many(new_rooms)
+
+        enter = self.map.listeners("room", "enter").get_many(new_rooms)
+        leave = self.map.listeners("room", "leave").get_many(old_rooms)
+        for i in np.flatnonzero(enter | leave):
+            walker_id = int(due[i])
+            if enter[i]:
+                self._emit_room(int(new_rooms[i]), "enter", walker_id)
+            if leave[i]:
+                self._emit_room(int(old_rooms[i]), "leave", walker_id)
+
+    def idle_ticks(self) -> Optional[int]:
+        """
+        The crowd sleeps until the tick where its next walker moves, or is idle if it has no walkers.
+        """
+        if self.events.get("tick"):
+            return 0
+        if not len(self.rooms):
+            return None
+        return max(0, int((self.speeds - self.ticks_passed).min()) - 1)
+
+    def skip(self, ticks:int) -> None:
+        self.current_tick += ticks
+        self.ticks_passed += ticks
+
+    def __repr__(self) -> str:
+        return f"Crowd('{self.name}', {len(self)} walkers)"
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from campaign import Campaign, Walker
+from compactmap import wander
+from crowd import Crowd
+from mapgen import generate_map
+
+class TestCrowd(unittest.TestCase):
+
+    def make_map(self, log):
+        m = generate_map(500, "cave", seed=8)
+        for room_id in range(0, len(m), 3):
+            m.room(room_id).on("enter", lambda room, w: log.append(("enter", room.id, w if isinstance(w, int) else int(w.name))))
+        for room_id in range(0, len(m), 5):
+            m.room(room_id).on("leave", lambda room, w: log.append(("leave", room.id, w if isinstance(w, int) else int(w.name))))
+        return m
+
+    def test_crowd_matches_walkers(self):
+        starts = np.random.default_rng(1).integers(0, 500, 40)
+        speeds = np.arange(40) % 4 + 1
+
+        crowd_log = []
+        crowd_map = self.make_map(crowd_log)
+        campaign = Campaign()
+        crowd = Crowd(crowd_map, starts, speeds, seed=6)
+        campaign.add_asset(crowd)
+        for _ in range(30):
+            campaign.tick()
+
+        walker_log = []
+        walker_map = self.make_map(walker_log)
+        campaign = Campaign()
+        for i, (room_id, speed) in enumerate(zip(starts, speeds)):
+            def select(doors, i=i):
+                # The door that wander picks for this walker.
+                target = wander(walker_map.offsets, walker_map.targets, np.array([doors[0].source.id]), np.array([i]), campaign.current_tick, 6)[0]
+                return next(door for door in doors if door.room.id == target)
+            walker = Walker(str(i), walker_map.room(int(room_id)), door_select=select)
+            walker.speed = int(speed)
+            campaign.add_asset(walker)
+        for _ in range(30):
+            campaign.tick()
+
+        self.assertLess(0, len(crowd_log))
+        self.assertEqual(crowd_log, walker_log, "Crowd walkers should move and emit events like Walkers.")
+        self.assertEqual(list(crowd.rooms), [walker.room.id for walker in campaign.assets.of_type(Walker)])
+        self.assertTrue(np.array_equal(crowd_map.visited.to_array(), walker_map.visited.to_array()))
+
+    def test_crowd_sleeps(self):
+        m = generate_map(100, "grid")
+        campaign = Campaign()
+        crowd = Crowd(m, [0, 50], [10, 15])
+        campaign.add_asset(crowd)
+        self.assertEqual(crowd.idle_ticks(), 9)
+        campaign.run_until(lambda: False, 30)
+        self.assertEqual(crowd.current_tick, 30)
+        self.assertEqual(list(crowd.ticks_passed), [0, 0])
+        self.assertTrue(all(room not in (0, 50) for room in crowd.rooms))
+        self.assertEqual(crowd.occupancy().sum(), 2)
+
+    def test_crowd_handlers_added_later(self):
+        m = generate_map(100, "grid")
+        crowd = Crowd(m, [0] * 10)
+        entered = []
+        handler = lambda room, walker: entered.append(walker)
+        for room_id in m.neighbours(0):
+            m.room(int(room_id)).on("enter", handler)
+        crowd.tick()
+        self.assertEqual(entered, list(range(10)), "Handlers added after the crowd was created should be called.")
+
+        for room_id in m.neighbours(0):
+            m.room(int(room_id)).off("enter", handler)
+        crowd.add([0] * 10)
+        crowd.tick()
+        self.assertEqual(entered, list(range(10)))
+        self.assertEqual(m.listeners("room", "enter").count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
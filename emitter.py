@@ -1,27 +1,254 @@
-from typing import Any, Callable
+import inspect
+import weakref
+from typing import Any, Callable, Optional
 
 class Emitter: pass
+class WeakHandler: pass
+class HandlerList: pass
+class EventRegistry: pass
+
+def _identity(handler:Callable) -> Callable:
+    return handler
+
+def weak_ref(target:Callable, callback:Optional[Callable[[weakref.ref], None]]=None) -> weakref.ref:
+    """
+    Returns a weak reference to the callable, using a WeakMethod for bound methods so that they are kept alive by their object.
+
+    While the target is alive, weak references to it compare equal to each other, which is what lets weak handlers be found
+    with the callable they were registered with.
+    """
+    if inspect.ismethod(target):
+        return weakref.WeakMethod(target, callback)
+    return weakref.ref(target, callback)
+
+class WeakHandler:
+    """
+    Calls an Emitter handler through a weak reference, doing nothing once the handler has been garbage collected.
+    """
+    __slots__ = ("ref",)
+
+    def __init__(self, ref:weakref.ref) -> None:
+        self.ref = ref
+
+    def __call__(self, sender:Any, data:Any=None) -> bool:
+        handler = self.ref()
+        if handler is None:
+            # The HandlerList removes the handler when the reference dies.
+            return True
+        return handler(sender, data)
+
+    def __repr__(self) -> str:
+        return f"WeakHandler({self.ref()})"
+
+def _weak_handler(handler:Callable, ref:weakref.ref) -> WeakHandler:
+    return WeakHandler(ref)
+
+class HandlerList:
+    """
+    The handlers registered for a single event, ordered by priority (highest first) and then by registration order.
+
+    Handlers are indexed by a key, which is the handler itself unless another key function is given (e.g. the callable
+    wrapped by a handler object). Adding and removing a handler takes constant time, and a key can only be registered once.
+    Emitting iterates over a tuple snapshot of the handlers that is only rebuilt after the handlers have changed,
+    so dispatching to an unchanged set of handlers does not build any lists.
+
+    Weak handlers are keyed by a weak reference to their key, and the weaken function is used to turn the handler into
+    one that does not hold the key strongly. They are removed as soon as the key is garbage collected.
+    """
+    __slots__ = ("_handlers", "_priorities", "_snapshot", "_key", "_weaken", "_weak")
+
+    def __init__(self, key:Callable[[Any], Any]=_identity, weaken:Callable[[Any, weakref.ref], Any]=_weak_handler) -> None:
+        # Maps each key to its handler.
+        self._handlers: dict[Any, Callable] = {}
+        # Maps keys to their priority, for handlers with a priority other than 0.
+        self._priorities: dict[Any, int] = {}
+        # (key, handler) pairs in dispatch order, or None if it needs to be rebuilt.
+        self._snapshot: Optional[tuple] = ()
+        self._key = key
+        self._weaken = weaken
+        # Number of weak handlers, weak references only need to be tried when looking up keys if there are any.
+        self._weak: int = 0
+
+    def add(self, handler:Callable, priority:int=0, weak:bool=False) -> bool:
+        """
+        Adds the handler, returning False (and only updating the priority) if a handler with the same key is already registered.
+
+        If weak is True, the handler is only kept for as long as its key is alive.
+        """
+        key = self._key(handler)
+        existing = self._find(key)
+        added = existing is None
+        if added:
+            if weak:
+                key = weak_ref(key, self._collected)
+                handler = self._weaken(handler, key)
+                self._weak += 1
+            self._handlers[key] = handler
+        elif self._priorities.get(existing, 0) == priority:
+            return False
+        else:
+            key = existing
+
+        if priority:
+            self._priorities[key] = priority
+        else:
+            self._priorities.pop(key, None)
+        self._snapshot = None
+        return added
+
+    def _find(self, key:Any) -> Any:
+        """
+        Returns the key that the handler for the given key is stored with (which is a weak reference for weak handlers), or None.
+        """
+        if key in self._handlers:
+            return key
+        if self._weak:
+            try:
+                ref = weak_ref(key)
+            except TypeError:
+                return None
+            if ref in self._handlers:
+                return ref
+        return None
+
+    def _collected(self, ref:weakref.ref) -> None:
+        self.remove(ref)
+
+    def remove(self, key:Any) -> bool:
+        """
+        Removes the handler registered with the given key, returning True if there was one.
+        """
+        key = self._find(key)
+        if key is None:
+            return False
+        del self._handlers[key]
+        if isinstance(key, weakref.ref):
+            self._weak -= 1
+        self._priorities.pop(key, None)
+        self._snapshot = None
+        return True
+
+    def get(self, key:Any) -> Optional[Callable]:
+        """
+        Returns the handler registered with the given key, or None.
+        """
+        key = self._find(key)
+        if key is None:
+            return None
+        return self._handlers[key]
+
+    def priority(self, key:Any) -> Optional[int]:
+        """
+        Returns the priority of the handler registered with the given key, or None if there is none.
+        """
+        key = self._find(key)
+        if key is None:
+            return None
+        return self._priorities.get(key, 0)
+
+    def snapshot(self) -> tuple:
+        """
+        Returns the (key, handler) pairs in dispatch order.
+        """
+        if self._snapshot is None:
+            items = self._handlers.items()
+            if self._priorities:
+                # sorted is stable, so handlers with equal priority stay in registration order.
+                priorities = self._priorities
+                self._snapshot = tuple(sorted(items, key=lambda item: -priorities.get(item[0], 0)))
+            else:
+                self._snapshot = tuple(items)
+        return self._snapshot
+
+    def emit(self, sender:Any, data:Any=None, prune:bool=True) -> None:
+        """
+        Calls each handler with (sender, data). If prune is True, handlers that return a falsy value are removed.
+
+        Handlers added while emitting are not called until the next emit, handlers removed while emitting are not called.
+        """
+        snapshot = self.snapshot()
+        handlers = self._handlers
+        for key, handler in snapshot:
+            # The handlers only need to be checked if they changed during this emit.
+            if self._snapshot is not snapshot and handlers.get(key) is not handler:
+                continue
+            if not handler(sender, data) and prune:
+                self.remove(key)
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def __iter__(self):
+        return (handler for _, handler in self.snapshot())
+
+    def __contains__(self, item:Any) -> bool:
+        """
+        Check if the item is a registered key or handler.
+        """
+        if self._find(item) is not None:
+            return True
+        return self.get(self._key(item)) is item
+
+    def __repr__(self) -> str:
+        return f"HandlerList({list(self)})"
+
+class EventRegistry(dict):
+    """
+    Maps event names to their HandlerList, creating lists as handlers are added. Shared by Emitter and campaign.CampaignAsset.
+    """
+    def __init__(self, key:Callable[[Any], Any]=_identity, weaken:Callable[[Any, weakref.ref], Any]=_weak_handler) -> None:
+        super().__init__()
+        self.key = key
+        """Key function used for the registry's handler lists."""
+        self.weaken = weaken
+        """Function used by the registry's handler lists to make weak handlers."""
+
+    def declare(self, event_name:str) -> HandlerList:
+        """
+        Returns the HandlerList for the event, creating an empty one if needed.
+        """
+        handlers = self.get(event_name)
+        if handlers is None:
+            handlers = self[event_name] = HandlerList(self.key, self.weaken)
+        return handlers
+
+    def add(self, event_name:str, handler:Callable, priority:int=0, weak:bool=False) -> bool:
+        return self.declare(event_name).add(handler, priority, weak)
+
+    def remove(self, event_name:str, key:Any) -> bool:
+        handlers = self.get(event_name)
+        if handlers is None:
+            return False
+        return handlers.remove(key)
+
+    def counts(self) -> dict[str, int]:
+        """
+        Returns the number of handlers registered for each event that has any.
+        """
+        return {event_name: len(handlers) for event_name, handlers in self.items() if handlers}
 
 class Emitter:
 
     def __init__(self) -> None:
-        self.events = {}
-    
-    def on(self, event_name:str, handler: Callable[[Emitter, Any], bool] ) -> None:
-        if event_name not in self.events:
-            self.events[event_name] = []
-        
-        self.events[event_name].append(handler)
-        
+        self.events: EventRegistry = EventRegistry()
+
+    def on(self, event_name:str, handler: Callable[[Emitter, Any], bool], priority:int=0, weak:bool=False) -> None:
+        """
+        Registers the handler for the event. Handlers with a higher priority are called first.
+
+        The handler stays registered for as long as it returns a truthy value. If weak is True, the emitter only holds
+        a weak reference to the handler (a WeakMethod for bound methods), and the handler is removed once it is garbage collected.
+        """
+        self.events.add(event_name, handler, priority, weak)
+
     def off(self, event_name, handler: Callable[[Emitter, Any], bool]):
-        if event_name not in self.events:
-            return
-        
-        self.events[event_name].remove(handler)
+        self.events.remove(event_name, handler)
 
 
     def emit(self, event_name:str, data:Any=None) -> None:
-        if event_name not in self.events:
+        handlers = self.events.get(event_name)
+        # Return straight away for events without listeners.
+        if not handlers:
             return
-        
-        self.events[event_name] = list(filter(lambda h: h(self, data), self.events[event_name]))
\ No newline at end of file
+
+        handlers.emit(self, data)
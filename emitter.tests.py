@@ -1,3 +1,4 @@
+import gc
 import unittest
 from uuid import uuid4
 from emitter import Emitter
@@ -43,6 +44,102 @@ class EmitterTests(unittest.TestCase):
         self.assertEqual(flags["keep"], data)
         self.assertEqual(flags["discard"], data)
 
+    def test_emitter_emit_no_listeners(self):
+        e = Emitter()
+        e.emit("test")
+        e.on("test", lambda *_: False)
+        e.emit("test")
+        self.assertEqual(len(e.events["test"]), 0)
+        e.emit("test")
+
+    def test_emitter_priority(self):
+        e = Emitter()
+        calls = []
+
+        e.on("test", lambda *_: calls.append("low") or True, priority=-1)
+        e.on("test", lambda *_: calls.append("default 1") or True)
+        e.on("test", lambda *_: calls.append("high") or True, priority=5)
+        e.on("test", lambda *_: calls.append("default 2") or True)
+
+        e.emit("test")
+        self.assertEqual(calls, ["high", "default 1", "default 2", "low"])
+
+    def test_emitter_duplicate(self):
+        e = Emitter()
+        calls = []
+        f = lambda *_: calls.append(1) or True
+        e.on("test", f)
+        e.on("test", f)
+        self.assertEqual(len(e.events["test"]), 1)
+        e.emit("test")
+        self.assertEqual(len(calls), 1)
+
+    def test_emitter_modify_during_emit(self):
+        e = Emitter()
+        calls = []
+
+        def late(*_):
+            calls.append("late")
+            return True
+
+        def removed(*_):
+            calls.append("removed")
+            return True
+
+        def first(*_):
+            calls.append("first")
+            e.on("test", late)
+            e.off("test", removed)
+            return True
+
+        e.on("test", first)
+        e.on("test", removed)
+        e.emit("test")
+        self.assertEqual(calls, ["first"], "Handlers added during an emit should wait for the next one, removed handlers should not be called.")
+        e.emit("test")
+        self.assertEqual(calls, ["first", "first", "late"])
+
+    def test_emitter_emit_steady_state(self):
+        e = Emitter()
+        e.on("test", lambda *_: True)
+        handlers = e.events["test"]
+        snapshot = handlers.snapshot()
+        e.emit("test")
+        e.emit("test")
+        self.assertIs(handlers.snapshot(), snapshot, "Emitting to unchanged handlers should not rebuild the handler list.")
+
+    def test_emitter_weak(self):
+        e = Emitter()
+        calls = []
+
+        class Observer:
+            def notify(self, sender, data):
+                calls.append(data)
+                return True
+
+        def handler(sender, data):
+            calls.append(-data)
+            return True
+
+        observer = Observer()
+        e.on("test", observer.notify, weak=True)
+        e.on("test", handler, weak=True)
+        self.assertIn(observer.notify, e.events["test"])
+        e.on("test", observer.notify)
+        self.assertEqual(len(e.events["test"]), 2, "Adding a weak handler again should not register it twice.")
+        e.emit("test", 1)
+        self.assertEqual(calls, [1, -1])
+
+        del observer
+        gc.collect()
+        self.assertEqual(len(e.events["test"]), 1, "Weak handlers should be removed when their object is collected.")
+        e.emit("test", 2)
+        self.assertEqual(calls, [1, -1, -2])
+
+        e.off("test", handler)
+        self.assertEqual(len(e.events["test"]), 0)
+        self.assertEqual(e.events.counts(), {})
+
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
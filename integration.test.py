@@ -33,8 +33,7 @@ class IntegrationTest(unittest.TestCase):
         
         cave.on("enter", do_battle)
 
-        while not flags["ended"]:
-            campaign.tick()
+        self.assertTrue(campaign.run_until(lambda: flags["ended"], 100))
 
 
 
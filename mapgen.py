@@ -0,0 +1,115 @@
+import math
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from campaign import Campaign, CampaignAsset, Door, Walker
+from compactmap import CompactMap
+
+class MapgenException(Exception): pass
+
+TOPOLOGIES = ("grid", "tree", "cave", "hub")
+
+def _grid(size:int, rng:np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rooms laid out row by row in a square grid, connected to the rooms beside and below them.
+    """
+    width = max(1, math.isqrt(size - 1) + 1)
+    rooms = np.arange(size, dtype=np.int64)
+    right = rooms[(rooms % width != width - 1) & (rooms + 1 < size)]
+    down = rooms[rooms + width < size]
+    return np.concatenate([right, down]), np.concatenate([right + 1, down + width])
+
+def _tree(size:int, rng:np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Random recursive tree: every room after the first is connected to a random earlier room.
+    """
+    children = np.arange(1, size, dtype=np.int64)
+    parents = (rng.random(size - 1) * children).astype(np.int64)
+    return parents, children
+
+def _cave(size:int, rng:np.random.Generator, reach:int=8, loops:float=0.5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Winding passages: every room is connected to one of the few rooms before it, then about size * loops
+    extra connections are made between nearby rooms, which creates loops and dead ends.
+    """
+    children = np.arange(1, size, dtype=np.int64)
+    parents = children - 1 - (rng.random(size - 1) * np.minimum(children, reach)).astype(np.int64)
+    extra = int(size * loops)
+    a = rng.integers(0, size, extra)
+    b = a + rng.integers(2, 2 * reach, extra)
+    keep = b < size
+    return np.concatenate([parents, a[keep]]), np.concatenate([children, b[keep]])
+
+def _hub(size:int, rng:np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hub-and-spoke: about sqrt(size) hub rooms connected to the central room 0, and every other room connected to a random hub.
+    """
+    hubs = max(1, math.isqrt(size))
+    central = np.zeros(hubs - 1, dtype=np.int64)
+    spokes = np.arange(hubs, size, dtype=np.int64)
+    return np.concatenate([central, rng.integers(0, hubs, len(spokes))]), np.concatenate([np.arange(1, hubs), spokes])
+
+_GENERATORS = {
+    "grid": _grid,
+    "tree": _tree,
+    "cave": _cave,
+    "hub": _hub,
+}
+
+def generate_map(size:int, topology:str="grid", seed:int=0) -> CompactMap:
+    """
+    Generates a connected map with the given number of rooms, with a door each way for every connection.
+
+    The topology is one of TOPOLOGIES, and the same size, topology and seed always give the same map.
+    Maps are built directly as CompactMap arrays, so a million rooms take well under a second in most topologies.
+    """
+    generator = _GENERATORS.get(topology)
+    if generator is None:
+        raise MapgenException(f"Unknown map topology '{topology}', expected one of {', '.join(TOPOLOGIES)}.")
+    if size < 1:
+        raise MapgenException("A map needs at least one room.")
+
+    rng = np.random.default_rng(seed)
+    a, b = generator(size, rng)
+    return CompactMap.from_edges(size, np.concatenate([a, b]), np.concatenate([b, a]))
+
+def generate_campaign(
+    size:int,
+    topology:str="grid",
+    seed:int=0,
+    event_density:float=0.0,
+    on_enter:Optional[Callable[[CampaignAsset, Any], None]]=None,
+    walkers:int=0,
+    door_select:Optional[Callable[[], Callable[[list[Door]], Optional[Door]]]]=None,
+    deferred:bool=False,
+) -> Tuple[Campaign, CompactMap]:
+    """
+    Generates a map (see generate_map) and a campaign to run on it.
+
+    A fraction (event_density) of the rooms, chosen at random, get the on_enter handler for their "enter" event.
+    The given number of walkers are placed in random rooms and added to the campaign. door_select is called to create
+    each walker's door selector, by default walkers use Walker's default exploration.
+
+    Room proxies are only created for the rooms that get handlers or walkers. If deferred is True, the map's rooms and
+    doors queue their events in the campaign's queue (see CompactMap.queue). Returns the campaign and the map.
+    """
+    compact_map = generate_map(size, topology, seed)
+    # Separate streams, so that the map, the events and the walkers do not change each other.
+    event_rng = np.random.default_rng([seed, 1])
+    walker_rng = np.random.default_rng([seed, 2])
+
+    if 0 < event_density:
+        if on_enter is None:
+            raise MapgenException("An on_enter handler is needed to add enter events.")
+        count = min(size, int(round(size * event_density)))
+        for room_id in np.sort(event_rng.choice(size, count, replace=False)):
+            compact_map.room(int(room_id)).on("enter", on_enter)
+
+    campaign = Campaign(deferred=deferred)
+    # Room proxies are not added to the campaign, so their events go through the map's queue.
+    compact_map.queue = campaign.queue
+    for i, room_id in enumerate(walker_rng.integers(0, size, walkers)):
+        select = door_select() if door_select is not None else None
+        campaign.add_asset(Walker(f"Walker {i}", compact_map.room(int(room_id)), door_select=select))
+    return campaign, compact_map
@@ -0,0 +1,94 @@
+import unittest
+from collections import deque
+
+import numpy as np
+
+from mapgen import TOPOLOGIES, MapgenException, generate_campaign, generate_map
+
+class TestMapGen(unittest.TestCase):
+
+    def reachable(self, m):
+        """
+        Returns the number of rooms reachable from room 0.
+        """
+        seen = np.zeros(len(m), dtype=bool)
+        seen[0] = True
+        rooms = deque([0])
+        while rooms:
+            for target in m.neighbours(rooms.popleft()):
+                if not seen[target]:
+                    seen[target] = True
+                    rooms.append(int(target))
+        return int(seen.sum())
+
+    def test_generate_map_connected(self):
+        for topology in TOPOLOGIES:
+            m = generate_map(500, topology, seed=3)
+            self.assertEqual(len(m), 500)
+            self.assertEqual(self.reachable(m), 500, f"Every room of a '{topology}' map should be reachable.")
+
+    def test_generate_map_grid(self):
+        m = generate_map(9, "grid")
+        self.assertEqual(sorted(m.neighbours(4)), [1, 3, 5, 7])
+        self.assertEqual(m.door_count, 24)
+
+    def test_generate_map_seed(self):
+        for topology in TOPOLOGIES:
+            a = generate_map(1000, topology, seed=7)
+            b = generate_map(1000, topology, seed=7)
+            self.assertTrue(np.array_equal(a.offsets, b.offsets) and np.array_equal(a.targets, b.targets))
+        self.assertFalse(np.array_equal(generate_map(1000, "cave", seed=1).targets, generate_map(1000, "cave", seed=2).targets))
+
+    def test_generate_map_invalid(self):
+        with self.assertRaises(MapgenException):
+            generate_map(10, "spiral")
+        with self.assertRaises(MapgenException):
+            generate_map(0)
+        with self.assertRaises(MapgenException):
+            generate_campaign(10, event_density=0.5)
+
+    def test_generate_campaign(self):
+        entered = []
+        campaign, m = generate_campaign(
+            2000, "tree", seed=5, event_density=0.1, on_enter=lambda room, walker: entered.append(room.id), walkers=20
+        )
+        self.assertEqual(len(m._events), 200)
+        self.assertEqual(len(campaign.assets), 20)
+        starts = [w.room.id for w in campaign.assets]
+        self.assertTrue(all(m.occupied[room_id] for room_id in starts))
+
+        again, _ = generate_campaign(2000, "tree", seed=5, walkers=20)
+        self.assertEqual([w.room.id for w in again.assets], starts, "Walkers should be placed the same way for the same seed.")
+
+        for _ in range(50):
+            campaign.tick()
+        self.assertLess(0, len(entered))
+
+    def test_generate_campaign_deferred(self):
+        calls = []
+        walkers = []
+        # Whether the walker is already in the room, and where every walker is, when the handler is called.
+        on_enter = lambda room, walker: calls.append((walker.room is room, [w.room for w in walkers]))
+        campaign, m = generate_campaign(500, "cave", seed=2, event_density=0.5, on_enter=on_enter, walkers=10, deferred=True)
+        walkers.extend(campaign.assets)
+        # The walkers entered their starting rooms before the campaign ran, those events are dispatched by the first tick.
+        campaign.tick()
+        dispatched = 0
+        for _ in range(20):
+            calls.clear()
+            campaign.tick()
+            rooms = [w.room for w in walkers]
+            for in_room, rooms_seen in calls:
+                self.assertTrue(in_room, "Handlers should see the walker in the room it entered.")
+                self.assertEqual(rooms_seen, rooms, "Enter events should be dispatched after every walker has ticked.")
+            dispatched += len(calls)
+        self.assertLess(0, dispatched)
+
+    def test_generate_large(self):
+        m = generate_map(200000, "cave", seed=1)
+        self.assertEqual(len(m), 200000)
+        self.assertLess(m.nbytes / len(m), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import struct
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Optional
+
+import numpy as np
+
+from campaign import Campaign
+from compactmap import CompactMap, CompactRoom
+
+# Empty type declarations so that the names can be used in type hints
+class PagedMap: pass
+
+class PagedMapFormatException(Exception): pass
+
+MAGIC = b"ABPAGMAP"
+VERSION = 1
+
+# magic, version, number of rooms, number of doors
+HEADER = struct.Struct("<8sHqq")
+
+def save_map(path:str, compact_map:CompactMap) -> None:
+    """
+    Writes the door arrays of the map to a file that can be opened as a PagedMap.
+
+    Only the arrays are saved: room names, doors added or removed at runtime, handlers and visited rooms are not.
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(compact_map), compact_map.door_count))
+        compact_map.offsets.astype("<i8", copy=False).tofile(f)
+        compact_map.targets.astype("<i4", copy=False).tofile(f)
+
+class PagedMap(CompactMap):
+    """
+    CompactMap whose door arrays are memory-mapped from a file written by save_map, so that only the parts of the map
+    in use are read from disk.
+
+    Rooms are loaded into the campaign a chunk of chunk_size consecutive room ids at a time: the chunk of a room is
+    loaded when the room is asked for with .room (which the map's doors use to find their rooms), and when a walker
+    enters a room, its chunk and the chunks of the rooms next to it are loaded. At most max_chunks chunks are kept
+    loaded, the least recently used chunks without walkers are unloaded (removed from the campaign, without
+    disconnecting their doors) when more are needed. Chunks with walkers are never unloaded, so max_chunks can be exceeded.
+
+    As with any CompactMap, room state (visited rooms, handlers, doors added or removed at runtime) is stored by the
+    map and outlives the room proxies, so unloading a chunk loses nothing, and Room.connect_to and Door.room work
+    the same whether or not the rooms involved are loaded.
+
+    The arrays are mapped copy-on-write: retargeting doors changes the map in memory but not the file.
+    """
+    def __init__(self, path:str, campaign:Optional[Campaign]=None, chunk_size:int=1024, max_chunks:int=64) -> None:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise PagedMapFormatException(f"'{path}' is not a paged map.")
+        magic, version, rooms, doors = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise PagedMapFormatException(f"'{path}' is not a version {VERSION} paged map.")
+
+        offsets = np.memmap(path, dtype="<i8", mode="c", offset=HEADER.size, shape=(rooms + 1,))
+        if 0 < doors:
+            targets = np.memmap(path, dtype="<i4", mode="c", offset=HEADER.size + offsets.nbytes, shape=(doors,))
+        else:
+            targets = np.zeros(0, dtype=np.int32)
+        super().__init__(offsets, targets)
+
+        self.path: str = path
+        self.campaign: Optional[Campaign] = campaign
+        """Campaign that loaded rooms are added to, if any."""
+        self.chunk_size: int = max(1, chunk_size)
+        self.max_chunks: int = max(1, max_chunks)
+        # Room proxies of the loaded chunks, least recently used first. Holding the proxies keeps them cached by the map.
+        self._chunks: OrderedDict[int, list[CompactRoom]] = OrderedDict()
+        # Number of walkers in each chunk that has any.
+        self._chunk_walkers: dict[int, int] = {}
+
+    @property
+    def loaded_chunks(self) -> list[int]:
+        """The loaded chunks, least recently used first."""
+        return list(self._chunks)
+
+    def chunk_of(self, room_id:int) -> int:
+        return room_id // self.chunk_size
+
+    def room(self, room_id:int) -> CompactRoom:
+        """
+        Returns the proxy for the room, loading its chunk if needed.
+        """
+        if not 0 <= room_id < len(self):
+            raise IndexError("PagedMap room id out of range")
+        self.load(self.chunk_of(room_id))
+        return super().room(room_id)
+
+    def load(self, chunk:int, evict:bool=True) -> None:
+        """
+        Loads the chunk (or marks it as the most recently used, if it is loaded), then unloads chunks over max_chunks if evict is True.
+        """
+        if chunk in self._chunks:
+            self._chunks.move_to_end(chunk)
+            return
+
+        start = chunk * self.chunk_size
+        end = min(len(self), start + self.chunk_size)
+        rooms = self._chunks[chunk] = [CompactMap.room(self, i) for i in range(start, end)]
+        if self.campaign is not None:
+            for room in rooms:
+                self.campaign.add_asset(room)
+        if evict:
+            self.evict([chunk])
+
+    def unload(self, chunk:int) -> None:
+        """
+        Removes the chunk's rooms from the campaign and drops the map's references to them.
+        """
+        rooms = self._chunks.pop(chunk, None)
+        if rooms is None or self.campaign is None:
+            return
+        for room in rooms:
+            self.campaign.remove_asset(room, disconnect=False)
+
+    def evict(self, keep:Iterable[int]=()) -> None:
+        """
+        Unloads the least recently used chunks without walkers (other than the chunks in keep) until at most max_chunks are loaded.
+        """
+        excess = len(self._chunks) - self.max_chunks
+        if excess <= 0:
+            return
+        keep = set(keep)
+        for chunk in list(self._chunks):
+            if chunk in keep or self._chunk_walkers.get(chunk):
+                continue
+            self.unload(chunk)
+            excess -= 1
+            if excess == 0:
+                return
+
+    def _entered(self, room_id:int) -> None:
+        super()._entered(room_id)
+        chunk = self.chunk_of(room_id)
+        self._chunk_walkers[chunk] = self._chunk_walkers.get(chunk, 0) + 1
+
+        # Load the chunks around the walker, so that the rooms it can move to next are in the campaign.
+        chunks = np.unique(self.neighbours(room_id) // self.chunk_size).tolist()
+        chunks.append(chunk)
+        for c in chunks:
+            self.load(c, evict=False)
+        self.evict(chunks)
+
+    def _left(self, room_id:int) -> None:
+        super()._left(room_id)
+        chunk = self.chunk_of(room_id)
+        count = self._chunk_walkers[chunk] - 1
+        if count:
+            self._chunk_walkers[chunk] = count
+        else:
+            del self._chunk_walkers[chunk]
+
+    def __repr__(self) -> str:
+        return f"PagedMap('{self.path}', {len(self)} rooms, {len(self._chunks)} chunks loaded)"
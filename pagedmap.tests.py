@@ -0,0 +1,96 @@
+import gc
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from campaign import Campaign, Walker
+from mapgen import generate_map
+from pagedmap import PagedMap, PagedMapFormatException, save_map
+
+class TestPagedMap(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "dungeon.map")
+
+    def tearDown(self):
+        gc.collect()
+        self.directory.cleanup()
+
+    def run_walkers(self, m, campaign, ticks=60):
+        for i, room_id in enumerate([0, 777, 1500]):
+            campaign.add_asset(Walker(f"Walker {i}", m.room(room_id)))
+        for _ in range(ticks):
+            campaign.tick()
+        return [walker.room.id for walker in campaign.assets.of_type(Walker)], list(m.visited.nonzero())
+
+    def test_pagedmap_matches_compactmap(self):
+        compact = generate_map(2000, "cave", seed=5)
+        save_map(self.path, compact)
+        campaign = Campaign()
+        paged = PagedMap(self.path, campaign, chunk_size=64, max_chunks=6)
+        self.assertTrue(np.array_equal(paged.targets, compact.targets))
+
+        expected = self.run_walkers(compact, Campaign())
+        self.assertEqual(self.run_walkers(paged, campaign), expected, "Walkers should move the same on a paged map.")
+
+        # Chunks with walkers stay loaded, the rest are limited to max_chunks.
+        walker_chunks = {paged.chunk_of(room_id) for room_id in expected[0]}
+        self.assertTrue(walker_chunks <= set(paged.loaded_chunks))
+        self.assertLessEqual(len(paged.loaded_chunks), 6 + len(walker_chunks))
+        self.assertEqual(len(list(campaign.rooms)), sum(len(paged._chunks[c]) for c in paged.loaded_chunks))
+
+    def test_pagedmap_eviction_keeps_state(self):
+        save_map(self.path, generate_map(1000, "grid"))
+        campaign = Campaign()
+        m = PagedMap(self.path, campaign, chunk_size=100, max_chunks=2)
+        entered = []
+        m.room(950).on("enter", lambda room, walker: entered.append(room.id))
+        near = m.room(5)
+        door, _ = near.connect_to(m.room(950), "portal")
+        m.room(950).visited = True
+
+        for room_id in [200, 300, 400, 500]:
+            m.room(room_id)
+        self.assertNotIn(9, m.loaded_chunks, "Chunks without walkers should be unloaded when more are needed.")
+        self.assertNotIn(near, campaign.rooms)
+        self.assertIsNone(near.campaign)
+        del near
+        gc.collect()
+
+        far = door.room
+        self.assertEqual(far.id, 950)
+        self.assertTrue(far.visited)
+        self.assertIn(door, far.incoming)
+
+        walker = Walker("Walker", m.room(5), door_select=lambda doors: doors[-1])
+        campaign.add_asset(walker)
+        campaign.tick()
+        self.assertIs(walker.room, far)
+        self.assertIn(9, m.loaded_chunks, "Entering a room should load its chunk.")
+        self.assertIn(far, campaign.rooms)
+        self.assertEqual(entered, [950], "Handlers should survive the room's chunk being unloaded.")
+
+    def test_pagedmap_registries_bounded(self):
+        save_map(self.path, generate_map(20000, "grid"))
+        campaign = Campaign()
+        m = PagedMap(self.path, campaign, chunk_size=100, max_chunks=4)
+        m.room(150).on("enter", lambda *_: None)
+        for room_id in range(0, 20000, 100):
+            room = m.room(room_id)
+            room.emit("enter")
+            room.handler_counts()
+        self.assertEqual(len(m.loaded_chunks), 4)
+        self.assertEqual(list(m._events), [("room", 150)], "Loading rooms without handlers should not create registries for them.")
+
+    def test_pagedmap_format(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a map")
+        with self.assertRaises(PagedMapFormatException):
+            PagedMap(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import heapq
+import weakref
+from collections import deque
+from collections.abc import Iterable
+from typing import Callable, Optional
+
+from campaign import Door, Room
+
+# Empty type declarations so that the names can be used in type hints
+class PathTree: pass
+class Pathfinder: pass
+
+class PathTree:
+    """
+    Shortest-path tree towards a single destination room, built by a breadth-first search backwards over Room.incoming.
+
+    Every room that can reach the destination is mapped to its distance (in doors) and to the door in that room
+    that leads one step closer to the destination.
+    """
+    __slots__ = ("destination", "distance", "next_door")
+
+    def __init__(self, destination:Room) -> None:
+        self.destination: Room = destination
+        self.distance: dict[Room, int] = {destination: 0}
+        self.next_door: dict[Room, Door] = {}
+
+        distance = self.distance
+        next_door = self.next_door
+        frontier = deque([destination])
+        while frontier:
+            room = frontier.popleft()
+            d = distance[room] + 1
+            for door in room.incoming:
+                source = door.source
+                if source is None or source in distance:
+                    continue
+                distance[source] = d
+                next_door[source] = door
+                frontier.append(source)
+
+    def __contains__(self, room:Room) -> bool:
+        return room in self.distance
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+    def path(self, start:Room) -> Optional[list[Door]]:
+        """
+        Returns the doors to pass through to get from start to the destination, or None if the destination can't be reached.
+        """
+        if start not in self.distance:
+            return None
+        doors = []
+        room = start
+        while room is not self.destination:
+            door = self.next_door[room]
+            doors.append(door)
+            room = door.room
+        return doors
+
+class Pathfinder:
+    """
+    Finds routes between rooms, caching a PathTree per destination so that any number of walkers heading for the same
+    room share a single search.
+
+    The pathfinder listens to the "incoming_added" and "incoming_removed" events of the rooms in its cached trees,
+    and only drops the trees that a change can actually affect: a new door only matters to trees that contain the room it
+    leads to and in which it makes a shorter route, a removed door only matters to trees that route through it.
+    """
+    def __init__(self) -> None:
+        self.trees: dict[Room, PathTree] = {}
+        """Cached shortest-path trees, by destination."""
+        # Rooms that the pathfinder is listening to.
+        self._watched: weakref.WeakSet[Room] = weakref.WeakSet()
+
+    def tree(self, destination:Room) -> PathTree:
+        """
+        Returns the shortest-path tree towards the destination, building it if it is not cached.
+        """
+        tree = self.trees.get(destination)
+        if tree is None:
+            tree = self.trees[destination] = PathTree(destination)
+            for room in tree.distance:
+                if room not in self._watched:
+                    self._watched.add(room)
+                    room.on("incoming_added", self._incoming_added, weak=True)
+                    room.on("incoming_removed", self._incoming_removed, weak=True)
+        return tree
+
+    def invalidate(self, destination:Optional[Room]=None) -> None:
+        """
+        Drops the cached tree for the destination, or every cached tree if no destination is given.
+        """
+        if destination is None:
+            self.trees.clear()
+        else:
+            self.trees.pop(destination, None)
+
+    def _incoming_added(self, room:Room, door:Door) -> None:
+        source = door.source
+        stale = []
+        for destination, tree in self.trees.items():
+            distance = tree.distance.get(room)
+            if distance is None:
+                continue
+            source_distance = tree.distance.get(source)
+            if source_distance is None or distance + 1 < source_distance:
+                stale.append(destination)
+        for destination in stale:
+            del self.trees[destination]
+
+    def _incoming_removed(self, room:Room, door:Door) -> None:
+        source = door.source
+        stale = [destination for destination, tree in self.trees.items() if tree.next_door.get(source) is door]
+        for destination in stale:
+            del self.trees[destination]
+
+    def distance(self, start:Room, destination:Room) -> Optional[int]:
+        """
+        Returns the number of doors between the rooms, or None if the destination can't be reached.
+        """
+        return self.tree(destination).distance.get(start)
+
+    def path(self, start:Room, destination:Room) -> Optional[list[Door]]:
+        """
+        Returns the shortest list of doors to pass through to get from start to destination, or None if there is no route.
+        """
+        return self.tree(destination).path(start)
+
+    def next_door(self, room:Room, destination:Room) -> Optional[Door]:
+        """
+        Returns the door in the room that leads one step closer to the destination, or None if there is none.
+        """
+        return self.tree(destination).next_door.get(room)
+
+    def selector(self, destination:Room | Callable[[], Room]) -> Callable[[Iterable[Door]], Optional[Door]]:
+        """
+        Returns a Walker.door_select function that walks to the destination, which can be a Room or a callable returning one.
+
+        The selector returns None once the walker has arrived or if the destination can't be reached. It finds the
+        walker's room through its walker attribute, which Walker sets, so each walker needs its own selector. Without
+        a walker it picks the door to the room closest to the destination.
+        """
+        def select(doors:list[Door]) -> Optional[Door]:
+            if not doors:
+                return None
+            target = destination() if callable(destination) else destination
+            tree = self.tree(target)
+            if select.walker is not None:
+                return tree.next_door.get(select.walker.room)
+            best = None
+            best_distance = None
+            for door in doors:
+                d = tree.distance.get(door.room)
+                if d is not None and (best_distance is None or d < best_distance):
+                    best, best_distance = door, d
+            return best
+
+        select.walker = None
+        return select
+
+def find_path(start:Room, goal:Room, heuristic:Optional[Callable[[Room, Room], float]]=None) -> Optional[list[Door]]:
+    """
+    Finds a shortest route from start to goal with an A* search, returning the doors to pass through or None if there is none.
+
+    The heuristic estimates the number of doors between a room and the goal, and must not overestimate it.
+    Without a heuristic, this is a breadth-first search. Use a Pathfinder instead when many searches share a destination.
+    """
+    if start is goal:
+        return []
+    if heuristic is None:
+        heuristic = lambda room, goal: 0
+
+    # The previous room and the door taken from it, for each room reached.
+    came_from: dict[Room, tuple[Room, Door]] = {}
+    cost: dict[Room, int] = {start: 0}
+    # Entries are (estimated total, order, room), the order keeps the search deterministic and avoids comparing rooms.
+    open_rooms = [(heuristic(start, goal), 0, start)]
+    order = 1
+    while open_rooms:
+        _, _, room = heapq.heappop(open_rooms)
+        if room is goal:
+            doors = []
+            while room is not start:
+                room, door = came_from[room]
+                doors.append(door)
+            doors.reverse()
+            return doors
+
+        d = cost[room] + 1
+        for door in room.doors:
+            neighbour = door.room
+            if neighbour is None or d >= cost.get(neighbour, d + 1):
+                continue
+            cost[neighbour] = d
+            came_from[neighbour] = (room, door)
+            heapq.heappush(open_rooms, (d + heuristic(neighbour, goal), order, neighbour))
+            order += 1
+    return None
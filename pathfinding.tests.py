@@ -0,0 +1,92 @@
+import unittest
+
+from campaign import Campaign, Door, Room, Walker
+from pathfinding import Pathfinder, PathTree, find_path
+
+class TestPathfinding(unittest.TestCase):
+
+    def make_line(self, length):
+        rooms = [Room(f"Room {i}") for i in range(length)]
+        for i in range(1, length):
+            rooms[i - 1].connect_to(rooms[i])
+        return rooms
+
+    def test_pathtree(self):
+        rooms = self.make_line(5)
+        tree = PathTree(rooms[4])
+        self.assertEqual([tree.distance[r] for r in rooms], [4, 3, 2, 1, 0])
+        self.assertEqual([d.room for d in tree.path(rooms[0])], rooms[1:])
+        self.assertEqual(tree.path(rooms[4]), [])
+        self.assertIsNone(tree.path(Room("Elsewhere")))
+
+    def test_pathfinder_cache(self):
+        rooms = self.make_line(5)
+        pathfinder = Pathfinder()
+        tree = pathfinder.tree(rooms[4])
+        self.assertEqual(pathfinder.distance(rooms[0], rooms[4]), 4)
+        self.assertIs(pathfinder.tree(rooms[4]), tree, "Trees should be cached per destination.")
+        self.assertIs(pathfinder.next_door(rooms[3], rooms[4]).room, rooms[4])
+
+    def test_pathfinder_invalidate_connect(self):
+        rooms = self.make_line(5)
+        pathfinder = Pathfinder()
+        to_end = pathfinder.tree(rooms[4])
+        to_start = pathfinder.tree(rooms[0])
+
+        # A one-way shortcut from the first to the last room only shortens routes to the last room.
+        rooms[0].add_door(Door(room=rooms[4]))
+        self.assertIs(pathfinder.tree(rooms[0]), to_start, "The shortcut does not make any route to the first room shorter.")
+        self.assertIsNot(pathfinder.tree(rooms[4]), to_end)
+        self.assertEqual(pathfinder.distance(rooms[0], rooms[4]), 1)
+
+        # A door that does not shorten anything should keep the trees.
+        to_end = pathfinder.tree(rooms[4])
+        rooms[2].add_door(Door(room=rooms[3]))
+        self.assertIs(pathfinder.tree(rooms[4]), to_end)
+
+    def test_pathfinder_invalidate_disconnect(self):
+        rooms = self.make_line(4)
+        pathfinder = Pathfinder()
+        to_end = pathfinder.tree(rooms[3])
+        to_start = pathfinder.tree(rooms[0])
+
+        rooms[2].disconnect_from(rooms[3])
+        self.assertIs(pathfinder.tree(rooms[0]), to_start)
+        self.assertIsNone(pathfinder.distance(rooms[0], rooms[3]))
+        self.assertIsNot(pathfinder.tree(rooms[3]), to_end)
+
+    def test_pathfinder_selector(self):
+        campaign = Campaign()
+        rooms = self.make_line(6)
+        for room in rooms:
+            campaign.add_asset(room)
+        rooms[0].connect_to(rooms[5])
+        pathfinder = Pathfinder()
+        walkers = [Walker(f"Walker {i}", rooms[i], door_select=pathfinder.selector(rooms[3])) for i in range(3)]
+        for walker in walkers:
+            campaign.add_asset(walker)
+        for _ in range(4):
+            campaign.tick()
+        self.assertTrue(all(w.room is rooms[3] for w in walkers))
+        self.assertEqual(list(pathfinder.trees), [rooms[3]], "Walkers with the same destination should share one tree.")
+        self.assertTrue(all(w.door_select.walker is w for w in walkers))
+
+        # Without a walker, the selector compares the distances of the doors' rooms.
+        select = pathfinder.selector(rooms[3])
+        self.assertIs(select(rooms[4].doors).room, rooms[3])
+
+    def test_find_path(self):
+        rooms = self.make_line(6)
+        rooms[1].connect_to(rooms[4])
+        path = find_path(rooms[0], rooms[5])
+        self.assertEqual([d.room for d in path], [rooms[1], rooms[4], rooms[5]])
+
+        position = {room: i for i, room in enumerate(rooms)}
+        path = find_path(rooms[0], rooms[5], heuristic=lambda room, goal: abs(position[goal] - position[room]) // 3)
+        self.assertEqual(len(path), 3)
+        self.assertEqual(find_path(rooms[2], rooms[2]), [])
+        self.assertIsNone(find_path(rooms[0], Room("Elsewhere")))
+
+
+if __name__ == "__main__":
+    unittest.main()
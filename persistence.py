@@ -0,0 +1,336 @@
+import pickle
+import struct
+from collections.abc import Iterator
+from typing import Any, Callable, Optional
+
+from campaign import Campaign, Door, Room, Walker
+
+# Empty type declarations so that the names can be used in type hints
+class CampaignJournal: pass
+
+class JournalFormatException(Exception): pass
+class JournalCheckpointException(Exception): pass
+
+MAGIC = b"ABJOURNL"
+VERSION = 1
+
+# magic, version
+FILE_HEADER = struct.Struct("<8sH")
+# kind, tick, payload length
+RECORD_HEADER = struct.Struct("<BqQ")
+
+KEYFRAME = 0
+DELTA = 1
+
+def _empty_state() -> dict:
+    """
+    State of a campaign as plain data, in the form written to keyframes:
+        rooms: room id -> [name, visited, in campaign]
+        doors: door id -> [name, source room id, target room id]
+        walkers: walker id -> [name, room id, speed, ticks_passed, tick that ticks_passed was counted at, in campaign]
+    """
+    return {"tick": 0, "rooms": {}, "doors": {}, "walkers": {}}
+
+def apply_delta(state:dict, tick:int, changes:list[tuple]) -> None:
+    """
+    Applies the changes of a delta record to the state.
+    """
+    rooms = state["rooms"]
+    doors = state["doors"]
+    walkers = state["walkers"]
+    for change in changes:
+        kind = change[0]
+        if kind == "move":
+            _, walker_id, room_id, moved_at, speed = change
+            walker = walkers[walker_id]
+            walker[1] = room_id
+            walker[2] = speed
+            walker[3] = 0
+            walker[4] = moved_at
+        elif kind == "visit":
+            rooms[change[1]][1] = True
+        elif kind == "door":
+            _, door_id, name, source_id, target_id = change
+            doors[door_id] = [name, source_id, target_id]
+        elif kind == "remove":
+            doors.pop(change[1], None)
+        elif kind == "member":
+            _, asset_kind, asset_id, in_campaign = change
+            if asset_kind == "room":
+                rooms[asset_id][2] = in_campaign
+            else:
+                walkers[asset_id][5] = in_campaign
+        elif kind == "room":
+            _, room_id, name, visited, in_campaign = change
+            rooms[room_id] = [name, visited, in_campaign]
+        elif kind == "walker":
+            _, walker_id, name, room_id, speed, ticks_passed, counted_at, in_campaign = change
+            walkers[walker_id] = [name, room_id, speed, ticks_passed, counted_at, in_campaign]
+        else:
+            raise JournalFormatException(f"Unknown change '{kind}'.")
+    state["tick"] = tick
+
+class CampaignJournal:
+    """
+    Append-only save file for a Campaign: a full keyframe of the campaign's state, followed by a delta record per checkpoint.
+
+    The journal listens to the "enter", "door_added", "door_removed" and "door_retargeted" events of the rooms it knows
+    about, and collects the changes they report (walker moves, newly visited rooms, doors added, retargeted or removed,
+    new rooms and walkers) until the next .checkpoint, along with the rooms and walkers that the campaign's
+    "asset_added" and "asset_removed" events report. Rooms become known when they are added to the campaign, hold a
+    known walker, or are behind a door of a known room. Writing a checkpoint therefore costs time proportional to the
+    number of changes, not to the size of the map. A new keyframe is written every keyframe_interval checkpoints
+    (if given), which bounds the number of deltas that have to be read to restore a checkpoint (see load_campaign).
+
+    Only the state of rooms, doors and walkers is saved. Event handlers and door selectors are not, they need to
+    be set up again after loading.
+    """
+    def __init__(self, path:str, campaign:Campaign, keyframe_interval:Optional[int]=None) -> None:
+        """
+        Creates the journal file and writes a keyframe of the campaign's current state.
+        """
+        self.campaign: Campaign = campaign
+        self.keyframe_interval: Optional[int] = keyframe_interval
+        self.checkpoints: int = 0
+        """Number of checkpoints written since the last keyframe."""
+
+        self._room_ids: dict[Room, int] = {}
+        self._door_ids: dict[Door, int] = {}
+        self._walker_ids: dict[Walker, int] = {}
+        # Changes since the last checkpoint.
+        self._changes: list[tuple] = []
+        # Rooms and walkers found since the last checkpoint, their records are written with their state at the checkpoint.
+        self._new: dict[Room | Walker, None] = {}
+
+        campaign.on("asset_added", self._asset_added, weak=True)
+        campaign.on("asset_removed", self._asset_removed, weak=True)
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        for room in list(self.campaign.rooms):
+            self._room_id(room)
+        for asset in list(self.campaign.assets):
+            if isinstance(asset, Walker):
+                self._walker_id(asset)
+        self._write(KEYFRAME, self.state())
+        self._changes = []
+        self._new = {}
+
+    def _room_id(self, room:Room) -> int:
+        """
+        Returns the id of the room, first adding it along with every room, door and walker reachable from it if it is new.
+        """
+        room_id = self._room_ids.get(room)
+        if room_id is not None:
+            return room_id
+
+        found = [room]
+        self._room_ids[room] = len(self._room_ids)
+        for r in found:
+            for door in r.doors:
+                if door.room is not None and door.room not in self._room_ids:
+                    self._room_ids[door.room] = len(self._room_ids)
+                    found.append(door.room)
+        for r in found:
+            r.on("enter", self._entered, weak=True)
+            r.on("door_added", self._door_changed, weak=True)
+            r.on("door_retargeted", self._door_changed, weak=True)
+            r.on("door_removed", self._door_removed, weak=True)
+            self._new[r] = None
+        for r in found:
+            for door in r.doors:
+                self._add_door(door)
+            for walker in r.walkers:
+                if isinstance(walker, Walker):
+                    self._walker_id(walker)
+        return self._room_ids[room]
+
+    def _add_door(self, door:Door) -> None:
+        door_id = self._door_ids.get(door)
+        if door_id is None:
+            door_id = self._door_ids[door] = len(self._door_ids)
+        target = self._room_id(door.room) if door.room is not None else None
+        self._changes.append(("door", door_id, door.name, self._room_id(door.source), target))
+
+    def _walker_id(self, walker:Walker) -> int:
+        walker_id = self._walker_ids.get(walker)
+        if walker_id is None:
+            walker_id = self._walker_ids[walker] = len(self._walker_ids)
+            self._room_id(walker.room)
+            self._new[walker] = None
+        return walker_id
+
+    def _entered(self, room:Room, walker:Any) -> None:
+        room_id = self._room_ids[room]
+        self._changes.append(("visit", room_id))
+        if not isinstance(walker, Walker):
+            return
+        if walker not in self._walker_ids:
+            self._walker_id(walker)
+        elif walker not in self._new:
+            self._changes.append(("move", self._walker_ids[walker], room_id, self.campaign.current_tick, walker.speed))
+
+    def _asset_added(self, campaign:Campaign, asset:Any) -> None:
+        self._membership_changed(asset, True)
+
+    def _asset_removed(self, campaign:Campaign, asset:Any) -> None:
+        self._membership_changed(asset, False)
+
+    def _membership_changed(self, asset:Any, in_campaign:bool) -> None:
+        if isinstance(asset, Room):
+            known = asset in self._room_ids
+            asset_id = self._room_id(asset)
+            kind = "room"
+        elif isinstance(asset, Walker):
+            known = asset in self._walker_ids
+            asset_id = self._walker_id(asset)
+            kind = "walker"
+        else:
+            return
+        # Records of new rooms and walkers are written with their membership at the checkpoint.
+        if known and asset not in self._new:
+            self._changes.append(("member", kind, asset_id, in_campaign))
+
+    def _door_changed(self, room:Room, door:Door) -> None:
+        # Added to the room or retargeted, new rooms behind the door become known.
+        self._add_door(door)
+
+    def _door_removed(self, room:Room, door:Door) -> None:
+        door_id = self._door_ids.get(door)
+        if door_id is not None:
+            self._changes.append(("remove", door_id))
+
+    def _room_state(self, room:Room) -> list:
+        return [room.name, room.visited, room.campaign is self.campaign]
+
+    def _walker_state(self, walker:Walker) -> list:
+        # Sleeping walkers are only brought up to date with the ticks they slept through when they are next ticked.
+        counted_at = self.campaign._last.get(walker, self.campaign.current_tick)
+        return [
+            walker.name, self._room_ids[walker.room], walker.speed, walker.ticks_passed,
+            counted_at, walker.campaign is self.campaign,
+        ]
+
+    def state(self) -> dict:
+        """
+        Returns the current state of the campaign as plain data (see _empty_state).
+        """
+        state = _empty_state()
+        state["tick"] = self.campaign.current_tick
+        for room, room_id in self._room_ids.items():
+            state["rooms"][room_id] = self._room_state(room)
+        for door, door_id in self._door_ids.items():
+            if door.source in self._room_ids:
+                state["doors"][door_id] = [door.name, self._room_ids[door.source], self._room_ids.get(door.room)]
+        for walker, walker_id in self._walker_ids.items():
+            state["walkers"][walker_id] = self._walker_state(walker)
+        return state
+
+    def _write(self, kind:int, payload:Any) -> None:
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(RECORD_HEADER.pack(kind, self.campaign.current_tick, len(data)))
+        self._file.write(data)
+        self._file.flush()
+
+    def checkpoint(self) -> None:
+        """
+        Appends the changes since the last checkpoint as a delta record (or a keyframe, every keyframe_interval checkpoints).
+        """
+        self.checkpoints += 1
+        if self.keyframe_interval is not None and self.keyframe_interval <= self.checkpoints:
+            self.checkpoints = 0
+            self._write(KEYFRAME, self.state())
+        else:
+            records = []
+            for asset in self._new:
+                if isinstance(asset, Room):
+                    records.append(("room", self._room_ids[asset], *self._room_state(asset)))
+                else:
+                    records.append(("walker", self._walker_ids[asset], *self._walker_state(asset)))
+            records.sort(key=lambda record: record[0] != "room")
+            self._write(DELTA, records + self._changes)
+        self._changes = []
+        self._new = {}
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> CampaignJournal:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+def read_records(path:str) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Iterates over the (kind, tick, offset, length) of the records in a journal, only reading their headers.
+    """
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+            raise JournalFormatException(f"'{path}' is not a version {VERSION} campaign journal.")
+        offset = FILE_HEADER.size
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            kind, tick, length = RECORD_HEADER.unpack(header)
+            offset += RECORD_HEADER.size
+            yield (kind, tick, offset, length)
+            offset += length
+            f.seek(offset)
+
+def load_state(path:str, checkpoint:Optional[int]=None) -> dict:
+    """
+    Returns the state saved at the last checkpoint at or before the given tick (by default the last checkpoint).
+
+    Only the closest keyframe before the checkpoint and the deltas after it are read.
+    """
+    records = [r for r in read_records(path) if checkpoint is None or r[1] <= checkpoint]
+    if not records:
+        raise JournalCheckpointException(f"'{path}' has no checkpoint at or before tick {checkpoint}.")
+    start = max(i for i, r in enumerate(records) if r[0] == KEYFRAME)
+
+    state = None
+    with open(path, "rb") as f:
+        for kind, tick, offset, length in records[start:]:
+            f.seek(offset)
+            payload = pickle.loads(f.read(length))
+            if kind == KEYFRAME:
+                state = payload
+            else:
+                apply_delta(state, tick, payload)
+    return state
+
+def load_campaign(path:str, checkpoint:Optional[int]=None, door_select:Optional[Callable[[], Callable[[list[Door]], Optional[Door]]]]=None) -> Campaign:
+    """
+    Rebuilds the campaign saved at the given checkpoint (see load_state), with new Room, Door and Walker objects.
+
+    door_select is called to create each walker's door selector, by default walkers use Walker's default exploration.
+    """
+    state = load_state(path, checkpoint)
+    tick = state["tick"]
+    campaign = Campaign()
+    campaign.current_tick = tick
+
+    rooms = {}
+    for room_id, (name, visited, in_campaign) in state["rooms"].items():
+        room = rooms[room_id] = Room(name)
+        if in_campaign:
+            campaign.add_asset(room)
+    # Door ids follow the order that the doors were added in.
+    for door_id in sorted(state["doors"]):
+        name, source_id, target_id = state["doors"][door_id]
+        rooms[source_id].add_door(Door(name, rooms[target_id] if target_id is not None else None))
+
+    for walker_id in sorted(state["walkers"]):
+        name, room_id, speed, ticks_passed, counted_at, in_campaign = state["walkers"][walker_id]
+        walker = Walker(name, rooms[room_id], door_select=door_select() if door_select is not None else None)
+        walker.speed = speed
+        walker.ticks_passed = (ticks_passed + tick - counted_at) % max(1, speed)
+        if in_campaign:
+            campaign.add_asset(walker)
+
+    # Set last, since walkers entering their rooms mark them as visited.
+    for room_id, (name, visited, in_campaign) in state["rooms"].items():
+        rooms[room_id].visited = visited
+    return campaign
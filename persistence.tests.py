@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+
+from campaign import Campaign, Door, Room, Walker
+from persistence import CampaignJournal, JournalCheckpointException, JournalFormatException, load_campaign, load_state, read_records, KEYFRAME
+
+def last_door(doors):
+    return doors[-1] if doors else None
+
+def signature(campaign):
+    """
+    Walker rooms and speeds, visited rooms and doors of the campaign, by name.
+    """
+    walkers = sorted((a.name, a.room.name, a.speed) for a in campaign.assets if isinstance(a, Walker))
+    rooms = {}
+    for walker in campaign.assets:
+        if isinstance(walker, Walker):
+            rooms[walker.room] = None
+    rooms.update((room, None) for room in campaign.rooms)
+    found = list(rooms)
+    for room in found:
+        for door in room.doors:
+            if door.room is not None and door.room not in rooms:
+                rooms[door.room] = None
+                found.append(door.room)
+    visited = sorted(room.name for room in found if room.visited)
+    doors = sorted((room.name, door.name, door.room.name if door.room else None) for room in found for door in room.doors)
+    return walkers, visited, doors
+
+class TestPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "campaign.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_campaign(self):
+        campaign = Campaign()
+        rooms = [Room(f"Room {i}") for i in range(12)]
+        for room in rooms:
+            campaign.add_asset(room)
+        for i in range(12):
+            rooms[i].connect_to(rooms[(i + 1) % 12], f"door {i}")
+        rooms[0].connect_to(rooms[6], "shortcut")
+        for i, speed in enumerate([1, 2, 3]):
+            walker = Walker(f"Walker {i}", rooms[i * 4], door_select=last_door)
+            walker.speed = speed
+            campaign.add_asset(walker)
+        return campaign, rooms
+
+    def test_restore_every_checkpoint(self):
+        campaign, rooms = self.make_campaign()
+        signatures = {}
+        with CampaignJournal(self.path, campaign) as journal:
+            signatures[0] = signature(campaign)
+            for tick in range(1, 25):
+                campaign.tick()
+                if tick == 5:
+                    rooms[3].disconnect_from(rooms[4])
+                    rooms[4].disconnect_from(rooms[3])
+                if tick == 9:
+                    extra = Room("Extra room")
+                    rooms[8].connect_to(extra, "side door")
+                if tick == 13:
+                    rooms[6].doors[0].room = rooms[1]
+                if tick == 17:
+                    campaign.add_asset(Walker("Late walker", rooms[2], door_select=last_door))
+                journal.checkpoint()
+                signatures[tick] = signature(campaign)
+
+        for tick, expected in signatures.items():
+            self.assertEqual(signature(load_campaign(self.path, tick, door_select=lambda: last_door)), expected, f"Checkpoint {tick} was not restored.")
+
+    def test_restore_doors_to_new_rooms(self):
+        campaign, rooms = self.make_campaign()
+        signatures = {}
+        with CampaignJournal(self.path, campaign) as journal:
+            # Walker 0 takes the one-way door on the first tick, walker 1 takes the retargeted door on the second.
+            rooms[0].add_door(Door("one-way door", Room("X")))
+            rooms[4].doors[-1].room = Room("Y")
+            for tick in range(1, 5):
+                campaign.tick()
+                journal.checkpoint()
+                signatures[tick] = signature(campaign)
+
+        self.assertIn(("Walker 0", "X", 1), signatures[1][0])
+        self.assertIn(("Walker 1", "Y", 2), signatures[2][0])
+        for tick, expected in signatures.items():
+            self.assertEqual(signature(load_campaign(self.path, tick, door_select=lambda: last_door)), expected, f"Checkpoint {tick} was not restored.")
+
+    def test_restore_removed_assets(self):
+        campaign, rooms = self.make_campaign()
+        walker = next(iter(campaign.assets.of_type(Walker)))
+        signatures = {}
+        with CampaignJournal(self.path, campaign) as journal:
+            for tick in range(1, 7):
+                campaign.tick()
+                if tick == 2:
+                    campaign.remove_asset(walker)
+                    campaign.remove_asset(rooms[7])
+                if tick == 4:
+                    campaign.add_asset(walker)
+                journal.checkpoint()
+                signatures[tick] = (signature(campaign), len(campaign.assets))
+
+        for tick, expected in signatures.items():
+            restored = load_campaign(self.path, tick, door_select=lambda: last_door)
+            self.assertEqual((signature(restored), len(restored.assets)), expected, f"Checkpoint {tick} was not restored.")
+        self.assertEqual(len(load_campaign(self.path, 3).assets), len(signatures[1][0][0]) + 12 - 2)
+
+    def test_restored_campaign_continues(self):
+        campaign, _ = self.make_campaign()
+        with CampaignJournal(self.path, campaign) as journal:
+            for _ in range(7):
+                campaign.tick()
+                journal.checkpoint()
+        restored = load_campaign(self.path, door_select=lambda: last_door)
+        self.assertEqual(restored.current_tick, 7)
+        for _ in range(10):
+            campaign.tick()
+            restored.tick()
+            self.assertEqual(signature(restored), signature(campaign), "Walkers should move on the same ticks after being restored.")
+
+    def test_keyframes(self):
+        campaign, _ = self.make_campaign()
+        signatures = {}
+        with CampaignJournal(self.path, campaign, keyframe_interval=4) as journal:
+            for tick in range(1, 11):
+                campaign.tick()
+                journal.checkpoint()
+                signatures[tick] = signature(campaign)
+        kinds = [kind for kind, _, _, _ in read_records(self.path)]
+        self.assertEqual([i for i, kind in enumerate(kinds) if kind == KEYFRAME], [0, 4, 8])
+        for tick, expected in signatures.items():
+            self.assertEqual(signature(load_campaign(self.path, tick, door_select=lambda: last_door)), expected)
+
+    def test_delta_size(self):
+        campaign = Campaign()
+        rooms = [Room(f"Room {i}") for i in range(2000)]
+        for i in range(1, 2000):
+            rooms[i - 1].connect_to(rooms[i])
+        campaign.add_asset(rooms[0])
+        campaign.add_asset(Walker("Walker", rooms[0]))
+        with CampaignJournal(self.path, campaign) as journal:
+            for _ in range(5):
+                campaign.tick()
+                journal.checkpoint()
+        records = list(read_records(self.path))
+        self.assertEqual(len(records), 6)
+        self.assertLess(max(length for _, _, _, length in records[1:]) * 100, records[0][3], "Deltas should only hold what changed.")
+        self.assertEqual(len(load_state(self.path)["rooms"]), 2000)
+
+    def test_errors(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a journal")
+        with self.assertRaises(JournalFormatException):
+            load_campaign(self.path)
+
+        campaign, _ = self.make_campaign()
+        campaign.tick()
+        CampaignJournal(self.path, campaign).close()
+        with self.assertRaises(JournalCheckpointException):
+            load_campaign(self.path, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
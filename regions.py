@@ -0,0 +1,289 @@
+import multiprocessing
+from collections.abc import Sequence
+from typing import Optional, Tuple
+
+import numpy as np
+
+from compactmap import Bitmap, CompactMap, choose_doors
+
+# Empty type declarations so that the names can be used in type hints
+class Region: pass
+class RegionCampaign: pass
+
+class Region:
+    """
+    The walkers in a contiguous range of room ids [start, end), their tick counters, and which of those rooms have been visited.
+    """
+    def __init__(self, start:int, end:int, offsets:np.ndarray, targets:np.ndarray, seed:int, speeds:np.ndarray,
+                 walkers:np.ndarray, rooms:np.ndarray, listeners:Tuple[Bitmap, Bitmap, Bitmap]) -> None:
+        self.start = start
+        self.end = end
+        self.offsets = offsets
+        self.targets = targets
+        self.seed = seed
+        # Speeds of every walker, by walker id.
+        self.speeds: np.ndarray = speeds
+        self.walkers: np.ndarray = walkers.astype(np.int64)
+        self.rooms: np.ndarray = rooms.astype(np.int64)
+        self.ticks_passed: np.ndarray = np.zeros(len(self.walkers), dtype=np.int64)
+        self.visited: np.ndarray = np.zeros(end - start, dtype=bool)
+        self.visited[self.rooms - start] = True
+        # The map's bitmaps of rooms with "enter" handlers, rooms with "leave" handlers and doors with "enter" handlers.
+        self.listeners: Tuple[Bitmap, Bitmap, Bitmap] = listeners
+
+    def step(self, tick:int, walkers:np.ndarray, rooms:np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Takes in the walkers that arrived in the region during the previous tick, then moves every walker in the region
+        that is due to move.
+
+        Returns the walkers that left the region and their new rooms, followed by the walkers and rooms or doors of
+        the events to emit: walkers that entered a room with "enter" handlers, walkers that moved through a door with
+        "enter" handlers, and walkers that left a room with "leave" handlers.
+        """
+        if len(walkers):
+            self.visited[rooms - self.start] = True
+            self.walkers = np.concatenate([self.walkers, walkers])
+            self.rooms = np.concatenate([self.rooms, rooms])
+            self.ticks_passed = np.concatenate([self.ticks_passed, np.zeros(len(walkers), dtype=np.int64)])
+
+        self.ticks_passed += 1
+        due = np.flatnonzero(self.speeds[self.walkers] <= self.ticks_passed)
+        self.ticks_passed[due] = 0
+        doors = choose_doors(self.offsets, self.rooms[due], self.walkers[due], tick, self.seed)
+        used = 0 <= doors
+        due = due[used]
+        doors = doors[used]
+        room_enter, room_leave, door_enter = self.listeners
+        listened = door_enter.get_many(doors)
+        door_walkers = self.walkers[due[listened]]
+        listened_doors = doors[listened]
+
+        old_rooms = self.rooms[due]
+        new_rooms = self.targets[doors].astype(np.int64)
+        moved = new_rooms != old_rooms
+        due = due[moved]
+        old_rooms = old_rooms[moved]
+        new_rooms = new_rooms[moved]
+        self.rooms[due] = new_rooms
+        moved_walkers = self.walkers[due]
+        entered = room_enter.get_many(new_rooms)
+        left = room_leave.get_many(old_rooms)
+
+        inside = (self.start <= new_rooms) & (new_rooms < self.end)
+        self.visited[new_rooms[inside] - self.start] = True
+        stay = np.ones(len(self.walkers), dtype=bool)
+        stay[due[~inside]] = False
+        result = (
+            moved_walkers[~inside], new_rooms[~inside], moved_walkers[entered], new_rooms[entered],
+            door_walkers, listened_doors, moved_walkers[left], old_rooms[left],
+        )
+        self.walkers = self.walkers[stay]
+        self.rooms = self.rooms[stay]
+        self.ticks_passed = self.ticks_passed[stay]
+        return result
+
+def _serve(connection, regions:list[Region]) -> None:
+    """
+    Worker process loop, running commands sent by RegionCampaign for the worker's regions.
+    """
+    while True:
+        command, *args = connection.recv()
+        if command == "tick":
+            tick, inboxes = args
+            connection.send([region.step(tick, *inbox) for region, inbox in zip(regions, inboxes)])
+        elif command == "state":
+            connection.send([(region.walkers, region.rooms, region.visited) for region in regions])
+        elif command == "listen":
+            for region, listeners in zip(regions, args[0]):
+                region.listeners = listeners
+            connection.send(None)
+        else:
+            connection.close()
+            return
+
+class RegionCampaign:
+    """
+    Runs crowd walkers on a CompactMap split into regions of consecutive room ids, optionally ticking the regions in
+    worker processes.
+
+    RegionCampaign does not run Walker objects or Campaign.tick. Its walkers are the same array walkers as a Crowd's:
+    identified by their index in the starting rooms given, each moving every speed ticks through a door of the map's
+    arrays picked by wander, so a RegionCampaign and a Crowd with the same rooms, speeds and seed move their walkers
+    the same way. Speeds are fixed when the campaign is created, and changes to the map's doors afterwards (doors added,
+    removed or retargeted at runtime) are not taken into account.
+
+    Walkers that move into another region are handed over in an exchange at the end of the tick. The events of the
+    doors and rooms with handlers (see CompactMap.listeners, which is checked before every tick, so handlers can be
+    added or removed at any time) are then emitted in the main process, with the walker id as event data: sorted by
+    walker id, and for each walker the door's "enter", the new room's "enter", then the old room's "leave" (as
+    Walker.tick does). Since neither the moves nor the order of the events depend on how the map is split, runs with
+    the same seed give identical results with any number of regions and workers.
+    """
+    def __init__(self, compact_map:CompactMap, walker_rooms:Sequence[int], speeds:int | Sequence[int]=1, seed:int=0,
+                 regions:int=1, workers:int=0) -> None:
+        """
+        With workers=0 every region is ticked in this process, otherwise the regions are shared out between that many worker processes.
+        """
+        self.map: CompactMap = compact_map
+        self.seed: int = seed
+        self.current_tick: int = 0
+        self.walker_count: int = len(walker_rooms)
+        regions = max(1, min(regions, len(compact_map)))
+        self.bounds: np.ndarray = np.linspace(0, len(compact_map), regions + 1).astype(np.int64)
+        """Room id where each region starts, followed by the number of rooms."""
+
+        rooms = np.asarray(walker_rooms, dtype=np.int64)
+        walkers = np.arange(len(rooms), dtype=np.int64)
+        self.speeds: np.ndarray = np.broadcast_to(np.asarray(speeds, dtype=np.int64), rooms.shape).copy()
+        """Number of ticks between movements, by walker."""
+        owner = self.region_of(rooms)
+        self._listeners: Tuple[Bitmap, Bitmap, Bitmap] = (
+            compact_map.listeners("room", "enter"), compact_map.listeners("room", "leave"), compact_map.listeners("door", "enter"),
+        )
+        # Version of the map's listener bitmaps that the workers have.
+        self._listener_version: int = compact_map._listener_version
+        self._regions: list[Region] = [
+            Region(int(self.bounds[i]), int(self.bounds[i + 1]), compact_map.offsets, compact_map.targets, seed,
+                   self.speeds, walkers[owner == i], rooms[owner == i], self._listeners)
+            for i in range(regions)
+        ]
+        # Walkers that moved into another region during the last tick, by region.
+        self._inboxes: list[Tuple[np.ndarray, np.ndarray]] = [self._empty()] * regions
+
+        self._workers: list = []
+        self._connections: list = []
+        # Regions handled by each worker.
+        self._assigned: list[list[int]] = []
+        if 0 < workers:
+            workers = min(workers, regions)
+            context = multiprocessing.get_context()
+            for w in range(workers):
+                assigned = list(range(w, regions, workers))
+                parent, child = context.Pipe()
+                process = context.Process(target=_serve, args=(child, [self._regions[i] for i in assigned]), daemon=True)
+                process.start()
+                child.close()
+                self._workers.append(process)
+                self._connections.append(parent)
+                self._assigned.append(assigned)
+            # The regions now live in the workers.
+            self._regions = []
+
+    @staticmethod
+    def _empty() -> Tuple[np.ndarray, np.ndarray]:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    def region_of(self, rooms:np.ndarray) -> np.ndarray:
+        """
+        Returns the region of each of the given rooms.
+        """
+        return np.searchsorted(self.bounds, rooms, side="right") - 1
+
+    def _run(self, command:str, per_region:Optional[list]=None, tick:Optional[int]=None) -> list:
+        """
+        Runs a command on every region, in this process or in the workers, returning the results by region.
+        """
+        if not self._workers:
+            if command == "tick":
+                return [region.step(tick, *inbox) for region, inbox in zip(self._regions, per_region)]
+            return [(region.walkers, region.rooms, region.visited) for region in self._regions]
+
+        for connection, assigned in zip(self._connections, self._assigned):
+            args = [] if per_region is None else [[per_region[i] for i in assigned]]
+            if command == "tick":
+                args = [tick] + args
+            connection.send((command, *args))
+        results = [None] * (len(self.bounds) - 1)
+        for connection, assigned in zip(self._connections, self._assigned):
+            reply = connection.recv()
+            if reply is not None:
+                for i, result in zip(assigned, reply):
+                    results[i] = result
+        return results
+
+    def tick(self) -> None:
+        """
+        Moves the walkers that are due to move, exchanges the walkers that crossed into other regions, then emits the
+        events of the doors and rooms with handlers.
+        """
+        if self._workers and self._listener_version != self.map._listener_version:
+            # Regions ticked in this process share the map's bitmaps, the workers have copies.
+            self._listener_version = self.map._listener_version
+            self._run("listen", [self._listeners] * (len(self.bounds) - 1))
+
+        self.current_tick += 1
+        results = self._run("tick", self._inboxes, tick=self.current_tick)
+
+        leaving = np.concatenate([r[0] for r in results])
+        arriving = np.concatenate([r[1] for r in results])
+        owner = self.region_of(arriving)
+        # The regions take in the walkers that arrived at the start of the next tick.
+        self._inboxes = [(leaving[owner == i], arriving[owner == i]) for i in range(len(self.bounds) - 1)]
+
+        # Door "enter" (kind 0), room "enter" (kind 1) and room "leave" (kind 2) events, by walker then kind. The walkers
+        # of each kind are at these positions in the results of Region.step, followed by the doors or rooms.
+        walkers = []
+        targets = []
+        kinds = []
+        for kind, column in enumerate([4, 2, 6]):
+            for r in results:
+                walkers.append(r[column])
+                targets.append(r[column + 1])
+                kinds.append(np.full(len(r[column]), kind, dtype=np.int8))
+        walkers = np.concatenate(walkers)
+        targets = np.concatenate(targets)
+        kinds = np.concatenate(kinds)
+        for i in np.lexsort((kinds, walkers)):
+            kind = kinds[i]
+            asset = self.map.door(int(targets[i])) if kind == 0 else self.map.room(int(targets[i]))
+            asset.emit("leave" if kind == 2 else "enter", int(walkers[i]))
+
+    def run(self, ticks:int) -> None:
+        for _ in range(ticks):
+            self.tick()
+
+    def walker_rooms(self) -> np.ndarray:
+        """
+        Returns the current room of every walker, by walker id.
+        """
+        rooms = np.zeros(self.walker_count, dtype=np.int64)
+        for walkers, walker_rooms, _ in self._run("state"):
+            rooms[walkers] = walker_rooms
+        for walkers, walker_rooms in self._inboxes:
+            rooms[walkers] = walker_rooms
+        return rooms
+
+    def visited(self) -> np.ndarray:
+        """
+        Returns whether each room of the map has been visited, as an array of bools.
+        """
+        visited = np.concatenate([visited for _, _, visited in self._run("state")])
+        for _, rooms in self._inboxes:
+            visited[rooms] = True
+        return visited
+
+    def sync(self) -> None:
+        """
+        Copies the visited rooms and the occupied rooms into the map's bitmaps.
+        """
+        self.map.visited.set_many(np.flatnonzero(self.visited()))
+        self.map.occupied.clear()
+        self.map.occupied.set_many(self.walker_rooms())
+
+    def close(self) -> None:
+        """
+        Stops the worker processes. The campaign can't be ticked afterwards.
+        """
+        for connection in self._connections:
+            connection.send(("stop",))
+            connection.close()
+        for process in self._workers:
+            process.join()
+        self._connections = []
+        self._workers = []
+
+    def __enter__(self) -> RegionCampaign:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from crowd import Crowd
+from mapgen import generate_map
+from regions import RegionCampaign
+
+class TestRegions(unittest.TestCase):
+
+    def make_map(self, log):
+        m = generate_map(3000, "cave", seed=4)
+        for room_id in range(0, len(m), 7):
+            m.room(room_id).on("enter", lambda room, walker: log.append(("room", room.id, walker)))
+        for door_id in range(0, m.door_count, 11):
+            m.door(door_id).on("enter", lambda door, walker: log.append(("door", door.id, walker)))
+        return m
+
+    def run_campaign(self, regions, workers, ticks=25, seed=11):
+        entered = []
+        m = self.make_map(entered)
+        starts = np.random.default_rng(2).integers(0, len(m), 200)
+        speeds = np.arange(200) % 3 + 1
+        with RegionCampaign(m, starts, speeds, seed=seed, regions=regions, workers=workers) as campaign:
+            campaign.run(ticks // 2)
+            # Handlers added while the campaign runs are picked up by the regions.
+            for room_id in range(0, len(m), 13):
+                m.room(room_id).on("leave", lambda room, walker: entered.append(("leave", room.id, walker)))
+            campaign.run(ticks - ticks // 2)
+            return campaign.walker_rooms(), campaign.visited(), entered
+
+    def test_regions_match_single(self):
+        rooms, visited, entered = self.run_campaign(regions=1, workers=0)
+        self.assertLess(0, len(entered))
+        self.assertEqual({kind for kind, _, _ in entered}, {"room", "door", "leave"})
+        # A walker's door event comes right before its room event, when both have handlers.
+        m = generate_map(3000, "cave", seed=4)
+        for (kind, asset_id, walker), following in zip(entered, entered[1:]):
+            if kind == "door" and following[0] == "room" and following[2] == walker:
+                self.assertEqual(int(m.targets[asset_id]), following[1])
+        for regions, workers in [(4, 0), (5, 2)]:
+            other_rooms, other_visited, other_entered = self.run_campaign(regions, workers)
+            self.assertTrue(np.array_equal(rooms, other_rooms), f"{regions} regions in {workers} workers moved the walkers differently.")
+            self.assertTrue(np.array_equal(visited, other_visited))
+            self.assertEqual(entered, other_entered, "Events should be emitted in the same order.")
+
+    def test_regions_match_crowd(self):
+        starts = np.random.default_rng(3).integers(0, 3000, 150)
+        speeds = np.arange(150) % 4 + 1
+
+        crowd_log = []
+        crowd_map = self.make_map(crowd_log)
+        crowd = Crowd(crowd_map, starts, speeds, seed=5)
+        crowd_log.clear()
+        region_log = []
+        region_map = self.make_map(region_log)
+        with RegionCampaign(region_map, starts, speeds, seed=5, regions=6, workers=2) as campaign:
+            for _ in range(20):
+                crowd.tick()
+                campaign.tick()
+            self.assertTrue(np.array_equal(crowd.rooms, campaign.walker_rooms()), "Regions should move walkers like a Crowd.")
+            self.assertTrue(np.array_equal(crowd_map.visited.to_array(), campaign.visited()))
+        # Crowds do not emit door events.
+        self.assertEqual(crowd_log, [event for event in region_log if event[0] != "door"])
+
+    def test_regions_sync(self):
+        m = generate_map(400, "grid", seed=1)
+        with RegionCampaign(m, [0, 399], seed=3, regions=3) as campaign:
+            campaign.run(10)
+            campaign.sync()
+            self.assertEqual(m.visited.count(), int(campaign.visited().sum()))
+            self.assertEqual(sorted(m.occupied.nonzero()), sorted(set(campaign.walker_rooms())))
+            self.assertEqual(campaign.current_tick, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import mmap
+import os
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+from battle import Battle, Battler, InitiativeScheduler, RoundRobinScheduler
+from battlelog import BattleLog
+
+# Empty type declarations so that the names can be used in type hints
+class Replay: pass
+
+class ReplayFormatException(Exception): pass
+class ReplayMismatchException(Exception): pass
+
+MAGIC = b"ABREPLAY"
+VERSION = 1
+
+# magic, version, roster size, action count, record count, scheduler name length
+HEADER = struct.Struct("<8sHIIQH")
+# team, health, damage, initiative, name length
+BATTLER = struct.Struct("<bqqdH")
+# name length
+NAME = struct.Struct("<H")
+
+SCHEDULERS = {
+    "RoundRobinScheduler": RoundRobinScheduler,
+    "InitiativeScheduler": InitiativeScheduler,
+}
+"""Turn order schedulers that replays can be re-driven with, by the name stored in the file."""
+
+RECORD = np.dtype([
+    ("turn", "<i8"),
+    ("type", "<i1"),
+    ("action", "<i2"),
+    ("battler", "<i4"),
+    ("target", "<i4"),
+    ("health_delta", "<i8"),
+    ("damage_delta", "<i8"),
+    ("health", "<i8"),
+    ("damage", "<i8"),
+])
+"""Fixed-width layout of each event record, using the same columns as BattleLog."""
+
+def _pack_name(name:str) -> bytes:
+    data = name.encode("utf-8")
+    return NAME.pack(len(data)) + data
+
+def save_replay(path:str, log:BattleLog) -> None:
+    """
+    Writes the battle recorded in the log to a replay file.
+
+    The file starts with a header holding the roster (team, starting stats, initiative and name of every battler),
+    the names of the actions used and the turn order scheduler, followed by one fixed-width record per event.
+    """
+    scheduler = log.scheduler.encode("utf-8")
+    parts = [HEADER.pack(MAGIC, VERSION, len(log.roster), len(log.actions), len(log), len(scheduler)), scheduler]
+    for i, battler in enumerate(log.roster):
+        name = battler.name.encode("utf-8")
+        parts.append(BATTLER.pack(log.teams[i], log.start_health[i], log.start_damage[i], getattr(battler, "initiative", 0.0), len(name)))
+        parts.append(name)
+    for action in log.actions:
+        parts.append(_pack_name(action.name))
+
+    records = np.empty(len(log), dtype=RECORD)
+    for name in RECORD.names:
+        records[name] = log.column(name)
+
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+        f.write(records.tobytes())
+
+class Replay:
+    """
+    Read-only view of a replay file written by save_replay.
+
+    The file is memory-mapped and the event records are exposed as a NumPy structured array (.records) directly
+    over the mapping, so replays can be searched and scanned without reading them into memory.
+    Call .close (or use the Replay as a context manager) when done, after dropping any references to .records.
+    """
+    def __init__(self, path:str) -> None:
+        self._file = open(path, "rb")
+        # Empty files cannot be mapped, so check the size before mapping.
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise ReplayFormatException(f"'{path}' is too short to be a replay.")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read(path)
+        except Exception as e:
+            self._map.close()
+            self._file.close()
+            if isinstance(e, (struct.error, UnicodeDecodeError)):
+                raise ReplayFormatException(f"'{path}' is truncated or corrupt.") from e
+            raise
+
+    def _read(self, path:str) -> None:
+        """
+        Reads the header, roster and actions, and maps the records.
+        """
+        magic, version, roster_size, action_count, record_count, scheduler_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayFormatException(f"'{path}' is not a version {VERSION} replay.")
+
+        offset = HEADER.size
+        self.scheduler: str = self._map[offset:offset + scheduler_length].decode("utf-8")
+        offset += scheduler_length
+
+        self.roster: list[Tuple[int, str, int, int, float]] = []
+        """The (team, name, health, damage, initiative) of every battler at the start of the battle."""
+        for _ in range(roster_size):
+            team, health, damage, initiative, name_length = BATTLER.unpack_from(self._map, offset)
+            offset += BATTLER.size
+            name = self._map[offset:offset + name_length].decode("utf-8")
+            offset += name_length
+            self.roster.append((team, name, health, damage, initiative))
+
+        self.actions: list[str] = []
+        """Names of the actions, indexed by the action column of the records."""
+        for _ in range(action_count):
+            (name_length,) = NAME.unpack_from(self._map, offset)
+            offset += NAME.size
+            self.actions.append(self._map[offset:offset + name_length].decode("utf-8"))
+            offset += name_length
+
+        if len(self._map) < offset + record_count * RECORD.itemsize:
+            raise ReplayFormatException(f"'{path}' is truncated.")
+        self.records: np.ndarray = np.frombuffer(self._map, dtype=RECORD, count=record_count, offset=offset)
+
+    def close(self) -> None:
+        self.records = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Records are still referenced elsewhere, the mapping is closed once they are garbage collected.
+            pass
+        self._file.close()
+
+    def __enter__(self) -> Replay:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index:int) -> np.void:
+        return self.records[index]
+
+    def seek_turn(self, turn:int) -> int:
+        """
+        Returns the index of the first record at or after the given turn, found by binary search.
+        """
+        return int(np.searchsorted(self.records["turn"], turn, side="left"))
+
+    def turn_records(self, turn:int) -> np.ndarray:
+        """
+        Returns the records of the given turn.
+        """
+        start = self.seek_turn(turn)
+        end = int(np.searchsorted(self.records["turn"], turn, side="right"))
+        return self.records[start:end]
+
+    def battle(self) -> Battle:
+        """
+        Creates a new Battle with the roster from the header, in its starting state.
+        """
+        teams = [[], []]
+        for team, name, health, damage, initiative in self.roster:
+            teams[team].append(Battler(name, health, damage, initiative))
+        scheduler = SCHEDULERS.get(self.scheduler)
+        if scheduler is None:
+            raise ReplayFormatException(f"Unknown turn order scheduler '{self.scheduler}'.")
+        return Battle(teams[0], teams[1], scheduler=scheduler)
+
+    def verify(self, battle:Optional[Battle]=None) -> bool:
+        """
+        Re-drives a battle (by default one created by .battle) turn by turn, checking that every event matches the recorded one.
+
+        Returns True if the whole replay matched, raises ReplayMismatchException at the first event that does not.
+        """
+        if battle is None:
+            battle = self.battle()
+        index = {b: i for i, b in enumerate(battle.roster)}
+        row = 0
+        for turn, events in battle.stream():
+            for e in events:
+                if len(self.records) <= row:
+                    raise ReplayMismatchException(f"Turn {turn} has more events than the replay.")
+                expected = self.records[row]
+                actual = (
+                    turn, int(e.type), e.action.name, index[e.battler], index[e.target],
+                    e.health_delta, e.damage_delta, e.health, e.damage
+                )
+                recorded = (
+                    int(expected["turn"]), int(expected["type"]), self.actions[expected["action"]], int(expected["battler"]), int(expected["target"]),
+                    int(expected["health_delta"]), int(expected["damage_delta"]), int(expected["health"]), int(expected["damage"])
+                )
+                if actual != recorded:
+                    raise ReplayMismatchException(f"Event {row} differs from the replay: expected {recorded}, got {actual}.")
+                row += 1
+        if row != len(self.records):
+            raise ReplayMismatchException(f"The battle ended after {row} events, but the replay has {len(self.records)}.")
+        return True
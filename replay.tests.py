@@ -0,0 +1,107 @@
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+
+from battle import Battle, Battler, InitiativeScheduler
+from battlelog import BattleLog
+from replay import BATTLER, HEADER, Replay, ReplayFormatException, ReplayMismatchException, save_replay
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "battle.replay")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, scheduler=None):
+        team1 = [Battler("Evan", 9, 2), Battler("John", 6, 3, initiative=50)]
+        team2 = [Battler("Goblin 1", 5, 1), Battler("Goblin 2", 5, 2), Battler("Goblin 3", 4, 1)]
+        battle = Battle(team1, team2, scheduler=scheduler)
+        log = BattleLog.attach(battle)
+        turns = battle.resolve()
+        save_replay(self.path, log)
+        return turns
+
+    def test_replay_header(self):
+        self.record()
+        with Replay(self.path) as replay:
+            self.assertEqual(replay.scheduler, "RoundRobinScheduler")
+            self.assertEqual(replay.roster[0], (0, "Evan", 9, 2, 20.0))
+            self.assertEqual(replay.roster[4], (1, "Goblin 3", 4, 1, 20.0))
+            self.assertEqual(replay.actions, ["basic attack"])
+
+    def test_replay_records(self):
+        turns = self.record()
+        with Replay(self.path) as replay:
+            self.assertEqual(len(replay), len(turns))
+            first = replay[0]
+            self.assertEqual(first["turn"], 1)
+            self.assertEqual(first["battler"], 0)
+            self.assertEqual(first["target"], 2)
+            self.assertEqual(first["health"], 3)
+            self.assertEqual(first["health_delta"], -2)
+            self.assertEqual(replay.seek_turn(3), 2)
+            self.assertEqual(replay.seek_turn(len(turns) + 10), len(replay))
+            self.assertEqual(list(replay.turn_records(4)["battler"]), [4])
+
+    def test_replay_verify(self):
+        self.record()
+        with Replay(self.path) as replay:
+            self.assertTrue(replay.verify())
+
+    def test_replay_verify_initiative(self):
+        self.record(scheduler=InitiativeScheduler)
+        with Replay(self.path) as replay:
+            self.assertEqual(replay.scheduler, "InitiativeScheduler")
+            self.assertTrue(replay.verify())
+
+    def test_replay_verify_mismatch(self):
+        self.record()
+        with Replay(self.path) as replay:
+            battle = replay.battle()
+            battle.roster[0].stats.damage += 1
+            with self.assertRaises(ReplayMismatchException):
+                replay.verify(battle)
+
+    def test_replay_invalid(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            for content in [b"not a replay at all, just some text", b""]:
+                with open(self.path, "wb") as f:
+                    f.write(content)
+                with self.assertRaises(ReplayFormatException):
+                    Replay(self.path)
+            gc.collect()
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [], "Invalid replays should not leave the file open.")
+
+    def test_replay_truncated(self):
+        self.record()
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Cut off in the middle of the roster, and in the middle of a battler's name.
+        for length in [HEADER.size + len("RoundRobinScheduler") + 5, HEADER.size + len("RoundRobinScheduler") + BATTLER.size + 2]:
+            with open(self.path, "wb") as f:
+                f.write(data[:length])
+            with self.assertRaises(ReplayFormatException):
+                Replay(self.path)
+
+        with open(self.path, "wb") as f:
+            f.write(data.replace("Evan".encode("utf-8"), b"\xff\xfe\xfd\xfc"))
+        with self.assertRaises(ReplayFormatException):
+            Replay(self.path)
+
+    def test_replay_unknown_scheduler(self):
+        battle = Battle([Battler("A", 2, 1)], [Battler("B", 2, 1)])
+        log = BattleLog(battle.roster, [0, 1], "Battle")
+        save_replay(self.path, log)
+        with Replay(self.path) as replay:
+            with self.assertRaises(ReplayFormatException):
+                replay.battle()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+import random
+from typing import Optional, Tuple
+
+from battle import Battle, Battler
+
+# Empty type declarations so that the names can be used in type hints
+class MatchupResult: pass
+
+BattlerSpec = Tuple[str, int, int]
+"""Compact description of a battler: (name, health, damage)."""
+TeamSpec = Tuple[BattlerSpec, ...]
+"""Compact description of a team, as a sequence of BattlerSpecs."""
+
+class MatchupResult:
+    """
+    Aggregated results of all battles fought for one matchup.
+    """
+    def __init__(self, index:int) -> None:
+        self.index: int = index
+        """Position of the matchup in the list given to sweep."""
+        self.battles: int = 0
+        self.wins: list[int] = [0, 0]
+        """Number of battles won by team 1 and team 2 respectively."""
+        self.draws: int = 0
+        """Number of battles where neither team was left standing, or that ran out of turns."""
+        self.total_turns: int = 0
+        self.survivors: Counter = Counter()
+        """Histogram mapping the number of battlers left on the winning team to the number of battles that ended that way."""
+
+    def add(self, winner:Optional[int], turns:int, survivors:int) -> None:
+        """
+        Records the outcome of a single battle, winner being the index of the winning team or None for a draw.
+        """
+        self.battles += 1
+        self.total_turns += turns
+        if winner is None:
+            self.draws += 1
+        else:
+            self.wins[winner] += 1
+        self.survivors[survivors] += 1
+
+    @property
+    def win_rates(self) -> Tuple[float, float]:
+        """
+        Fraction of the battles won by team 1 and team 2 respectively.
+        """
+        if self.battles == 0:
+            return (0.0, 0.0)
+        return (self.wins[0] / self.battles, self.wins[1] / self.battles)
+
+    @property
+    def mean_turns(self) -> float:
+        if self.battles == 0:
+            return 0.0
+        return self.total_turns / self.battles
+
+    def __repr__(self) -> str:
+        return f"MatchupResult({self.index}, wins={self.wins}, draws={self.draws}, mean_turns={self.mean_turns:.2f})"
+
+def matchup_seed(seed:int, index:int, repeat:int) -> str:
+    """
+    Returns the seed used for the given repeat of a matchup, so that results do not depend on how matchups are split between workers.
+    """
+    return f"{seed}:{index}:{repeat}"
+
+def _fight(team1:TeamSpec, team2:TeamSpec, rng:random.Random, shuffle:bool, max_turns:Optional[int]) -> Tuple[Optional[int], int, int]:
+    """
+    Fights a single battle between the given team specs, returning (winner, turns, survivors).
+    """
+    teams = [[Battler(name, health, damage) for name, health, damage in team] for team in (team1, team2)]
+    if shuffle:
+        for team in teams:
+            rng.shuffle(team)
+
+    battle = Battle(teams[0], teams[1])
+    for turn, _ in battle:
+        if max_turns is not None and max_turns <= turn:
+            break
+
+    if not battle.is_done() or (len(teams[0]) == 0 and len(teams[1]) == 0):
+        return None, battle.current_turn, 0
+    winner = 0 if 0 < len(teams[0]) else 1
+    return winner, battle.current_turn, len(teams[winner])
+
+def _run_chunk(chunk:list[Tuple[int, TeamSpec, TeamSpec]], repeats:int, seed:int, shuffle:bool, max_turns:Optional[int]) -> list[MatchupResult]:
+    """
+    Worker entry point: runs every matchup in the chunk and returns only the aggregated results.
+    """
+    results = []
+    for index, team1, team2 in chunk:
+        result = MatchupResult(index)
+        for repeat in range(repeats):
+            rng = random.Random(matchup_seed(seed, index, repeat))
+            # Seed the global generator as well, so that any randomness in actions is reproducible.
+            random.seed(matchup_seed(seed, index, repeat))
+            result.add(*_fight(team1, team2, rng, shuffle, max_turns))
+        results.append(result)
+    return results
+
+def sweep(
+    matchups:Iterable[Tuple[TeamSpec, TeamSpec]],
+    repeats:int=1,
+    seed:int=0,
+    shuffle:bool=False,
+    max_turns:Optional[int]=None,
+    workers:Optional[int]=None,
+    chunksize:int=64
+) -> list[MatchupResult]:
+    """
+    Fights every matchup 'repeats' times across a pool of worker processes, returning one MatchupResult per matchup (in order).
+
+    Only the team specs are sent to the workers and only the aggregated results are sent back. Matchups are submitted
+    in chunks of 'chunksize' to keep the overhead of inter-process communication low. Every battle is seeded from
+    (seed, matchup index, repeat), so the results are the same regardless of the number of workers or the chunk size.
+
+    If 'shuffle' is True, the order of the battlers in each team is shuffled before every battle.
+    Battles that have not ended after 'max_turns' turns are counted as draws.
+    If 'workers' is 1, the battles are fought in this process instead.
+    """
+    specs = [(index, tuple(map(tuple, team1)), tuple(map(tuple, team2))) for index, (team1, team2) in enumerate(matchups)]
+    chunks = [specs[i:i + chunksize] for i in range(0, len(specs), chunksize)]
+
+    if workers == 1:
+        # _run_chunk seeds the global generator, restore the caller's state afterwards.
+        state = random.getstate()
+        try:
+            return [r for chunk in chunks for r in _run_chunk(chunk, repeats, seed, shuffle, max_turns)]
+        finally:
+            random.setstate(state)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_chunk, chunk, repeats, seed, shuffle, max_turns) for chunk in chunks]
+        return [r for future in futures for r in future.result()]
+
+def tournament(teams:dict[str, TeamSpec], **kwargs) -> dict[Tuple[str, str], MatchupResult]:
+    """
+    Fights a round-robin tournament between the named teams, where every pair of teams meets twice so that both get to go first.
+
+    Returns a dict mapping (first team, second team) to the result of the matchup. Keyword arguments are passed on to sweep.
+    """
+    pairs = list(permutations(teams, 2))
+    results = sweep([(teams[a], teams[b]) for a, b in pairs], **kwargs)
+    return dict(zip(pairs, results))
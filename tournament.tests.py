@@ -0,0 +1,66 @@
+import random
+import unittest
+
+from tournament import MatchupResult, sweep, tournament
+
+GOBLINS = (("Goblin 1", 2, 1), ("Goblin 2", 2, 1), ("Goblin 3", 2, 1))
+PARTY = (("Evan", 5, 2), ("John", 4, 1))
+KNIGHT = (("Knight", 20, 1),)
+TRAINEE = (("Trainee 1", 1, 1),)
+
+class TestTournament(unittest.TestCase):
+
+    def test_matchupresult(self):
+        result = MatchupResult(0)
+        self.assertEqual(result.win_rates, (0.0, 0.0))
+        result.add(0, 4, 2)
+        result.add(1, 6, 1)
+        result.add(None, 2, 0)
+        self.assertEqual(result.battles, 3)
+        self.assertEqual(result.wins, [1, 1])
+        self.assertEqual(result.draws, 1)
+        self.assertEqual(result.mean_turns, 4)
+        self.assertEqual(result.survivors, {2: 1, 1: 1, 0: 1})
+
+    def test_sweep_in_process(self):
+        results = sweep([(PARTY, GOBLINS), (TRAINEE, KNIGHT)], repeats=3, workers=1)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0].index, 0)
+        self.assertEqual(results[0].battles, 3)
+        self.assertEqual(results[0].win_rates, (1.0, 0.0))
+        self.assertEqual(results[1].win_rates, (0.0, 1.0))
+        self.assertEqual(results[1].mean_turns, 2)
+        self.assertEqual(results[1].survivors, {1: 3})
+
+    def test_sweep_keeps_global_random_state(self):
+        random.seed(999)
+        expected = random.random()
+        random.seed(999)
+        sweep([(PARTY, GOBLINS)], repeats=2, shuffle=True, workers=1)
+        self.assertEqual(random.random(), expected, "Fighting in this process should not change the caller's random state.")
+
+    def test_sweep_max_turns(self):
+        stalemate = (("Pacifist", 1, 0),)
+        results = sweep([(stalemate, stalemate)], max_turns=50, workers=1)
+        self.assertEqual(results[0].draws, 1)
+        self.assertEqual(results[0].mean_turns, 50)
+
+    def test_sweep_deterministic(self):
+        matchups = [(PARTY, GOBLINS), (GOBLINS, PARTY), (KNIGHT, GOBLINS)] * 5
+        local = sweep(matchups, repeats=4, seed=7, shuffle=True, workers=1)
+        pooled = sweep(matchups, repeats=4, seed=7, shuffle=True, workers=2, chunksize=2)
+        for a, b in zip(local, pooled):
+            self.assertEqual(a.index, b.index)
+            self.assertEqual(a.wins, b.wins)
+            self.assertEqual(a.total_turns, b.total_turns)
+            self.assertEqual(a.survivors, b.survivors)
+
+    def test_tournament(self):
+        results = tournament({"party": PARTY, "goblins": GOBLINS}, workers=1)
+        self.assertEqual(set(results), {("party", "goblins"), ("goblins", "party")})
+        self.assertEqual(results[("party", "goblins")].wins, [1, 0])
+        self.assertEqual(results[("goblins", "party")].wins, [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()